@@ -0,0 +1,40 @@
+"""
+app_paths.py
+
+Locations for per-user application data.
+
+- config_dir(): %APPDATA%\\Transcriber on Windows, otherwise the current directory (matching where
+  the GUI has always stored `transcriber_config.json`).
+- cache_dir(name): a named cache directory. TRANSCRIBER_CACHE_DIR overrides the root; otherwise
+  %LOCALAPPDATA%\\Transcriber\\cache on Windows or $XDG_CACHE_HOME/transcriber (~/.cache/transcriber).
+"""
+
+from __future__ import annotations
+
+import os
+
+
+def config_dir() -> str:
+    appdata = os.getenv("APPDATA")
+    if appdata:
+        path = os.path.join(appdata, "Transcriber")
+        try:
+            os.makedirs(path, exist_ok=True)
+            return path
+        except Exception:
+            pass
+    return os.getcwd()
+
+
+def cache_dir(name: str) -> str:
+    root = os.getenv("TRANSCRIBER_CACHE_DIR")
+    if not root:
+        local = os.getenv("LOCALAPPDATA")
+        if local:
+            root = os.path.join(local, "Transcriber", "cache")
+        else:
+            xdg = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            root = os.path.join(xdg, "transcriber")
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
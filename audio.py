@@ -0,0 +1,292 @@
+"""
+audio.py
+
+Audio decoding helpers. Everything is decoded to 16 kHz mono float32 samples, the format the
+whisper models expect.
+
+PCM WAV files are read directly with the standard library; anything else goes through ffmpeg
+(which must be on PATH, as it already is for whisper itself). numpy is imported lazily.
+
+For long files `StreamingDecoder` decodes fixed-size, overlapping windows on a background thread
+into a small ring buffer of preallocated slots, so decoding the next window overlaps with work on
+the current one and memory stays flat regardless of file length.
+
+API:
+- load_audio(path) -> numpy.ndarray
+- load_clip(path, start_seconds, seconds) -> numpy.ndarray  (decodes only that stretch)
+- probe_duration(path) -> float | None
+- StreamingDecoder(path, window_seconds, overlap_seconds, slots=3)
+- is_audio_file(path) -> bool
+- SAMPLE_RATE, AUDIO_EXTENSIONS
+"""
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import threading
+import wave
+from typing import Any, Iterator, Optional, Tuple
+
+SAMPLE_RATE = 16000
+
+# Extensions picked up when a whole folder is added or watched
+AUDIO_EXTENSIONS = (
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma",
+    ".mp4", ".mkv", ".webm", ".mov",
+)
+
+
+def is_audio_file(path: str) -> bool:
+    return path.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def _np():
+    import numpy as np
+    return np
+
+
+def _pcm16_to_float(data: bytes) -> Any:
+    np = _np()
+    return np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+
+
+def _load_wav(path: str) -> Any:
+    np = _np()
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2 or w.getcomptype() != "NONE":
+            raise ValueError("not 16-bit PCM")
+        channels = w.getnchannels()
+        rate = w.getframerate()
+        samples = _pcm16_to_float(w.readframes(w.getnframes()))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE and len(samples):
+        n_out = int(round(len(samples) * SAMPLE_RATE / rate))
+        samples = np.interp(
+            np.arange(n_out) * (rate / SAMPLE_RATE), np.arange(len(samples)), samples
+        ).astype(np.float32)
+    return samples
+
+
+def _ffmpeg_cmd(path: str) -> list[str]:
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-",
+    ]
+
+
+def load_audio(path: str) -> Any:
+    """Decode a whole file to a 16 kHz mono float32 numpy array."""
+    if path.lower().endswith(".wav"):
+        try:
+            return _load_wav(path)
+        except (wave.Error, ValueError, EOFError):
+            pass  # unusual WAV flavour, let ffmpeg handle it
+    try:
+        out = subprocess.run(_ffmpeg_cmd(path), capture_output=True, check=True).stdout
+    except FileNotFoundError as e:
+        raise RuntimeError("ffmpeg was not found on PATH; it is required to decode this file") from e
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return _pcm16_to_float(out)
+
+
+def load_clip(path: str, start_seconds: float, seconds: float) -> Any:
+    """Decode `seconds` of audio starting at `start_seconds` without decoding the rest of the file."""
+    np = _np()
+    start_seconds = max(0.0, start_seconds)
+    try:
+        with wave.open(path, "rb") as w:
+            if w.getsampwidth() != 2 or w.getcomptype() != "NONE":
+                raise ValueError("not 16-bit PCM")
+            rate = w.getframerate()
+            channels = w.getnchannels()
+            w.setpos(min(w.getnframes(), int(start_seconds * rate)))
+            samples = _pcm16_to_float(w.readframes(int(seconds * rate)))
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        if rate != SAMPLE_RATE and len(samples):
+            n_out = int(round(len(samples) * SAMPLE_RATE / rate))
+            samples = np.interp(
+                np.arange(n_out) * (rate / SAMPLE_RATE), np.arange(len(samples)), samples
+            ).astype(np.float32)
+        return samples
+    except (wave.Error, ValueError, EOFError):
+        pass
+    # -ss before -i seeks in the container instead of decoding up to the offset
+    cmd = _ffmpeg_cmd(path)
+    i = cmd.index("-i")
+    cmd[i:i] = ["-ss", f"{start_seconds:.3f}", "-t", f"{seconds:.3f}"]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except FileNotFoundError as e:
+        raise RuntimeError("ffmpeg was not found on PATH; it is required to decode this file") from e
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return _pcm16_to_float(out)
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Return the duration of a file in seconds without decoding it, or None if unknown."""
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except Exception:
+        pass
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, check=True, text=True,
+        ).stdout
+        return float(out.strip())
+    except Exception:
+        return None
+
+
+class _PCMSource:
+    """Sequential reader of 16 kHz mono int16 samples from a WAV file or an ffmpeg pipe."""
+
+    def __init__(self, path: str):
+        self._wav = None
+        self._proc = None
+        self._channels = 1
+        if path.lower().endswith(".wav"):
+            try:
+                w = wave.open(path, "rb")
+                if w.getsampwidth() == 2 and w.getframerate() == SAMPLE_RATE and w.getcomptype() == "NONE":
+                    self._wav = w
+                    self._channels = w.getnchannels()
+                else:
+                    w.close()
+            except (wave.Error, EOFError):
+                pass
+        if self._wav is None:
+            try:
+                self._proc = subprocess.Popen(_ffmpeg_cmd(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            except FileNotFoundError as e:
+                raise RuntimeError("ffmpeg was not found on PATH; it is required to decode this file") from e
+
+    def read_into(self, out: Any) -> int:
+        """Fill the float32 array `out` with the next samples. Returns how many were read."""
+        np = _np()
+        want = len(out)
+        if self._wav is not None:
+            data = self._wav.readframes(want)
+            samples = np.frombuffer(data, np.int16)
+            if self._channels > 1:
+                samples = samples.reshape(-1, self._channels).mean(axis=1)
+            n = len(samples)
+            np.multiply(samples, 1.0 / 32768.0, out=out[:n], casting="unsafe")
+            return n
+        raw = bytearray(want * 2)
+        view = memoryview(raw)
+        got = 0
+        while got < len(raw):
+            n = self._proc.stdout.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        n = got // 2
+        np.multiply(np.frombuffer(raw, np.int16, count=n), 1.0 / 32768.0, out=out[:n], casting="unsafe")
+        return n
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+
+    def check(self) -> None:
+        """Raise if the decoder process failed."""
+        if self._proc is not None:
+            rc = self._proc.wait()
+            if rc != 0:
+                err = self._proc.stderr.read().decode(errors="replace") if self._proc.stderr else ""
+                raise RuntimeError(f"Failed to decode audio (ffmpeg exit code {rc}): {err}")
+
+
+class StreamingDecoder:
+    """Decode a file into overlapping fixed-size windows on a background thread.
+
+    Iterating yields `(start_sample, samples)` where `samples` is a view into a ring-buffer slot.
+    The view is only valid until the next item is requested; copy it if it must outlive that.
+    Consecutive windows share `overlap_seconds` of audio.
+    """
+
+    def __init__(self, path: str, window_seconds: float, overlap_seconds: float = 0.0, slots: int = 3):
+        self.path = path
+        self.window = max(1, int(window_seconds * SAMPLE_RATE))
+        self.overlap = min(int(overlap_seconds * SAMPLE_RATE), self.window // 2)
+        self.slots = max(2, slots)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._filled: "queue.Queue[Any]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._bufs: list = []
+
+    def _decode(self, source: _PCMSource) -> None:
+        np = _np()
+        tail = np.empty(self.overlap, dtype=np.float32)
+        carry = 0
+        start = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    slot = self._free.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                buf = self._bufs[slot]
+                if carry:
+                    buf[:carry] = tail[:carry]
+                n = source.read_into(buf[carry:])
+                if n == 0:
+                    self._free.put(slot)
+                    break
+                count = carry + n
+                self._filled.put((slot, start, count))
+                if count < self.window:
+                    break
+                if self.overlap:
+                    tail[:] = buf[count - self.overlap:count]
+                    carry = self.overlap
+                start += count - carry
+            if not self._stop.is_set():
+                source.check()
+            self._filled.put(None)
+        except Exception as e:
+            self._filled.put(e)
+        finally:
+            source.close()
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        np = _np()
+        source = _PCMSource(self.path)
+        self._bufs = [np.empty(self.window, dtype=np.float32) for _ in range(self.slots)]
+        for i in range(self.slots):
+            self._free.put(i)
+        self._thread = threading.Thread(target=self._decode, args=(source,), daemon=True)
+        self._thread.start()
+        held: Optional[int] = None
+        try:
+            while True:
+                if held is not None:
+                    self._free.put(held)
+                    held = None
+                item = self._filled.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                held, start, count = item
+                yield start, self._bufs[held][:count]
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
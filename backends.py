@@ -0,0 +1,364 @@
+"""
+backends.py
+
+Inference backends. A backend knows how to load a model and how to turn a window of 16 kHz mono
+float32 audio into segments; everything else (decoding, chunking, VAD, stitching, paragraph
+formatting, writing) is shared code in `transcriber.py`.
+
+Segments returned by every backend are normalized to plain dicts with float `start`/`end` (seconds,
+relative to the window) and `text`.
+
+Backends:
+- "whisper"         openai-whisper on torch (the original path)
+- "faster-whisper"  CTranslate2 engine; int8 on CPU, float16 on CUDA. Much faster on CPU hosts.
+- "mock"            no model; deterministic text for tests and CI
+- "auto"            faster-whisper if installed, otherwise whisper
+
+Heavy packages are imported only when a backend actually loads a model; `available_backends()`
+checks installation without importing anything.
+
+API:
+- get_backend(name_or_instance) -> Backend
+- available_backends() -> list[str]
+- Backend.load(model_name, device) -> model
+- Backend.transcribe(model, audio, language=None, initial_prompt=None, source=None) -> dict
+- Backend.detect_language(model, audio, source=None) -> {code: probability}
+- Backend.transcribe_batch(model, clips, language=None, sources=None) -> list[dict]
+- Backend.capabilities() -> dict
+- prewarm(name) -> None  (import a backend's packages ahead of the first transcription)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from languages import LANGUAGES
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def configure_torch_threads(torch: Any) -> None:
+    """Apply TRANSCRIBER_CPU_THREADS / TRANSCRIBER_INTEROP_THREADS (set by `tuning.apply`) to torch."""
+    try:
+        threads = int(os.getenv("TRANSCRIBER_CPU_THREADS", "0") or 0)
+        interop = int(os.getenv("TRANSCRIBER_INTEROP_THREADS", "0") or 0)
+    except ValueError:
+        return
+    if threads > 0 and torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+    if interop > 0 and torch.get_num_interop_threads() != interop:
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError:
+            pass  # only possible before the first parallel operation
+
+
+def normalize_segments(segments: Any) -> List[Dict[str, Any]]:
+    """Convert backend-specific segment objects/dicts into {"start", "end", "text"} dicts."""
+    out = []
+    for seg in segments:
+        if isinstance(seg, dict):
+            start, end, text = seg.get("start", 0.0), seg.get("end", 0.0), seg.get("text", "")
+        else:
+            start, end, text = getattr(seg, "start", 0.0), getattr(seg, "end", 0.0), getattr(seg, "text", "")
+        out.append({"start": float(start), "end": float(end), "text": text or ""})
+    return out
+
+
+class Backend:
+    """Base class for inference backends."""
+
+    name = "base"
+
+    def dtype(self, device: str) -> str:
+        """Weight type used on `device`; part of the model registry key."""
+        return "float32"
+
+    def load(self, model_name: str, device: str) -> Any:
+        raise NotImplementedError
+
+    def transcribe(
+        self,
+        model: Any,
+        audio: Any,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Transcribe one window. Returns {"text": str, "segments": [normalized segments]}."""
+        raise NotImplementedError
+
+    def detect_language(self, model: Any, audio: Any, source: Optional[str] = None) -> Dict[str, float]:
+        """Language probabilities for a short clip (up to 30 s). Backends without language
+        identification (capabilities()["language_detection"] is False) return {}."""
+        return {}
+
+    def transcribe_batch(
+        self,
+        model: Any,
+        clips: List[Any],
+        language: Optional[str] = None,
+        sources: Optional[List[Optional[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Transcribe several short clips (up to 30 s each) together; one result per clip, as from
+        transcribe(), plus "language" (and "language_probability" when it was detected) if known.
+        Backends that cannot batch (capabilities()["batched"] is False) run the clips one by one."""
+        sources = sources or [None] * len(clips)
+        return [{**self.transcribe(model, clip, language=language, source=source), "language": language}
+                for clip, source in zip(clips, sources)]
+
+    def prewarm(self) -> None:
+        """Import the heavy packages this backend needs, without loading a model."""
+
+    def capabilities(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "available": True,
+            "devices": ["cpu"],
+            "dtypes": ["float32"],
+            # False means the backend can run without decodable audio (mock only)
+            "requires_audio": True,
+            # whether results may be stored in the result cache
+            "cacheable": True,
+            # whether one loaded model may run several transcriptions concurrently
+            "thread_safe": False,
+            # whether detect_language() is implemented
+            "language_detection": False,
+            # whether transcribe_batch() runs clips through the model together
+            "batched": False,
+            # whether a thread count set by `tuning.apply` reaches an already loaded model (False:
+            # it is fixed when the model is loaded)
+            "runtime_threads": True,
+        }
+
+
+def _missing_whisper_error(e: Exception) -> ImportError:
+    # Build helpful diagnostics so users can install into the same Python environment
+    exe = sys.executable or "python"
+    msg_lines = [
+        "whisper and/or torch not available in this Python environment.",
+        "Details:",
+        f"  sys.executable: {exe}",
+        f"  sys.path: {sys.path}",
+        "Recommendation:",
+        f"  Install inside this Python: {exe} -m pip install -U openai-whisper",
+        "  For torch, follow the official install instructions: https://pytorch.org/ (choose correct CUDA/cpu build).",
+        "  Or install the faster CPU engine: pip install faster-whisper (then use --backend faster-whisper).",
+        "If you are running the GUI or a packaged exe, ensure the runtime includes these packages or use mock mode.",
+        "To run a quick test without models, call transcribe_file(..., mock=True).",
+    ]
+    return ImportError("\n".join(msg_lines))
+
+
+class WhisperBackend(Backend):
+    name = "whisper"
+
+    def _import(self):
+        try:
+            # Try importing whisper; support potential alternate package names
+            try:
+                import whisper
+            except Exception:
+                try:
+                    import openai_whisper as whisper  # some installs may alias differently
+                except Exception:
+                    whisper = None
+            try:
+                import torch
+            except Exception:
+                torch = None
+            if whisper is None or torch is None:
+                raise ImportError("missing")
+            configure_torch_threads(torch)
+        except ImportError as e:
+            raise _missing_whisper_error(e) from e
+        return whisper
+
+    def load(self, model_name: str, device: str) -> Any:
+        return self._import().load_model(model_name, device=device)
+
+    def prewarm(self) -> None:
+        self._import()
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        result = model.transcribe(audio, language=language, fp16=False, initial_prompt=initial_prompt)
+        return {"text": result.get("text", ""), "segments": normalize_segments(result.get("segments", []))}
+
+    def detect_language(self, model, audio, source=None):
+        whisper = self._import()
+        if not getattr(model, "is_multilingual", True):
+            return {"en": 1.0}
+        _tokens, probs = model.detect_language(self._mel(whisper, model, audio).to(model.device))
+        return {code: float(p) for code, p in probs.items()}
+
+    def _mel(self, whisper: Any, model: Any, audio: Any) -> Any:
+        audio = whisper.pad_or_trim(audio)
+        try:
+            return whisper.log_mel_spectrogram(audio, n_mels=getattr(getattr(model, "dims", None), "n_mels", 80))
+        except TypeError:  # whisper releases before large-v3 have a fixed 80 mel bins
+            return whisper.log_mel_spectrogram(audio)
+
+    def transcribe_batch(self, model, clips, language=None, sources=None):
+        # Every clip is padded to whisper's 30 s window anyway; stacking them runs the encoder once
+        # for the batch and decodes all clips in lockstep instead of one model call per clip.
+        whisper = self._import()
+        import torch
+
+        mels = torch.stack([self._mel(whisper, model, clip) for clip in clips]).to(model.device)
+        options = whisper.DecodingOptions(language=language, without_timestamps=True,
+                                          fp16=getattr(model.device, "type", "cpu") == "cuda")
+        out = []
+        for clip, source, res in zip(clips, sources or [None] * len(clips), whisper.decode(model, mels, options)):
+            duration = len(clip) / 16000.0
+            if res.no_speech_prob > 0.6 and res.avg_logprob < -1.0:
+                out.append({"text": "", "segments": [], "language": res.language})
+            elif res.compression_ratio > 2.4 or res.avg_logprob < -1.0:
+                # greedy decoding went wrong (repetition, low confidence); redo this clip with
+                # transcribe()'s temperature fallback
+                out.append({**self.transcribe(model, clip, language=language or res.language, source=source),
+                            "language": res.language})
+            else:
+                item = {"text": res.text, "segments": [{"start": 0.0, "end": duration, "text": res.text}],
+                        "language": res.language}
+                if language is None and res.language_probs:
+                    item["language_probability"] = float(res.language_probs.get(res.language, 0.0))
+                out.append(item)
+        return out
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(available=_installed("whisper") and _installed("torch"), devices=["cpu", "cuda"],
+                    language_detection=True, batched=True)
+        return caps
+
+
+class FasterWhisperBackend(Backend):
+    """CTranslate2-based engine with int8 weights on CPU."""
+
+    name = "faster-whisper"
+
+    def dtype(self, device: str) -> str:
+        return "float16" if device == "cuda" else "int8"
+
+    def load(self, model_name: str, device: str) -> Any:
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "faster-whisper is not installed in this Python environment.\n"
+                f"Install it with: {sys.executable or 'python'} -m pip install -U faster-whisper"
+            ) from e
+        threads = int(os.getenv("TRANSCRIBER_CPU_THREADS", "0") or 0)
+        return WhisperModel(model_name, device=device, compute_type=self.dtype(device), cpu_threads=threads)
+
+    def prewarm(self) -> None:
+        import faster_whisper  # noqa: F401
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        segments, _info = model.transcribe(audio, language=language, initial_prompt=initial_prompt, beam_size=5)
+        segs = normalize_segments(list(segments))  # the engine yields lazily; run it to completion
+        return {"text": "".join(s["text"] for s in segs), "segments": segs}
+
+    def detect_language(self, model, audio, source=None):
+        # language identification runs eagerly; the segments are lazy and never decoded here
+        _segments, info = model.transcribe(audio, language=None, beam_size=1, without_timestamps=True)
+        probs = getattr(info, "all_language_probs", None) or [(info.language, info.language_probability)]
+        return {code: float(p) for code, p in probs}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(available=_installed("faster_whisper"), devices=["cpu", "cuda"], dtypes=["int8", "float16"],
+                    thread_safe=True, language_detection=True, runtime_threads=False)
+        return caps
+
+
+class MockBackend(Backend):
+    """Deterministic fake transcription for tests and CI (no model downloads)."""
+
+    name = "mock"
+
+    def dtype(self, device: str) -> str:
+        return "none"
+
+    def load(self, model_name: str, device: str) -> Any:
+        return model_name
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        time.sleep(0.3)  # simulate work
+        name = os.path.basename(source) if source else "audio"
+        text = f"[MOCK TRANSCRIPTION for {name} with model={model} language={language}]"
+        duration = len(audio) / 16000.0 if audio is not None else 0.0
+        return {"text": text, "segments": [{"start": 0.0, "end": duration, "text": text}]}
+
+    def transcribe_batch(self, model, clips, language=None, sources=None):
+        time.sleep(0.3)  # simulate work: one model call for the whole batch
+        out = []
+        for clip, source in zip(clips, sources or [None] * len(clips)):
+            probs = {} if language else self.detect_language(model, clip, source=source)
+            lang = language or max(probs, key=probs.get)
+            name = os.path.basename(source) if source else "audio"
+            text = f"[MOCK TRANSCRIPTION for {name} with model={model} language={lang}]"
+            item = {"text": text, "segments": [{"start": 0.0, "end": len(clip) / 16000.0, "text": text}], "language": lang}
+            if probs:
+                item["language_probability"] = probs[lang]
+            out.append(item)
+        return out
+
+    def detect_language(self, model, audio, source=None):
+        # "talk_he.wav" is Hebrew, anything else English
+        stem = os.path.splitext(os.path.basename(source or ""))[0]
+        code = stem.rsplit("_", 1)[-1].lower() if "_" in stem else "en"
+        if code not in LANGUAGES:
+            code = "en"
+        return {code: 0.9, "en" if code != "en" else "de": 0.1}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(dtypes=["none"], requires_audio=False, cacheable=False, thread_safe=True,
+                    language_detection=True, batched=True)
+        return caps
+
+
+_BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    MockBackend.name: MockBackend,
+}
+
+BACKEND_CHOICES = ["auto", *_BACKENDS]
+
+
+def available_backends() -> List[str]:
+    """Names of backends whose packages are installed (nothing is imported)."""
+    return [name for name, cls in _BACKENDS.items() if cls().capabilities()["available"]]
+
+
+def get_backend(backend: Union[str, Backend, None] = None) -> Backend:
+    """Resolve a backend name (or pass through an instance). None means "whisper"."""
+    if isinstance(backend, Backend):
+        return backend
+    name = (backend or "whisper").lower()
+    if name == "auto":
+        name = FasterWhisperBackend.name if _installed("faster_whisper") else WhisperBackend.name
+    try:
+        return _BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown backend {backend!r}; choose from {', '.join(BACKEND_CHOICES)}") from None
+
+
+def prewarm(backend: Union[str, Backend, None] = None) -> None:
+    """Import a backend's packages (e.g. torch) so the first transcription starts faster.
+    Errors are ignored: a missing package is reported when a transcription actually needs it."""
+    try:
+        get_backend(backend).prewarm()
+    except Exception:
+        pass
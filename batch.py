@@ -0,0 +1,280 @@
+"""
+batch.py
+
+Batch scheduler for transcribing many files. Used by `cli/transcribe_cli.py`.
+
+Jobs are ordered largest file first (so the long tail is not a single huge file started last) and
+fed to a pool of worker processes through a bounded queue: at most `queue_size` jobs are in flight
+at any time. Each worker process keeps its own resident model through the process-wide registry
+in `model_cache`, so a model is loaded once per worker rather than once per file.
+
+With `workers=1` the jobs run in the calling process and no pool is started.
+
+Without a language, every file's language is identified first (a few short clips each, see
+`language_id.py`, on the same workers that go on to transcribe). Jobs are then grouped by
+language, largest group first and largest file first within a group, and each job is transcribed
+with its detected language fixed instead of the model identifying it again per chunk.
+
+With `max_batch` > 1, clips of up to `transcriber.SHORT_CLIP_SECONDS` (voicemail and the like) skip
+all that and go through `transcriber.transcribe_clips`, which runs them through the model
+`max_batch` at a time (waiting at most `batch_wait` seconds for a batch to fill) and detects their
+language inline. With several workers each gets groups of clips to batch.
+
+API:
+- plan_jobs(files, model_name, out_dir=None) -> list[BatchJob]
+- order_by_language(jobs) -> list[BatchJob]
+- run_batch(jobs, model_name, language, workers=1, mock=False, queue_size=None, on_result=None,
+            group_by_language=True, max_batch=1, batch_wait=0.05, **transcribe_options) -> BatchSummary
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class BatchJob:
+    audio_path: str
+    output_path: str
+    size: int = 0
+    language: Optional[str] = None
+    detection: Optional[Dict[str, Any]] = None
+    duration: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    audio_path: str
+    output_path: Optional[str]
+    ok: bool
+    error: Optional[str] = None
+    seconds: float = 0.0
+    worker_pid: int = 0
+    output_files: List[str] = field(default_factory=list)
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+    batch_size: int = 0
+
+
+@dataclass
+class BatchSummary:
+    results: List[JobResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def succeeded(self) -> List[JobResult]:
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self) -> List[JobResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def files_per_minute(self) -> float:
+        return len(self.results) * 60.0 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_text(self) -> str:
+        lines = [
+            f"Summary: {len(self.succeeded)} succeeded, {len(self.failed)} failed "
+            f"in {self.elapsed:.1f}s (workers={self.workers}, {self.files_per_minute:.1f} files/min)"
+        ]
+        languages: Dict[str, int] = {}
+        for r in self.succeeded:
+            if r.language:
+                languages[r.language] = languages.get(r.language, 0) + 1
+        if languages:
+            lines.append("  Languages: " + ", ".join(f"{code} {n}" for code, n in
+                                                     sorted(languages.items(), key=lambda kv: -kv[1])))
+        for r in self.failed:
+            lines.append(f"  FAILED {r.audio_path}: {r.error}")
+        return "\n".join(lines)
+
+
+def default_output_path(audio_path: str, model_name: str, out_dir: Optional[str] = None) -> str:
+    out_dir = out_dir or os.path.dirname(audio_path) or os.getcwd()
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(out_dir, f"{base}_transcription_{model_name}.txt")
+
+
+def plan_jobs(files: Iterable[str], model_name: str, out_dir: Optional[str] = None) -> List[BatchJob]:
+    """Build jobs for existing files, largest first. Missing files are skipped by the caller."""
+    jobs = [
+        BatchJob(f, default_output_path(f, model_name, out_dir), os.path.getsize(f))
+        for f in files
+    ]
+    jobs.sort(key=lambda j: j.size, reverse=True)
+    return jobs
+
+
+def order_by_language(jobs: List[BatchJob]) -> List[BatchJob]:
+    """Order jobs by detected language (largest group by total size first), largest file first
+    within each group; undetected files form a group of their own."""
+    totals: Dict[str, int] = {}
+    for job in jobs:
+        totals[job.language or ""] = totals.get(job.language or "", 0) + job.size
+    return sorted(jobs, key=lambda j: (-totals[j.language or ""], j.language or "", -j.size))
+
+
+def _detect_job(audio_path: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    from language_id import detect_language
+
+    try:
+        return detect_language(audio_path, options["model_name"], options.get("backend"), options.get("mock", False))
+    except Exception:
+        return None  # the transcription reports the problem with the file
+
+
+def _run_job(job: BatchJob, options: Dict[str, Any]) -> JobResult:
+    # Imported here so worker processes only pay for it once, on their first job
+    from transcriber import transcribe_file
+
+    t0 = time.perf_counter()
+    if job.detection is not None:
+        options = {**options, "language_detection": job.detection}
+    try:
+        res = transcribe_file(job.audio_path, output_path=job.output_path, **options)
+        return JobResult(job.audio_path, res.get("output_file"), True,
+                         seconds=time.perf_counter() - t0, worker_pid=os.getpid(),
+                         output_files=list(res.get("output_files", {}).values()),
+                         language=res.get("language"), language_probability=res.get("language_probability"))
+    except Exception as e:
+        return JobResult(job.audio_path, None, False, error=str(e),
+                         seconds=time.perf_counter() - t0, worker_pid=os.getpid())
+
+
+# settings of transcribe_file that transcribe_clips shares
+_CLIP_OPTIONS = ("model_name", "language", "mock", "backend", "use_cache", "formats")
+# short clips handed to one worker at a time (a few batches' worth)
+_CLIP_GROUP_BATCHES = 4
+
+
+def _run_clips(jobs: List[BatchJob], options: Dict[str, Any], max_batch: int, batch_wait: float,
+               on_result: Optional[Callable[[JobResult], None]] = None) -> List[JobResult]:
+    from transcriber import transcribe_clips
+
+    results: List[JobResult] = []
+
+    def _done(i: int, res: Dict[str, Any]) -> None:
+        error = res["error"] or ("cancelled" if res["cancelled"] else None)
+        result = JobResult(jobs[i].audio_path, None if error else res.get("output_file"), error is None, error=error,
+                           seconds=res.get("timings", {}).get("total", 0.0), worker_pid=os.getpid(),
+                           output_files=list(res.get("output_files", {}).values()) if not error else [],
+                           language=res.get("language"), language_probability=res.get("language_probability"),
+                           batch_size=res.get("batch_size", 0))
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    transcribe_clips([j.audio_path for j in jobs], outputs=[j.output_path for j in jobs], max_batch=max_batch,
+                     batch_wait=batch_wait, on_result=_done, **{k: options[k] for k in _CLIP_OPTIONS if k in options})
+    return results
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    model_name: str,
+    language: Optional[str] = None,
+    workers: int = 1,
+    mock: bool = False,
+    queue_size: Optional[int] = None,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+    group_by_language: bool = True,
+    max_batch: int = 1,
+    batch_wait: float = 0.05,
+    **transcribe_options: Any,
+) -> BatchSummary:
+    """Run all jobs and collect per-file results into a summary.
+
+    `queue_size` bounds the number of submitted-but-unfinished jobs (default: 2 per worker).
+    `on_result` is called in the calling process as each job finishes.
+    With `group_by_language` and no `language`, languages are detected first and the jobs
+    reordered by language (see the module docstring).
+    `max_batch` > 1 transcribes short clips in batches of that size (not with `speakers`, which
+    needs timestamps inside each clip).
+    Extra keyword arguments are passed on to `transcribe_file` (they must be picklable).
+    """
+    from languages import normalize_language
+
+    language = normalize_language(language)
+    options = {"model_name": model_name, "language": language, "mock": mock, **transcribe_options}
+    # English-only models need no detection
+    detect = group_by_language and not language and not model_name.endswith(".en")
+    workers = max(1, int(workers))
+    summary = BatchSummary(workers=workers)
+    t0 = time.perf_counter()
+
+    def _collect(result: JobResult) -> None:
+        summary.results.append(result)
+        if on_result:
+            on_result(result)
+
+    def _detected(job: BatchJob, detection: Optional[Dict[str, Any]]) -> None:
+        job.detection = detection
+        job.language = detection["language"] if detection else None
+
+    clips: List[BatchJob] = []
+    if max_batch > 1 and not transcribe_options.get("speakers"):
+        from audio import probe_duration
+        from transcriber import SHORT_CLIP_SECONDS
+
+        for job in jobs:
+            job.duration = probe_duration(job.audio_path)
+        clips = [j for j in jobs if j.duration is not None and j.duration <= SHORT_CLIP_SECONDS]
+        jobs = [j for j in jobs if j.duration is None or j.duration > SHORT_CLIP_SECONDS]
+
+    if workers == 1:
+        if detect:
+            for job in jobs:
+                _detected(job, _detect_job(job.audio_path, options))
+            jobs = order_by_language(jobs)
+        for job in jobs:
+            _collect(_run_job(job, options))
+        if clips:
+            _run_clips(clips, options, max_batch, batch_wait, on_result=_collect)
+    else:
+        limit = max(workers, queue_size or 2 * workers)
+        in_flight: Dict[Future, List[BatchJob]] = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if detect:
+                futures = [(job, pool.submit(_detect_job, job.audio_path, options)) for job in jobs]
+                for job, fut in futures:
+                    try:
+                        _detected(job, fut.result())
+                    except Exception:
+                        _detected(job, None)  # a dead worker shows up again when the job runs
+                jobs = order_by_language(jobs)
+            group = max_batch * _CLIP_GROUP_BATCHES
+            # (batched, jobs): a single job, or a group of short clips for one worker to batch
+            units = [(False, [job]) for job in jobs]
+            units += [(True, clips[i:i + group]) for i in range(0, len(clips), group)]
+            pending = iter(units)
+            while True:
+                while len(in_flight) < limit:
+                    batched, unit = next(pending, (None, None))
+                    if unit is None:
+                        break
+                    if batched:
+                        in_flight[pool.submit(_run_clips, unit, options, max_batch, batch_wait)] = unit
+                    else:
+                        in_flight[pool.submit(_run_job, unit[0], options)] = unit
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    unit = in_flight.pop(fut)
+                    try:
+                        result = fut.result()
+                        for r in result if isinstance(result, list) else [result]:
+                            _collect(r)
+                    except Exception as e:
+                        # the worker process itself died (e.g. out of memory)
+                        for job in unit:
+                            _collect(JobResult(job.audio_path, None, False, error=f"worker failed: {e}"))
+
+    summary.elapsed = time.perf_counter() - t0
+    return summary
@@ -0,0 +1,112 @@
+"""
+Load test for the local HTTP transcription service (`server.py`).
+
+Fires `--requests` uploads of synthetic clips from `--clients` concurrent client threads and reports
+request latency percentiles, time to first segment and throughput. By default an in-process server
+with the mock backend is started, so this runs offline; pass `--url` to load an already running
+server instead.
+
+Usage:
+  python -m benchmarks.load_server --clients 16 --requests 200 --clip-seconds 10
+  python -m benchmarks.load_server --url http://127.0.0.1:8765 --clients 8
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def _one_request(url: str, body: bytes, model: Optional[str]) -> Dict[str, float]:
+    parts = urlsplit(url)
+    query = "filename=clip.wav&stream=1" + (f"&model={model}" if model else "")
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=600)
+    try:
+        conn.request("POST", f"/jobs?{query}", body=body, headers={"Content-Type": "audio/wav"})
+        resp = conn.getresponse()
+        first = None
+        status = "failed"
+        for line in resp:
+            event = json.loads(line)
+            if event["event"] == "segment" and first is None:
+                first = time.perf_counter() - t0
+            elif event["event"] == "end":
+                status = event["job"]["status"]
+        return {"latency": time.perf_counter() - t0, "first_segment": first, "ok": status == "done"}
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the transcription server")
+    parser.add_argument("--url", default=None, help="Server to load (default: start a mock-backend server in-process)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=64, help="Total uploads")
+    parser.add_argument("--clip-seconds", type=float, default=10.0)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--workers", type=int, default=2, help="Server workers (in-process server only)")
+    parser.add_argument("--max-batch", type=int, default=8, help="Server batch size (in-process server only)")
+    args = parser.parse_args(argv)
+
+    from benchmarks.synth import synth_audio, write_wav
+
+    with tempfile.TemporaryDirectory(prefix="transcriber-load-") as workdir:
+        clip = os.path.join(workdir, "clip.wav")
+        write_wav(clip, synth_audio(args.clip_seconds)[0])
+        with open(clip, "rb") as f:
+            body = f.read()
+
+        background = None
+        url = args.url
+        if url is None:
+            from server import TranscriptionService, start_background
+            background = start_background(TranscriptionService(
+                "small", backend="mock", workers=args.workers, max_batch=args.max_batch, use_cache=False,
+                upload_dir=workdir))
+            url = background.url
+        try:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                results = list(pool.map(lambda _i: _one_request(url, body, args.model), range(args.requests)))
+            wall = time.perf_counter() - t0
+        finally:
+            if background is not None:
+                background.stop()
+
+    latencies = [r["latency"] for r in results]
+    firsts = [r["first_segment"] for r in results if r["first_segment"] is not None]
+    report = {
+        "requests": len(results),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "clients": args.clients,
+        "wall_seconds": round(wall, 3),
+        "requests_per_min": round(len(results) * 60.0 / wall, 1) if wall > 0 else None,
+        "audio_rtf": round(wall / (len(results) * args.clip_seconds), 4),
+    }
+    for name, values in (("latency", latencies), ("first_segment", firsts)):
+        for pct in (50, 95, 99):
+            v = _percentile(values, pct)
+            report[f"{name}_p{pct}"] = round(v, 3) if v is not None else None
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Benchmark harness for the transcription pipeline.
+
+Runs `transcribe_file` and the batch scheduler on synthetic audio with a stand-in backend (see
+`standin.py`), so it needs no model downloads and no network. Each scenario runs in a fresh process
+so peak RSS is measured per scenario.
+
+Reported per scenario: audio seconds, wall seconds, real-time factor (wall / audio, lower is better),
+files/min, peak RSS and model-load time; single-file scenarios also report the per-stage timings
+from `transcribe_file` (load, decode, vad, inference, write). Results are saved as JSON; pass `--baseline` with an
+earlier results file to print the change.
+
+Usage:
+  python -m benchmarks.run_bench --long-seconds 600 --clips 24 --workers 4 --out bench.json
+  python -m benchmarks.run_bench --baseline bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its finished children, in MB (None if unknown)."""
+    children = 0.0
+    try:
+        import resource
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    except Exception:
+        pass
+    try:
+        # VmHWM is reset on exec, unlike ru_maxrss which a spawned process inherits from its parent
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return max(int(line.split()[1]) / 1024, children)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+    except Exception:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _scenario(spec: Dict[str, Any]) -> Dict[str, Any]:
+    from batch import plan_jobs, run_batch
+    from benchmarks.standin import StandInBackend
+    from model_cache import get_registry
+    from transcriber import transcribe_file
+
+    backend = StandInBackend(spec["cpu_cost"], spec["load_seconds"])
+    files: List[str] = spec["files"]
+    audio_seconds = spec["audio_seconds"]
+    out_dir = spec["out_dir"]
+    t0 = time.perf_counter()
+    if spec["kind"] == "single":
+        res = transcribe_file(files[0], model_name="bench", output_path=os.path.join(out_dir, spec["name"] + ".txt"),
+                              use_cache=False, backend=backend, **spec.get("options", {}))
+        extra = {"vad_skipped_seconds": round(res.get("vad_skipped_seconds", 0.0), 2), "timings": res["timings"]}
+    else:
+        jobs = plan_jobs(files, "bench", out_dir)
+        summary = run_batch(jobs, "bench", workers=spec["workers"], use_cache=False, backend=backend)
+        extra = {"failed": len(summary.failed)}
+    wall = time.perf_counter() - t0
+    # pool workers load in their own processes; only in-process loads are visible here
+    load = get_registry().stats()["load_seconds"] if spec["kind"] == "single" or spec.get("workers", 1) == 1 else None
+    return {
+        "name": spec["name"],
+        "files": len(files),
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(wall, 3),
+        "rtf": round(wall / audio_seconds, 4) if audio_seconds else None,
+        "files_per_min": round(len(files) * 60.0 / wall, 2) if wall else None,
+        "peak_rss_mb": round(peak_rss_mb() or 0.0, 1) or None,
+        "model_load_seconds": load,
+        **extra,
+    }
+
+
+def run_isolated(spec: Dict[str, Any]) -> Dict[str, Any]:
+    # a non-daemonic worker, so batch scenarios can start their own process pool
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_scenario, spec).result()
+
+
+def build_scenarios(args, workdir: str) -> List[Dict[str, Any]]:
+    from benchmarks.synth import synth_audio, write_wav
+
+    common = {"cpu_cost": args.cpu_cost, "load_seconds": args.load_seconds, "out_dir": workdir}
+    long_path = os.path.join(workdir, "long.wav")
+    samples, _ = synth_audio(args.long_seconds, args.silence, seed=1)
+    write_wav(long_path, samples)
+    clips = []
+    for i in range(args.clips):
+        p = os.path.join(workdir, f"clip{i:03d}.wav")
+        write_wav(p, synth_audio(args.clip_seconds, args.silence, seed=100 + i)[0])
+        clips.append(p)
+    single = {"kind": "single", "files": [long_path], "audio_seconds": args.long_seconds, **common}
+    batch = {"kind": "batch", "files": clips, "audio_seconds": args.clips * args.clip_seconds, **common}
+    return [
+        {**single, "name": "single"},
+        {**single, "name": "single_streaming", "options": {"streaming": True}},
+        {**single, "name": "single_vad", "options": {"vad": True}},
+        {**batch, "name": "batch_w1", "workers": 1},
+        {**batch, "name": f"batch_w{args.workers}", "workers": args.workers},
+    ]
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[str]:
+    old = {r["name"]: r for r in baseline}
+    lines = []
+    for r in results:
+        b = old.get(r["name"])
+        if not b or not b.get("wall_seconds"):
+            continue
+        change = (r["wall_seconds"] - b["wall_seconds"]) / b["wall_seconds"] * 100
+        lines.append(f"  {r['name']:<18} wall {b['wall_seconds']:.2f}s -> {r['wall_seconds']:.2f}s ({change:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transcription pipeline with a stand-in model")
+    parser.add_argument("--long-seconds", type=float, default=300.0, help="Length of the single long file")
+    parser.add_argument("--clips", type=int, default=16, help="Number of short files for the batch scenarios")
+    parser.add_argument("--clip-seconds", type=float, default=20.0)
+    parser.add_argument("--silence", type=float, default=0.3, help="Silence ratio of the synthetic audio")
+    parser.add_argument("--cpu-cost", type=float, default=0.05, help="Stand-in CPU seconds per audio second")
+    parser.add_argument("--load-seconds", type=float, default=0.5, help="Stand-in model load time")
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--only", default=None, help="Comma-separated scenario names to run")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="transcriber-bench-") as workdir:
+        scenarios = build_scenarios(args, workdir)
+        if args.only:
+            wanted = set(args.only.split(","))
+            scenarios = [s for s in scenarios if s["name"] in wanted]
+        results = []
+        for spec in scenarios:
+            r = run_isolated(spec)
+            results.append(r)
+            print(f"{r['name']:<18} rtf={r['rtf']}  files/min={r['files_per_min']}  "
+                  f"peak_rss={r['peak_rss_mb']}MB  load={r['model_load_seconds'] if r['model_load_seconds'] is not None else 'n/a'}s")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            lines = compare(results, json.load(f).get("results", []))
+        print("Compared with " + args.baseline + ":")
+        print("\n".join(lines) or "  (no matching scenarios)")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("Wrote:", args.out)
+    return report
+
+
+if __name__ == "__main__":
+    main()
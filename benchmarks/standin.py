@@ -0,0 +1,75 @@
+"""
+Stand-in inference backend for benchmarks.
+
+`StandInBackend` is passed to `transcribe_file(backend=...)`. From the pipeline's point of view it
+behaves like a real backend (load, then transcribe windows into segments) but costs a configurable
+amount of CPU time per audio-second instead of running a network.
+The CPU work is hashing, which releases the GIL like real inference kernels do, so thread- and
+process-level parallelism behave realistically.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from backends import Backend
+
+SAMPLE_RATE = 16000
+_WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+class StandInModel:
+    def __init__(self, cpu_per_audio_second: float):
+        self.cpu_per_audio_second = cpu_per_audio_second
+        self._block = b"\0" * 65536
+
+    def _burn(self, seconds: float) -> None:
+        t0 = time.thread_time()
+        while time.thread_time() - t0 < seconds:
+            hashlib.blake2b(self._block).digest()
+
+    def transcribe(self, audio: Any) -> Dict[str, Any]:
+        import numpy as np
+        duration = len(audio) / SAMPLE_RATE
+        self._burn(duration * self.cpu_per_audio_second)
+        segments = []
+        step = 3.0
+        t = 0.0
+        i = 0
+        while t < duration:
+            piece = audio[int(t * SAMPLE_RATE):int(min(duration, t + step) * SAMPLE_RATE)]
+            if len(piece) and float(np.sqrt(np.mean(piece.astype(np.float32) ** 2))) > 0.01:
+                text = " " + " ".join(_WORDS[(i + k) % len(_WORDS)] for k in range(6)) + "."
+                segments.append({"start": t, "end": min(duration, t + step), "text": text})
+                i += 1
+            t += step
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+class StandInBackend(Backend):
+    """Picklable backend (so it also works in batch worker processes)."""
+
+    name = "standin"
+
+    def __init__(self, cpu_per_audio_second: float = 0.05, load_seconds: float = 0.5):
+        self.cpu_per_audio_second = cpu_per_audio_second
+        self.load_seconds = load_seconds
+
+    def dtype(self, device: str) -> str:
+        return "standin"
+
+    def load(self, model_name: str, device: str) -> StandInModel:
+        time.sleep(self.load_seconds)  # simulated checkpoint load
+        return StandInModel(self.cpu_per_audio_second)
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        return model.transcribe(audio)
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(dtypes=["standin"], cacheable=False, thread_safe=True)
+        return caps
@@ -0,0 +1,141 @@
+"""
+checkpoint.py
+
+Chunk-level checkpoint journal for long transcriptions.
+
+While a file is transcribed, one JSON line is appended to `<output>.journal` after every window:
+the segments that became final, plus the state needed to continue exactly where the run stopped
+(start of the window, audio processed, the stitcher's held-back segments and the prompt carried
+into the next window). A resumed run skips every window up to the last committed one, restores
+that state and carries on, so its output is identical to an uninterrupted run.
+
+The journal is append-only. Each record is flushed to the OS immediately, so a crash of the
+process loses nothing; `os.fsync` runs at most every `fsync_interval` seconds, so a power loss
+costs at most that much work and the disk is not forced on every window. A torn last line (power
+loss mid-write) is ignored. The first line identifies the audio (size and mtime) and the settings
+that shape the windows; a journal that does not match is discarded. The journal is removed when
+the run completes and kept when it is cancelled or crashes.
+
+API:
+- journal_path(output_path) -> str
+- Journal.open(path, header, resume=False) -> (Journal, state | None)
+- Journal.commit(record)
+- Journal.close(remove=False)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+JOURNAL_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(output_path: str) -> str:
+    return output_path + ".journal"
+
+
+def audio_identity(audio_path: str) -> Dict[str, int]:
+    st = os.stat(audio_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_state(path: str, header: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int, Optional[str]]:
+    """Replay a journal into a resume state. Returns (state, length of the intact part in bytes,
+    why an existing journal was not usable); the state is None if the journal is missing, empty or
+    for other input."""
+    try:
+        with open(path, "rb") as f:
+            lines = f.readlines()
+    except OSError:
+        return None, 0, None
+    records = []
+    intact = 0
+    for line in lines:
+        if not line.endswith(b"\n"):
+            break  # torn tail; everything before it is intact
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+        intact += len(line)
+    if not records:
+        return None, 0, "unreadable journal" if lines else None
+    expected = {"type": "header", **header}
+    if records[0] != expected:
+        changed = sorted(k for k in expected.keys() | records[0].keys() if records[0].get(k) != expected.get(k))
+        return None, 0, "different " + ", ".join(changed)
+    windows = records[1:]
+    if not windows:
+        return None, 0, None
+    segments: List[Dict[str, Any]] = []
+    for rec in windows:
+        segments.extend(rec.get("segments", []))
+    last = windows[-1]
+    state = {"start": last["start"], "processed": last["processed"], "segments": segments,
+             "pending": last.get("pending", []), "prompt": last.get("prompt"), "skipped": last.get("skipped", 0.0)}
+    return state, intact, None
+
+
+class Journal:
+    def __init__(self, path: str, fsync_interval: float = 5.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._f = None
+        self._last_sync = time.monotonic()
+        self.discarded: Optional[str] = None  # why a journal asked to resume was started afresh
+
+    @classmethod
+    def open(cls, path: str, header: Dict[str, Any], resume: bool = False,
+             fsync_interval: float = 5.0) -> Tuple["Journal", Optional[Dict[str, Any]]]:
+        """Open the journal for appending. With `resume`, a matching journal is replayed and its
+        state returned; otherwise (or if it does not match) a fresh journal is started. A journal
+        discarded for not matching is logged, and the reason kept in `discarded`."""
+        header = {"version": JOURNAL_VERSION, **header}
+        journal = cls(path, fsync_interval)
+        state, intact, journal.discarded = _read_state(path, header) if resume else (None, 0, None)
+        if journal.discarded:
+            logger.warning("Not resuming from %s (%s); starting over", path, journal.discarded)
+        if state is not None:
+            journal._f = open(path, "a", encoding="utf-8")
+            journal._f.truncate(intact)  # drop a torn last line before appending after it
+        else:
+            journal._f = open(path, "w", encoding="utf-8")
+            journal._write({"type": "header", **header})
+            journal._sync()
+        return journal, state
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def _sync(self) -> None:
+        try:
+            os.fsync(self._f.fileno())
+        except OSError:
+            pass
+        self._last_sync = time.monotonic()
+
+    def commit(self, record: Dict[str, Any]) -> None:
+        """Append one window record: {"start", "processed", "segments", "pending", "prompt", ...}."""
+        self._write(record)
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def close(self, remove: bool = False) -> None:
+        if self._f is None:
+            return
+        if not remove:
+            self._sync()
+        self._f.close()
+        self._f = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -3,12 +3,55 @@ Simple CLI wrapper for batch transcription.
 
 Usage:
   python -m cli.transcribe_cli --model small --lang en file1.mp3 file2.wav
+  python -m cli.transcribe_cli --workers 4 --model small recordings/*.mp3
+  python -m cli.transcribe_cli --watch /srv/recordings --model small
+  python -m cli.transcribe_cli --models tiny,small,large interview.mp3
+  arecord -f S16_LE -r 16000 -c 1 -t raw | python -m cli.transcribe_cli --live --model small
 
 Notes:
 - If whisper/torch are not installed, use --mock to avoid requiring models.
+- --backend faster-whisper uses the int8 CTranslate2 engine (pip install faster-whisper), which is
+  several times faster than whisper on CPU-only machines.
+- With --workers N > 1 files are transcribed by a pool of N processes, each keeping its own
+  resident model. Largest files are scheduled first. A summary is printed at the end.
+- --max-batch N runs clips of up to 30 s (voicemail) N at a time through the model instead of one
+  call per file, which raises files/min many times over on large sets of short clips. Each clip
+  still gets its own output, with one segment per clip.
+- --parallel N splits each long file at pauses and transcribes the pieces on N processes at once
+  (for a single long recording, where --workers has only one file to work on).
+- --formats txt,srt,vtt,json,tsv writes several outputs per file from one transcription.
+- Progress is checkpointed next to each output; after a crash, --resume continues from the last
+  finished window instead of starting over.
+- --models tiny,small,large transcribes each file with every listed model (decoded once, models
+  run concurrently where memory allows), writes one output per model and a
+  <base>_comparison.txt report with each model's real-time factor and word error rate against
+  the largest model.
+- --metrics FILE appends one JSON line per transcription (stage timings, real-time factor, peak
+  memory, cache hits); --metrics-prom FILE maintains a Prometheus text file; --profile-inference
+  FILE writes cProfile stats of the inference calls. See metrics.py.
+- Threads per job are set from the core count and --workers (see tuning.py), and a warning is
+  printed when the model will not fit in memory (--downgrade picks a smaller model instead).
+  --calibrate times --model with a few thread counts on this machine (on the given file, or a
+  synthetic clip) and saves the fastest setting for later runs.
+- Without --lang (or with --lang auto) each file's language is identified from a few short clips
+  before it is transcribed; batches are grouped by detected language, and the language and its
+  probability are written to the output header.
+- --speakers labels segments by speaker (offline, from the decoded audio; see speakers.py):
+  paragraphs break at speaker changes and every format prefixes the text with "Speaker N:".
+- --live transcribes raw 16 kHz mono PCM from stdin (or --live PIPE) as it arrives, printing
+  committed lines to stdout and the tentative tail on the terminal (stderr); --latency sets the
+  target delay. Latency percentiles are printed at the end. `python -m live --replay FILE` plays a
+  file into the pipe at real-time speed for testing (see live.py).
+- --watch DIR runs as a daemon: new audio files under DIR are transcribed once they stop growing,
+  with the model kept loaded between files. Processed files are recorded in DIR so a restart
+  does not redo them. Stop with Ctrl+C.
 """
 from __future__ import annotations
 
+import time
+
+_T0 = time.perf_counter()
+
 import argparse
 import os
 import sys
@@ -16,32 +59,271 @@ from typing import List
 
 # make local imports work when running as a module from project root
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from transcriber import transcribe_file, detect_device
+from startup_profile import profile
+
+profile.start(_T0)
+with profile.phase("import backends, batch"):
+    from backends import BACKEND_CHOICES
+    from writers import FORMATS, parse_formats
+    from batch import plan_jobs, run_batch
+    from watch import run_watch
+    from compare import parse_models
+    from languages import normalize_language
+    from live import DEFAULT_LATENCY_SECONDS, PCM_FORMATS
+    import tuning
+
+
+def _formats(value: str) -> List[str]:
+    try:
+        return parse_formats(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
 
 
 def main(argv: List[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--profile-startup" in argv:
+        with profile.phase("import transcriber"):
+            import transcriber  # noqa: F401
+        print(profile.report())
+        return 0
+
     parser = argparse.ArgumentParser(description="Batch transcribe audio files")
-    parser.add_argument("files", nargs="+", help="Audio files to transcribe")
+    parser.add_argument("files", nargs="*", help="Audio files to transcribe")
     parser.add_argument("--model", default="large", help="Whisper model to use (tiny, base, small, medium, large)")
-    parser.add_argument("--lang", default=None, help="Language code (e.g. en, he). Use auto or omit to let model detect language")
+    parser.add_argument("--models", default=None, type=parse_models,
+                        help="Comma-separated models to compare on each file (e.g. tiny,small,large); overrides --model")
+    parser.add_argument("--lang", default=None, type=normalize_language,
+                        help="Language code or name (e.g. en, he, Hebrew). Use auto or omit to detect it from short samples of each file")
     parser.add_argument("--out-dir", default=None, help="Directory to place transcriptions (defaults to each file's dir)")
     parser.add_argument("--mock", action="store_true", help="Run in mock mode (no real models required)")
+    parser.add_argument("--backend", default="whisper", choices=BACKEND_CHOICES,
+                        help="Inference engine: whisper, faster-whisper (int8, fast on CPU), mock, or auto")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default 1: run in this process)")
+    parser.add_argument("--queue-size", type=int, default=None, help="Maximum jobs in flight (default 2 per worker)")
+    parser.add_argument("--max-batch", type=int, default=1,
+                        help="Transcribe clips of up to 30 s this many per model call (default 1: one call per file)")
+    parser.add_argument("--batch-wait-ms", type=float, default=50.0,
+                        help="With --max-batch, how long a started batch waits for more decoded clips")
+    parser.add_argument("--parallel", type=int, default=0,
+                        help="Split each long file at pauses and transcribe the pieces on this many processes")
+    parser.add_argument("--streaming", action="store_true", help="Decode and transcribe concurrently with flat memory use (long files)")
+    parser.add_argument("--vad", action="store_true", help="Skip silence with a voice-activity pre-pass before inference")
+    parser.add_argument("--speakers", action="store_true",
+                        help="Label segments by speaker: paragraphs break at speaker changes, text is prefixed \"Speaker N:\"")
+    parser.add_argument("--profile-startup", action="store_true", help="Print startup phase timings and exit")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache (always re-transcribe)")
+    parser.add_argument("--formats", default="txt", type=_formats,
+                        help=f"Comma-separated output formats written in one pass ({','.join(FORMATS)}); default txt")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue interrupted runs from their checkpoint journal (<output>.journal)")
+    parser.add_argument("--threads", type=int, default=None, help="Inference threads per job (default: cores / concurrent jobs)")
+    parser.add_argument("--downgrade", action="store_true",
+                        help="Use a smaller model when the chosen one does not fit in available memory")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Find the fastest thread count for --model on this machine, save it to the config and exit")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="Append per-transcription metrics (stage timings, RTF, memory, cache hits) as JSON lines")
+    parser.add_argument("--metrics-prom", metavar="FILE", default=None,
+                        help="Keep Prometheus-format metrics in FILE (for node_exporter's textfile collector)")
+    parser.add_argument("--profile-inference", metavar="FILE", default=None,
+                        help="Profile the inference calls with cProfile and write the stats to FILE")
+    parser.add_argument("--live", nargs="?", const="-", metavar="SOURCE", default=None,
+                        help="Transcribe raw 16 kHz mono PCM as it arrives from stdin (or SOURCE, e.g. a named pipe)")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SECONDS,
+                        help="With --live: target delay in seconds between speech and its text")
+    parser.add_argument("--pcm-format", default="s16le", choices=PCM_FORMATS, help="With --live: sample format of the input")
+    parser.add_argument("--live-output", metavar="FILE", default=None,
+                        help="With --live: write the transcript to FILE (and the other --formats) when the input ends")
+    parser.add_argument("--watch", metavar="DIR", default=None, help="Keep running and transcribe audio files as they arrive in DIR")
+    parser.add_argument("--settle-seconds", type=float, default=2.0, help="With --watch: wait until a file is unchanged this long")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="With --watch: seconds between checks for new files")
+    parser.add_argument("--index", default=None, help="With --watch: processed-files index (default DIR/.transcriber-processed.jsonl)")
 
     args = parser.parse_args(argv)
+    if args.calibrate:
+        return _calibrate(args)
+    if not args.files and not args.watch and not args.live:
+        parser.error("give audio files to transcribe, --watch DIR or --live")
+    if args.parallel > 1 and (args.workers > 1 or args.watch or args.streaming):
+        print("Warning: --parallel is ignored with --workers, --watch and --streaming")
+        args.parallel = 0
+
+    # passed on through the environment so batch worker processes report too
+    for var, value in (("TRANSCRIBER_METRICS", args.metrics), ("TRANSCRIBER_METRICS_PROM", args.metrics_prom),
+                       ("TRANSCRIBER_PROFILE", args.profile_inference)):
+        if value:
+            os.environ[var] = os.path.abspath(value)
 
+    files = []
     for f in args.files:
         if not os.path.exists(f):
             print(f"File not found: {f}")
             continue
-        out_dir = args.out_dir or os.path.dirname(f) or os.getcwd()
-        base = os.path.splitext(os.path.basename(f))[0]
-        out_name = os.path.join(out_dir, f"{base}_transcription_{args.model}.txt")
+        files.append(f)
+
+    def report(r):
+        if r.ok:
+            detected = f" [{r.language} {r.language_probability:.0%}]" if r.language_probability is not None else ""
+            print(f"Wrote: {', '.join(r.output_files) or r.output_path}{detected}")
+        else:
+            print(f"Error transcribing {r.audio_path}: {r.error}")
+
+    # per-job threads so concurrent jobs do not oversubscribe the cores; warn if the model won't fit
+    backend = "mock" if args.mock else args.backend
+    if args.models:
+        # compare_models admits models by memory itself; only the threads are planned here
+        plan = tuning.plan(args.models[-1], workers=len(args.models), backend=backend, threads=args.threads)
+        plan.warnings.clear()
+    else:
+        plan = tuning.plan(args.model, workers=max(args.workers, args.parallel), backend=backend, shared_model=bool(args.watch),
+                           downgrade=args.downgrade, threads=args.threads)
+        args.model = plan.model_name
+    for warning in plan.warnings:
+        print(f"Warning: {warning}")
+    tuning.apply(plan)
+    tuned = {"tuned_chunk_seconds": plan.chunk_seconds} if plan.chunk_seconds else {}
+
+    if args.live:
+        return _live(args)
+
+    if args.watch:
+        if not os.path.isdir(args.watch):
+            print(f"Directory not found: {args.watch}")
+            return 1
+        print(f"Watching {args.watch} (Ctrl+C to stop)")
         try:
-            res = transcribe_file(f, model_name=args.model, language=args.lang, output_path=out_name, mock=args.mock)
-            print(f"Wrote: {res.get('output_file')}")
+            # in watch mode --workers threads share this process's resident model
+            run_watch(
+                args.watch,
+                model_name=args.model,
+                language=args.lang,
+                mock=args.mock,
+                out_dir=args.out_dir,
+                index_path=args.index,
+                settle_seconds=args.settle_seconds,
+                poll_interval=args.poll_interval,
+                workers=args.workers,
+                on_result=report,
+                streaming=args.streaming,
+                vad=args.vad,
+                speakers=args.speakers,
+                use_cache=not args.no_cache,
+                backend=args.backend,
+                formats=args.formats,
+                **tuned,
+            )
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.models:
+        return _compare(files, args)
+
+    jobs = plan_jobs(files, args.model, args.out_dir)
+    summary = run_batch(
+        jobs,
+        model_name=args.model,
+        language=args.lang,
+        workers=args.workers,
+        mock=args.mock,
+        queue_size=args.queue_size,
+        max_batch=args.max_batch,
+        batch_wait=args.batch_wait_ms / 1000.0,
+        on_result=report,
+        streaming=args.streaming,
+        vad=args.vad,
+        speakers=args.speakers,
+        use_cache=not args.no_cache,
+        backend=args.backend,
+        formats=args.formats,
+        resume=args.resume,
+        parallel=args.parallel,
+        **tuned,
+    )
+    if len(jobs) > 1 or args.workers > 1:
+        print(summary.to_text())
+    return 1 if summary.failed else 0
+
+
+def _live(args) -> int:
+    from live import transcribe_live
+
+    tty = sys.stderr.isatty()
+
+    def clock(seconds: float) -> str:
+        m, s = divmod(int(seconds), 60)
+        return f"{m // 60}:{m % 60:02d}:{s:02d}" if m >= 60 else f"{m}:{s:02d}"
+
+    def committed(segments):
+        if tty:
+            sys.stderr.write("\r\033[K")  # clear the tentative line
+        for seg in segments:
+            print(f"[{clock(seg['start'])}] {seg['text'].strip()}", flush=True)
+
+    def tentative(segments):
+        if tty:
+            text = " ".join(seg["text"].strip() for seg in segments)
+            sys.stderr.write("\r\033[K" + (f"... {text[-100:]}" if text else ""))
+            sys.stderr.flush()
+
+    stream = sys.stdin.buffer if args.live == "-" else open(args.live, "rb")
+    try:
+        res = transcribe_live(stream, model_name=args.model, language=args.lang, backend=args.backend, mock=args.mock,
+                              latency_seconds=args.latency, pcm_format=args.pcm_format, on_commit=committed,
+                              on_tentative=tentative, output_path=args.live_output, formats=args.formats,
+                              source="<stdin>" if args.live == "-" else args.live)
+    except Exception as e:
+        print(f"Live transcription failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    for kind in ("tentative", "committed"):
+        lat = res["latency"][kind]
+        if lat["count"]:
+            print(f"Latency ({kind}, {lat['count']} segments): p50 {lat['p50']:.2f}s, p90 {lat['p90']:.2f}s, "
+                  f"p99 {lat['p99']:.2f}s, max {lat['max']:.2f}s", file=sys.stderr)
+    if res["output_files"]:
+        print(f"Wrote: {', '.join(res['output_files'].values())}", file=sys.stderr)
+    return 0
+
+
+def _calibrate(args) -> int:
+    sample = next((f for f in args.files if os.path.exists(f)), None)
+    print(f"Calibrating {args.model} ({args.backend}) on {sample or 'a synthetic clip'}...")
+    try:
+        entry = tuning.calibrate(args.model, backend="mock" if args.mock else args.backend, audio_path=sample,
+                                 language=args.lang, log=print)
+    except Exception as e:
+        print(f"Calibration failed: {e}")
+        return 1
+    print(f"Best: {entry['threads']} threads, RTF {entry['rtf']:.3f}, chunks of {entry['chunk_seconds']:.0f}s (saved)")
+    return 0
+
+
+def _compare(files: List[str], args) -> int:
+    from compare import compare_models
+
+    failed = 0
+    for f in files:
+        try:
+            comparison = compare_models(
+                f, args.models, language=args.lang, out_dir=args.out_dir, mock=args.mock, backend=args.backend,
+                streaming=args.streaming, vad=args.vad, speakers=args.speakers, use_cache=not args.no_cache,
+                formats=args.formats, resume=args.resume,
+                on_run=lambda r: print(f"Wrote: {', '.join(r.output_files)}" if r.ok
+                                       else f"{r.model}: {r.error or 'cancelled'}"),
+            )
         except Exception as e:
-            print(f"Error transcribing {f}: {e}")
+            print(f"Error comparing models on {f}: {e}")
+            failed += 1
+            continue
+        print(comparison.to_text(max_diffs=5))
+        print(f"Report: {comparison.report_path}")
+        failed += any(not r.ok for r in comparison.runs)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+compare.py
+
+Transcribe one file with several models and compare the results, to find the cheapest model that
+is good enough for a kind of recording.
+
+The audio is decoded once and the same samples are handed to every model. Models run
+concurrently as long as their estimated memory fits in what is available (free RAM, or free VRAM
+on cuda); a model that does not fit waits until running ones finish, and a model that alone
+exceeds the available memory runs by itself. A model loaded only for the comparison stays in the
+registry after its run while the next model still fits next to it; otherwise it, and any others
+kept so far, are evicted first.
+
+Every model writes its usual output (`<base>_transcription_<model>.txt`). The comparison reports
+each model's wall time and real-time factor (seconds spent in the model per audio second, lower is
+faster; loading and waiting for memory are left out) and its word error rate against the
+reference model (by default the largest one), and lists the word-level differences. Words are
+compared case-insensitively without punctuation. The result cache is bypassed so every model
+really runs (a cached transcript would report no time at all); the decoded audio is still taken
+from the PCM cache.
+
+API:
+- parse_models("tiny,small,large") -> list[str]
+- word_error_rate(reference, hypothesis) -> float
+- word_diff(reference, hypothesis, context=3) -> list[str]
+- compare_models(audio_path, models, language=None, out_dir=None, mock=False, backend=None, ...) -> Comparison
+- Comparison.to_text(max_diffs=20) -> str
+"""
+
+from __future__ import annotations
+
+import difflib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from audio import SAMPLE_RATE
+from model_cache import RUNTIME_OVERHEAD, approx_params, available_memory_bytes, estimate_model_bytes, get_registry
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+
+def parse_models(models: Union[str, Iterable[str]]) -> List[str]:
+    """Normalise "tiny, small,large" / ["tiny", "small"] into a de-duplicated list."""
+    if isinstance(models, str):
+        models = models.split(",")
+    out: List[str] = []
+    for name in models:
+        name = name.strip()
+        if name and name not in out:
+            out.append(name)
+    return out
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _edit_distance(ref: Sequence[str], hyp: Sequence[str]) -> int:
+    """Word-level Levenshtein distance. With numpy each row of the table is computed at once."""
+    if not ref or not hyp:
+        return len(ref) or len(hyp)
+    try:
+        import numpy as np
+    except ImportError:
+        prev = list(range(len(hyp) + 1))
+        for i, r in enumerate(ref, 1):
+            cur = [i]
+            for j, h in enumerate(hyp, 1):
+                cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+            prev = cur
+        return prev[-1]
+
+    ids: Dict[str, int] = {}
+    hyp_ids = np.array([ids.setdefault(w, len(ids)) for w in hyp])
+    offsets = np.arange(len(hyp) + 1)
+    prev = offsets.copy()
+    for i, r in enumerate(ref, 1):
+        cur = np.empty_like(prev)
+        cur[0] = i
+        # deletions and substitutions come from the previous row ...
+        cur[1:] = np.minimum(prev[1:] + 1, prev[:-1] + (hyp_ids != ids.get(r, -1)))
+        # ... insertions chain along the row: cur[j] = min over k <= j of cur[k] + (j - k)
+        cur = np.minimum.accumulate(cur - offsets) + offsets
+        prev = cur
+    return int(prev[-1])
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / words in the reference."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return _edit_distance(ref, hyp) / len(ref)
+
+
+def word_diff(reference: str, hypothesis: str, context: int = 3) -> List[str]:
+    """One line per difference, `[-reference words-]{+hypothesis words+}` with a few words of
+    context on each side."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    lines = []
+    matcher = difflib.SequenceMatcher(None, ref, hyp, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        parts = ref[max(0, i1 - context):i1]
+        if i2 > i1:
+            parts.append("[-" + " ".join(ref[i1:i2]) + "-]")
+        if j2 > j1:
+            parts.append("{+" + " ".join(hyp[j1:j2]) + "+}")
+        parts.extend(ref[i2:i2 + context])
+        lines.append(" ".join(parts))
+    return lines
+
+
+@dataclass
+class ModelRun:
+    model: str
+    output_path: Optional[str] = None
+    output_files: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    rtf: Optional[float] = None
+    words: int = 0
+    wer: Optional[float] = None
+    cancelled: bool = False
+    error: Optional[str] = None
+    transcription: str = field(default="", repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.cancelled
+
+
+@dataclass
+class Comparison:
+    audio_path: str
+    reference: str
+    runs: List[ModelRun] = field(default_factory=list)
+    duration: float = 0.0
+    decode_seconds: float = 0.0
+    elapsed: float = 0.0
+    report_path: Optional[str] = None
+
+    def run(self, model: str) -> ModelRun:
+        return next(r for r in self.runs if r.model == model)
+
+    def to_text(self, max_diffs: Optional[int] = 20) -> str:
+        """Summary table, followed by up to `max_diffs` differences per model (None: all)."""
+        decode = f", decoded once in {self.decode_seconds:.1f}s" if self.decode_seconds else ""
+        lines = [
+            f"Comparison of {len(self.runs)} models on {os.path.basename(self.audio_path)} "
+            f"({self.duration:.1f}s of audio{decode}, {self.elapsed:.1f}s in total)",
+            "",
+            f"{'model':<12} {'time':>9} {'RTF':>7} {'words':>7}  WER vs {self.reference}",
+        ]
+        for r in self.runs:
+            if r.error:
+                lines.append(f"{r.model:<12} FAILED: {r.error}")
+                continue
+            rtf = f"{r.rtf:.3f}" if r.rtf is not None else "-"
+            if r.model == self.reference:
+                wer = "(reference)"
+            else:
+                wer = f"{r.wer * 100:.1f}%" if r.wer is not None else "-"
+            flag = "  (cancelled)" if r.cancelled else ""
+            lines.append(f"{r.model:<12} {r.seconds:>8.1f}s {rtf:>7} {r.words:>7}  {wer}{flag}")
+
+        if max_diffs != 0:
+            ref = self.run(self.reference)
+            for r in self.runs:
+                if r.model == self.reference or not r.ok or not ref.ok:
+                    continue
+                diffs = word_diff(ref.transcription, r.transcription)
+                lines += ["", f"{r.model} vs {self.reference}: {len(diffs)} differences"]
+                shown = diffs if max_diffs is None else diffs[:max_diffs]
+                lines += [f"  {d}" for d in shown]
+                if len(shown) < len(diffs):
+                    lines.append(f"  ... {len(diffs) - len(shown)} more")
+        return "\n".join(lines)
+
+
+def default_report_path(audio_path: str, out_dir: Optional[str] = None) -> str:
+    out_dir = out_dir or os.path.dirname(audio_path) or os.getcwd()
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(out_dir, f"{base}_comparison.txt")
+
+
+class _MemoryGate:
+    """Admits a model when its estimated memory fits next to the ones already running (and the ones
+    left loaded); one model is always admitted when nothing is running."""
+
+    def __init__(self, budget: Optional[int]):
+        self.budget = budget
+        self._in_use = 0
+        self._running = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int) -> None:
+        with self._cond:
+            while self.budget is not None and self._running and self._in_use + nbytes > self.budget:
+                self._cond.wait()
+            self._in_use += nbytes
+            self._running += 1
+
+    def fits(self, nbytes: int) -> bool:
+        with self._cond:
+            return self.budget is None or self._in_use + nbytes <= self.budget
+
+    def release(self, nbytes: int, keep: int = 0) -> None:
+        """End a run; `keep` of its `nbytes` stay in use (a model left loaded) until `free`d."""
+        with self._cond:
+            self._in_use -= nbytes - keep
+            self._running -= 1
+            self._cond.notify_all()
+
+    def free(self, nbytes: int) -> None:
+        with self._cond:
+            self._in_use -= nbytes
+            self._cond.notify_all()
+
+
+def compare_models(
+    audio_path: str,
+    models: Union[str, Iterable[str]],
+    language: Optional[str] = None,
+    out_dir: Optional[str] = None,
+    mock: bool = False,
+    backend: Any = None,
+    reference: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    report_path: Optional[str] = None,
+    progress_callback: Optional[Callable[[float, float], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    on_run: Optional[Callable[[ModelRun], None]] = None,
+    use_cache: bool = True,
+    **transcribe_options: Any,
+) -> Comparison:
+    """Transcribe `audio_path` with every model in `models` and compare the results.
+
+    `reference` is the model the others are scored against (default: the largest). At most
+    `concurrency` models run at once (default: all), further limited by `memory_budget` in bytes
+    (default: the memory currently available on the device). The report is written to
+    `report_path` (default `<base>_comparison.txt` next to the outputs; "" writes none).
+    `on_run(run)` is called as each model finishes. Other keyword arguments go to
+    `transcriber.transcribe_file`. The result cache is never used; `use_cache=False` also skips
+    the PCM cache.
+    """
+    from audio import load_audio, probe_duration
+    from backends import get_backend
+    from batch import default_output_path
+    from pcm_cache import PCMCache
+    from result_cache import hash_file
+    from transcriber import detect_device, transcribe_file
+    from language_id import detect_language
+    from languages import normalize_language
+
+    models = parse_models(models)
+    if not models:
+        raise ValueError("No models to compare")
+    if reference is None:
+        # the largest model; among models of unknown size, the last one listed
+        reference = max(reversed(models), key=approx_params)
+    elif reference not in models:
+        models.append(reference)
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    t_start = time.perf_counter()
+    engine = get_backend("mock" if mock else backend)
+    caps = engine.capabilities()
+    device = detect_device() if "cuda" in caps["devices"] else "cpu"
+    dtype = engine.dtype(device)
+
+    # Decode once; every model gets the same samples
+    samples = None
+    decode_seconds = 0.0
+    duration = probe_duration(audio_path) or 0.0
+    if caps["requires_audio"]:
+        t0 = time.perf_counter()
+        pcm = PCMCache() if use_cache else None
+        if pcm is not None and pcm.enabled:
+            samples = pcm.load(audio_path, hash_file(audio_path))
+        else:
+            samples = load_audio(audio_path)
+        decode_seconds = time.perf_counter() - t0
+        duration = len(samples) / SAMPLE_RATE
+
+    registry = get_registry()
+    budget = memory_budget if memory_budget is not None else available_memory_bytes(device)
+    gate = _MemoryGate(budget)
+    resident = {m for m in models if registry.contains(m, device, dtype)}
+
+    # every model transcribes in the same language, identified once by the reference model
+    if not normalize_language(language) and "language_detection" not in transcribe_options:
+        transcribe_options["language_detection"] = detect_language(
+            audio_path, reference, backend, mock, samples=samples) if not reference.endswith(".en") else None
+
+    def need(model_name: str) -> int:
+        weights = estimate_model_bytes(None, model_name, dtype)
+        return int(weights * RUNTIME_OVERHEAD) + (0 if model_name in resident else weights)
+
+    # largest first, so small models fill the memory left next to it
+    order = sorted(models, key=approx_params, reverse=True)
+    waiting = list(order)  # not admitted yet, in the order they will be
+    kept: Dict[str, int] = {}  # loaded for the comparison and left in the registry: weight bytes
+    finish_lock = threading.Lock()
+
+    def finish(model_name: str, nbytes: int) -> None:
+        """Release a model's memory, leaving it loaded unless the next model would not fit."""
+        with finish_lock:
+            weights = 0 if model_name in resident else estimate_model_bytes(None, model_name, dtype)
+            if weights and waiting and not gate.fits(need(waiting[0]) - nbytes + weights):
+                registry.evict(model_name, device, dtype)
+                for other, other_weights in kept.items():
+                    registry.evict(other, device, dtype)
+                    gate.free(other_weights)
+                kept.clear()
+                weights = 0
+            elif weights:
+                kept[model_name] = weights
+            gate.release(nbytes, keep=weights)
+
+    fractions = {m: 0.0 for m in models}
+    progress_lock = threading.Lock()
+
+    def progress_for(model_name: str) -> Optional[Callable[[float, float], None]]:
+        if progress_callback is None:
+            return None
+
+        def report(fraction: float, _throughput: float) -> None:
+            with progress_lock:
+                fractions[model_name] = fraction
+                overall = sum(fractions.values()) / len(fractions)
+            progress_callback(overall, 0.0)
+        return report
+
+    def run_one(model_name: str) -> ModelRun:
+        run = ModelRun(model_name, default_output_path(audio_path, model_name, out_dir))
+        nbytes = need(model_name)
+        gate.acquire(nbytes)
+        with finish_lock:
+            waiting.remove(model_name)
+        try:
+            if stop_event is not None and stop_event.is_set():
+                run.cancelled = True
+                return run
+            t0 = time.perf_counter()
+            res = transcribe_file(
+                audio_path, model_name=model_name, language=language, output_path=run.output_path,
+                progress_callback=progress_for(model_name), stop_event=stop_event, mock=mock,
+                backend=backend, samples=samples, use_cache=False, **transcribe_options,
+            )
+            run.seconds = time.perf_counter() - t0
+            run.output_files = list(res.get("output_files", {}).values())
+            run.cancelled = res.get("cancelled", False)
+            run.transcription = str(res.get("transcription", ""))
+            run.words = len(_words(run.transcription))
+            # time in the model only: wall time also counts loading and the other models' share
+            inference = res.get("timings", {}).get("inference")
+            audio_seconds = res.get("processed_seconds") or res.get("duration") or duration
+            run.rtf = inference / audio_seconds if inference is not None and audio_seconds else None
+        except Exception as e:
+            run.error = str(e)
+        finally:
+            finish(model_name, nbytes)
+        if on_run is not None:
+            on_run(run)
+        return run
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency or len(models), len(models)))) as pool:
+        done = dict(zip(order, pool.map(run_one, order)))
+
+    ref_run = done[reference]
+    for run in done.values():
+        if run.model != reference and run.ok and ref_run.ok:
+            run.wer = word_error_rate(ref_run.transcription, run.transcription)
+
+    comparison = Comparison(audio_path, reference, [done[m] for m in models], duration=duration,
+                            decode_seconds=decode_seconds, elapsed=time.perf_counter() - t_start)
+    if report_path is None:
+        report_path = default_report_path(audio_path, out_dir)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(comparison.to_text(max_diffs=None) + "\n")
+        comparison.report_path = report_path
+    return comparison
@@ -0,0 +1,127 @@
+"""
+language_id.py
+
+Spoken-language identification on a few short samples, run before a transcription whose language
+is not given ("auto").
+
+Left to itself the model identifies the language again on every window, and a window of music
+or silence at the start can set it wrong for the whole file. Instead, `SAMPLE_COUNT` clips of
+`SAMPLE_SECONDS` are taken from across the file (skipping silent ones), the backend scores each,
+and the averaged probabilities are ranked. The top language is then fixed for the whole run.
+
+Clips are sliced from already decoded audio when there is some (PCM cache, pre-decoded samples),
+otherwise decoded on their own with a seek (`audio.load_clip`), so identifying a long file costs
+a few seconds of decoding, not a full pass.
+
+A detection is a plain dict (picklable, JSON-ready):
+{"language": "he", "probability": 0.97, "ranking": [["he", 0.97], ["ar", 0.01], ...]}
+
+API:
+- detect_language(audio_path, model_name="small", backend=None, mock=False, samples=None) -> detection | None
+- identify(detect, audio_path, requires_audio=True, samples=None, duration=None) -> detection | None
+- format_detection(detection) -> str
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from audio import SAMPLE_RATE, load_clip, probe_duration
+
+SAMPLE_COUNT = 3
+SAMPLE_SECONDS = 10.0
+RANKING_SIZE = 5
+
+
+def sample_offsets(duration: Optional[float], count: int = SAMPLE_COUNT, seconds: float = SAMPLE_SECONDS) -> List[float]:
+    """Start times of `count` clips spread evenly across the file (one at 0 if the length is unknown)."""
+    if not duration or duration <= seconds:
+        return [0.0]
+    count = max(1, min(count, int(duration // seconds)))
+    return [max(0.0, (i + 0.5) * duration / count - seconds / 2) for i in range(count)]
+
+
+def rank(scores: List[Dict[str, float]]) -> List[List[Any]]:
+    """Average per-clip probabilities and sort, most likely first."""
+    totals: Dict[str, float] = {}
+    for probs in scores:
+        for code, p in probs.items():
+            totals[code] = totals.get(code, 0.0) + p
+    n = max(1, len(scores))
+    return [[code, round(total / n, 4)] for code, total in sorted(totals.items(), key=lambda kv: -kv[1])]
+
+
+def identify(
+    detect: Callable[[Any], Dict[str, float]],
+    audio_path: str,
+    requires_audio: bool = True,
+    samples: Any = None,
+    duration: Optional[float] = None,
+    count: int = SAMPLE_COUNT,
+    seconds: float = SAMPLE_SECONDS,
+) -> Optional[Dict[str, Any]]:
+    """Run `detect(clip) -> {code: probability}` on clips of the file and rank the results.
+    Returns None if the backend cannot identify languages (detect returns {})."""
+    from vad import has_speech
+
+    if samples is not None:
+        duration = len(samples) / SAMPLE_RATE
+    elif duration is None:
+        duration = probe_duration(audio_path)
+    clips = []
+    for start in sample_offsets(duration, count, seconds):
+        if samples is not None:
+            clips.append(samples[int(start * SAMPLE_RATE):int((start + seconds) * SAMPLE_RATE)])
+        elif requires_audio:
+            clips.append(load_clip(audio_path, start, seconds))
+        else:
+            clips.append([0.0] * int(seconds * SAMPLE_RATE))  # mock backend: no real audio needed
+    if requires_audio:
+        # a silent clip says nothing about the language; keep them only if nothing else is left
+        clips = [c for c in clips if len(c) and has_speech(c)] or clips
+    scores = [probs for probs in (detect(c) for c in clips if len(c)) if probs]
+    if not scores:
+        return None
+    ranking = rank(scores)
+    return {"language": ranking[0][0], "probability": ranking[0][1], "ranking": ranking[:RANKING_SIZE]}
+
+
+def detect_language(
+    audio_path: str,
+    model_name: str = "small",
+    backend: Any = None,
+    mock: bool = False,
+    samples: Any = None,
+    count: int = SAMPLE_COUNT,
+    seconds: float = SAMPLE_SECONDS,
+) -> Optional[Dict[str, Any]]:
+    """Identify the language of `audio_path` with `model_name` (loaded through the model registry,
+    so a following transcription reuses it)."""
+    from backends import get_backend
+    from model_cache import get_registry
+    from transcriber import detect_device
+
+    engine = get_backend("mock" if mock else backend)
+    caps = engine.capabilities()
+    if not caps["language_detection"]:
+        return None
+    device = detect_device() if "cuda" in caps["devices"] else "cpu"
+    registry = get_registry()
+    model = registry.load(model_name, device, engine.dtype(device), loader=lambda: engine.load(model_name, device))
+    lock = None if caps["thread_safe"] else registry.inference_lock(model_name, device, engine.dtype(device))
+
+    def detect(clip: Any) -> Dict[str, float]:
+        if lock is None:
+            return engine.detect_language(model, clip, source=audio_path)
+        with lock:
+            return engine.detect_language(model, clip, source=audio_path)
+
+    return identify(detect, audio_path, caps["requires_audio"], samples, count=count, seconds=seconds)
+
+
+def format_detection(detection: Optional[Dict[str, Any]]) -> str:
+    """"he (97%; ar 1%, en 1%)" for logs and output headers."""
+    if not detection:
+        return ""
+    others = ", ".join(f"{code} {p:.0%}" for code, p in detection.get("ranking", [])[1:3])
+    return f"{detection['language']} ({detection['probability']:.0%}" + (f"; {others})" if others else ")")
@@ -0,0 +1,383 @@
+"""
+live.py
+
+Real-time transcription of a PCM stream: a microphone or any other live source piped in, e.g.
+
+  arecord -f S16_LE -r 16000 -c 1 -t raw | python -m cli.transcribe_cli --live --model small
+  ffmpeg -i rtsp://... -f s16le -ac 1 -ar 16000 - | python -m cli.transcribe_cli --live
+
+The input is raw 16 kHz mono samples (`pcm_format` "s16le", or "f32le"), read from stdin, a
+named pipe or any binary stream. There is no file on disk and no known length.
+
+A reader thread timestamps every block as it arrives. The model runs on a sliding window: all
+audio from the end of the last committed segment up to now, re-run every `latency_seconds / 2` of
+new audio, with the committed text as prompt. Each run yields a hypothesis for that window. A
+leading segment becomes *committed* (final, never revised) once two consecutive hypotheses agree
+on it (same text), except for the last segment, which may still be growing. The rest is
+*tentative* and shown until the next run replaces it. The window then starts at the end of the
+last committed segment, so it stays short. If the speech never settles, everything but the last
+segment is committed when the window reaches `max_window_seconds` (whisper's 30 s), which bounds
+the window and with it the cost of a run.
+
+End-to-end latency is measured per segment, from the moment the audio at the segment's end was
+read from the input to the moment its text was emitted (first as tentative, then as committed).
+The result reports the p50/p90/p99/max of both. Tentative text follows the audio by up to
+`latency_seconds / 2` plus one model run, committed text by one more run interval, so about
+`latency_seconds` in all on a model that keeps up. If a run takes longer than the audio it adds,
+the next window takes in everything that arrived meanwhile and latency rises accordingly;
+`tuning.calibrate` or a smaller model helps then.
+
+Without a `language`, the model picks one per run until enough speech has arrived to identify it
+(LANGUAGE_MIN_SECONDS, retried on more speech while the detection is unsure); from then on it is
+fixed, so the transcript cannot switch languages mid-stream.
+
+Without hardware, `replay(audio_path, out)` writes a file to a pipe at real-time speed:
+
+  python -m live --replay interview.mp3 | python -m cli.transcribe_cli --live --model small
+
+API:
+- transcribe_live(stream, model_name, language=None, latency_seconds=2.0, on_commit=None, on_tentative=None,
+                  ...) -> dict
+- replay(audio_path, out, speed=1.0, pcm_format="s16le")
+- latency_stats(values) -> {"count", "p50", "p90", "p99", "max"}
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Union
+
+from audio import SAMPLE_RATE
+from backends import Backend, get_backend
+from metrics import Trace, emit as emit_metrics, peak_rss_bytes
+from segments import SegmentStore, Transcript
+from writers import output_paths, parse_formats, write_outputs
+
+PCM_FORMATS = ("s16le", "f32le")
+DEFAULT_LATENCY_SECONDS = 2.0
+# whisper's window: the most audio one run looks at before the buffer is committed by force
+MAX_WINDOW_SECONDS = 30.0
+# granularity of reading (and timestamping) the input
+_BLOCK_SECONDS = 0.05
+# without a language given, it is identified once this much speech has arrived, and again on every
+# further LANGUAGE_MIN_SECONDS until the most likely language reaches LANGUAGE_CONFIDENCE (or
+# LANGUAGE_MAX_SECONDS of speech have been heard, whisper's window)
+LANGUAGE_MIN_SECONDS = 5.0
+LANGUAGE_MAX_SECONDS = 30.0
+LANGUAGE_CONFIDENCE = 0.8
+
+
+def latency_stats(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles of `values` (seconds); None when there are none."""
+    ordered = sorted(values)
+
+    def pct(p: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))], 3)
+
+    return {"count": len(ordered), "p50": pct(50), "p90": pct(90), "p99": pct(99),
+            "max": round(ordered[-1], 3) if ordered else None}
+
+
+class _PCMReader(threading.Thread):
+    """Reads the stream into float32 blocks, noting when each block arrived."""
+
+    def __init__(self, stream: BinaryIO, pcm_format: str):
+        super().__init__(name="live-pcm-reader", daemon=True)
+        if pcm_format not in PCM_FORMATS:
+            raise ValueError(f"Unknown PCM format {pcm_format!r}; choose from {', '.join(PCM_FORMATS)}")
+        self._stream = stream
+        self._width = 2 if pcm_format == "s16le" else 4
+        self._cond = threading.Condition()
+        self._blocks: List[Any] = []
+        self._ends = array("q")  # samples received when the block arrived ...
+        self._times = array("d")  # ... and when (time.monotonic())
+        self.total = 0
+        self.eof = False
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        import numpy as np
+
+        # read1 returns what the pipe has instead of waiting for a full block
+        read = getattr(self._stream, "read1", self._stream.read)
+        size = int(_BLOCK_SECONDS * SAMPLE_RATE) * self._width
+        rest = b""
+        try:
+            while True:
+                data = read(size)
+                if not data:
+                    break
+                data = rest + data
+                usable = len(data) - len(data) % self._width
+                rest = data[usable:]
+                if not usable:
+                    continue
+                if self._width == 2:
+                    samples = np.frombuffer(data[:usable], "<i2").astype(np.float32) / 32768.0
+                else:
+                    samples = np.frombuffer(data[:usable], "<f4").astype(np.float32)
+                now = time.monotonic()
+                with self._cond:
+                    self._blocks.append(samples)
+                    self.total += len(samples)
+                    self._ends.append(self.total)
+                    self._times.append(now)
+                    self._cond.notify_all()
+        except BaseException as e:  # reported by the consumer
+            self.error = e
+        finally:
+            with self._cond:
+                self.eof = True
+                self._cond.notify_all()
+
+    def take(self, have: int, want: int, stop_event: Optional[threading.Event]) -> Any:
+        """Wait until `want` samples past `have` arrived (or the input ended); returns every sample
+        past `have` (float32 array, possibly empty)."""
+        import numpy as np
+
+        with self._cond:
+            while self.total - have < want and not self.eof:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                self._cond.wait(0.1)
+            blocks, self._blocks = self._blocks, []
+        return np.concatenate(blocks) if blocks else np.zeros(0, np.float32)
+
+    def arrival(self, sample: int) -> float:
+        """When sample number `sample` (0-based, of the whole stream) had been read."""
+        with self._cond:
+            if not self._ends:
+                return time.monotonic()
+            return self._times[min(bisect_left(self._ends, sample + 1), len(self._ends) - 1)]
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return " ".join(a.get("text", "").lower().split()) == " ".join(b.get("text", "").lower().split())
+
+
+def transcribe_live(
+    stream: BinaryIO,
+    model_name: str = "small",
+    language: Optional[str] = None,
+    backend: Union[str, Backend, None] = None,
+    mock: bool = False,
+    latency_seconds: float = DEFAULT_LATENCY_SECONDS,
+    max_window_seconds: float = MAX_WINDOW_SECONDS,
+    pcm_format: str = "s16le",
+    on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    on_tentative: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    output_path: Optional[str] = None,
+    formats: Union[str, Iterable[str], None] = None,
+    stop_event: Optional[threading.Event] = None,
+    source: str = "<live>",
+) -> Dict[str, Any]:
+    """Transcribe `stream` as it arrives, until it ends, `stop_event` is set or Ctrl+C.
+
+    `on_commit(segments)` receives newly committed segments (absolute timestamps, seconds since
+    the stream started), `on_tentative(segments)` the current uncommitted tail after every run
+    (possibly empty). On exit the tentative tail is committed too, and with `output_path` the
+    committed transcript is written in `formats` (see `writers.py`).
+
+    Returns a dict with `model`, `device`, `language`, `transcription` (a `segments.Transcript`),
+    `segments` (a `segments.SegmentStore`), `output_files`, `duration` (seconds of audio read),
+    `windows` (model runs), `latency` ({"tentative", "committed"}: see `latency_stats`),
+    `timings`, `rtf` and `cancelled` (stopped before the input ended).
+    """
+    import numpy as np
+    from languages import normalize_language
+    from transcriber import _load_model
+    from vad import detect_speech
+
+    language = normalize_language(language)
+    engine = get_backend("mock" if mock else backend)
+    caps = engine.capabilities()
+    trace = Trace(model=model_name, backend=engine.name, device="cpu")
+    model, device, model_lock = _load_model(engine, caps, model_name, trace)
+
+    def locked(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if model_lock is None:
+            return fn(*args, **kwargs)
+        with model_lock:
+            return fn(*args, **kwargs)
+
+    step = max(1, int(latency_seconds / 2 * SAMPLE_RATE))
+    max_window = int(max_window_seconds * SAMPLE_RATE)
+    reader = _PCMReader(stream, pcm_format)
+    reader.start()
+
+    committed = SegmentStore()
+    tentative_latency: List[float] = []
+    committed_latency: List[float] = []
+    seen_tentative: set = set()  # ends (in samples) of tentative segments already timed
+    previous: List[Dict[str, Any]] = []
+    buffer = np.zeros(0, np.float32)
+    buffer_start = 0  # stream sample at which `buffer` starts
+    prompt: Optional[str] = None
+    cancelled = False
+    detecting = not language and caps["language_detection"]
+    heard: List[Any] = []  # speech so far, for language detection
+    heard_samples = 0
+    next_detection = int(LANGUAGE_MIN_SECONDS * SAMPLE_RATE)
+
+    def detect_language(final: bool = False) -> None:
+        nonlocal language, detecting, next_detection
+        clip = np.concatenate(heard)[:int(LANGUAGE_MAX_SECONDS * SAMPLE_RATE)]
+        with trace.stage("language"):
+            probs = locked(engine.detect_language, model, clip, source=source)
+        best = max(probs, key=probs.get) if probs else None
+        if (best is None or final or probs[best] >= LANGUAGE_CONFIDENCE
+                or heard_samples >= LANGUAGE_MAX_SECONDS * SAMPLE_RATE):
+            language, detecting = best, False
+            heard.clear()
+        else:
+            next_detection = heard_samples + int(LANGUAGE_MIN_SECONDS * SAMPLE_RATE)
+
+    def commit(segments: List[Dict[str, Any]], now: float) -> None:
+        nonlocal prompt
+        committed.extend(segments)
+        for seg in segments:
+            committed_latency.append(now - reader.arrival(int(seg["end"] * SAMPLE_RATE) - 1))
+        text = "".join(seg.get("text", "") for seg in segments).strip()
+        prompt = ((prompt or "") + " " + text).strip()[-200:] if text else prompt
+        if on_commit and segments:
+            on_commit(segments)
+
+    try:
+        while True:
+            new = reader.take(buffer_start + len(buffer), step, stop_event)
+            if reader.error is not None:
+                raise reader.error
+            if stop_event is not None and stop_event.is_set():
+                cancelled = not reader.eof
+                break
+            if not len(new):
+                break  # input ended and everything has been run
+            buffer = np.concatenate((buffer, new))
+
+            if detecting:
+                for start, stop in detect_speech(new):
+                    heard.append(new[start:stop])
+                    heard_samples += stop - start
+                if heard_samples >= next_detection:
+                    detect_language()
+
+            trace.count("windows")
+            with trace.stage("inference"):
+                result = locked(engine.transcribe, model, buffer, language=language, initial_prompt=prompt,
+                                source=source)
+            now = time.monotonic()
+            offset = buffer_start / SAMPLE_RATE
+            end = buffer_start + len(buffer)
+            hypothesis = []
+            for seg in result.get("segments", []):
+                if not seg.get("text", "").strip():
+                    continue
+                seg = dict(seg, start=seg.get("start", 0.0) + offset)
+                seg["end"] = min(seg.get("end", 0.0) + offset, end / SAMPLE_RATE)
+                hypothesis.append(seg)
+
+            # leading segments both runs agree on are final; the last one may still be growing
+            agreed = 0
+            while agreed < min(len(previous), len(hypothesis) - 1) and _same(previous[agreed], hypothesis[agreed]):
+                agreed += 1
+            if len(buffer) >= max_window:
+                # the window is full: settle for what it has
+                agreed = max(agreed, len(hypothesis) - 1 if len(hypothesis) > 1 else len(hypothesis))
+            if agreed:
+                commit(hypothesis[:agreed], now)
+                cut = min(end, max(buffer_start, int(round(hypothesis[agreed - 1]["end"] * SAMPLE_RATE))))
+            elif len(buffer) >= max_window:
+                cut = end - step  # nothing said in a whole window: keep only the latest audio
+            else:
+                cut = buffer_start
+            buffer = buffer[cut - buffer_start:]
+            buffer_start = cut
+            previous = hypothesis[agreed:]
+
+            for seg in previous:
+                key = int(seg["end"] * SAMPLE_RATE)
+                if key not in seen_tentative:
+                    seen_tentative.add(key)
+                    tentative_latency.append(now - reader.arrival(key - 1))
+            if on_tentative:
+                on_tentative(list(previous))
+    except KeyboardInterrupt:
+        cancelled = True
+
+    if detecting and heard:
+        detect_language(final=True)  # too little speech to be sure: report the best guess
+    # whatever is still tentative is the best there is
+    if previous:
+        commit(previous, time.monotonic())
+        if on_tentative:
+            on_tentative([])
+
+    paths = output_paths(output_path, parse_formats(formats)) if output_path else {}
+    if paths:
+        with trace.stage("write"):
+            write_outputs(committed, paths, model_name, device, language)
+    duration = reader.total / SAMPLE_RATE
+    timings = trace.timings()
+    inference = timings.get("inference", 0.0)
+    result = {
+        "model": model_name, "device": device, "language": language, "transcription": Transcript(committed),
+        "segments": committed, "output_files": paths, "duration": duration, "processed_seconds": duration,
+        "windows": trace.counters.get("windows", 0), "cancelled": cancelled,
+        "latency": {"tentative": latency_stats(tentative_latency), "committed": latency_stats(committed_latency)},
+        "timings": timings,
+        # model time per audio second (wall time is the stream's own length)
+        "rtf": round(inference / duration, 4) if duration > 0 else None,
+    }
+    emit_metrics({
+        "ts": round(time.time(), 3), "audio": source, **trace.fields, "status": "cancelled" if cancelled else "done",
+        "error": None, "duration": duration, "processed_seconds": duration, "rtf": result["rtf"], "timings": timings,
+        "windows": result["windows"], "cache": trace.caches, "latency": result["latency"],
+        "peak_rss_bytes": peak_rss_bytes(), "peak_cuda_bytes": None,
+    })
+    return result
+
+
+def replay(audio_path: str, out: BinaryIO, speed: float = 1.0, pcm_format: str = "s16le",
+           block_seconds: float = 0.1) -> None:
+    """Decode `audio_path` and write it to `out` as raw 16 kHz mono PCM, paced at `speed` times
+    real time (a stand-in for a microphone when testing live mode)."""
+    import numpy as np
+    from audio import load_audio
+
+    if pcm_format not in PCM_FORMATS:
+        raise ValueError(f"Unknown PCM format {pcm_format!r}; choose from {', '.join(PCM_FORMATS)}")
+    audio = load_audio(audio_path)
+    if pcm_format == "s16le":
+        data = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    else:
+        data = audio.astype("<f4")
+    block = max(1, int(block_seconds * SAMPLE_RATE))
+    t0 = time.monotonic()
+    for start in range(0, len(data), block):
+        due = t0 + start / SAMPLE_RATE / speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        out.write(data[start:start + block].tobytes())
+        out.flush()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Write an audio file to stdout as live PCM (for testing --live)")
+    parser.add_argument("--replay", required=True, metavar="FILE", help="Audio file to play into the pipe")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (1.0: real time)")
+    parser.add_argument("--format", default="s16le", choices=PCM_FORMATS, help="Sample format written")
+    args = parser.parse_args()
+    try:
+        replay(args.replay, sys.stdout.buffer, speed=args.speed, pcm_format=args.format)
+    except BrokenPipeError:
+        pass
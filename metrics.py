@@ -0,0 +1,380 @@
+"""
+metrics.py
+
+Per-run instrumentation of the transcription pipeline.
+
+`transcribe_file` times each stage of a run in a `Trace`: model load, audio decode, VAD,
+inference and output write (a stage entered several times, like inference once per window,
+accumulates). The timings are returned in the result dict (`result["timings"]`, seconds) together
+with the real-time factor, and one record per run is emitted:
+
+- as a JSON line appended to the file named by TRANSCRIBER_METRICS
+- into a Prometheus text file (for node_exporter's textfile collector) named by
+  TRANSCRIBER_METRICS_PROM. Counters accumulate across runs and processes (batch workers update
+  the same file under a lock file); gauges hold the latest run.
+
+Record fields: ts, audio, model, backend, device, status (done, cancelled, cached, failed), error,
+duration, processed_seconds, rtf, timings, windows, cache ({"result", "pcm", "model"}: hit or
+miss, for the caches consulted), peak_rss_bytes (of the process so far) and peak_cuda_bytes
+(cuda runs).
+
+In streaming mode decoding runs on a background thread alongside inference; "decode" is then
+the time spent waiting for decoded audio, i.e. the part of decoding that is not hidden.
+
+Inference can be profiled: with TRANSCRIBER_PROFILE=<file> every inference call runs under
+cProfile and the accumulated stats are written to <file> (pstats format; open with
+`python -m pstats` or snakeviz) after each run. Any other profiler can be plugged in with
+`set_inference_hook(factory)`, where `factory()` returns a context manager entered around each
+call. Sampling profilers such as py-spy need no hook: `py-spy record -- python -m cli.transcribe_cli ...`
+shows inference under `transcriber.infer`.
+
+API:
+- Trace(**fields); Trace.stage(name) (context manager); Trace.add(name, seconds); Trace.count(name, n=1);
+  Trace.cache(name, hit); Trace.timings()
+- timed_iter(iterator, trace, stage) -> iterator
+- inference_hook() -> context manager factory
+- set_inference_hook(factory | None)
+- emit(record)
+- peak_rss_bytes() -> int | None
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Tuple
+
+STAGES = ("load", "decode", "vad", "inference", "write")
+
+
+class Trace:
+    """Stage timings and counters of one transcription run."""
+
+    def __init__(self, **fields: Any):
+        self.fields = fields  # model, backend, device, ... as they become known
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.caches: Dict[str, bool] = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t
+
+    def add(self, name: str, seconds: float) -> None:
+        """Charge `seconds` measured elsewhere (e.g. this run's share of a batch) to stage `name`."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def cache(self, name: str, hit: bool) -> None:
+        self.caches[name] = hit
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def timings(self) -> Dict[str, float]:
+        out = {name: round(self.stages.get(name, 0.0), 4) for name in STAGES}
+        out.update({k: round(v, 4) for k, v in self.stages.items() if k not in out})
+        out["total"] = round(self.elapsed(), 4)
+        return out
+
+
+def timed_iter(iterator: Iterator[Any], trace: Trace, stage: str) -> Iterator[Any]:
+    """Yield from `iterator`, charging the time spent producing each item to `stage`."""
+    while True:
+        with trace.stage(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+# -- memory ---------------------------------------------------------------------------------------
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, in bytes (None if unknown)."""
+    try:
+        # VmHWM is reset on exec, unlike ru_maxrss which a spawned process inherits from its parent
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB on Linux
+    except Exception:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return int(getattr(info, "peak_wset", info.rss))
+    except Exception:
+        return None
+
+
+def peak_cuda_bytes() -> Optional[int]:
+    torch = sys.modules.get("torch")  # never import torch just to report on it
+    try:
+        return int(torch.cuda.max_memory_allocated()) if torch is not None and torch.cuda.is_available() else None
+    except Exception:
+        return None
+
+
+# -- inference profiling --------------------------------------------------------------------------
+
+class CProfileHook:
+    """Accumulates cProfile stats of every inference call and writes them to `path`.
+
+    cProfile can only profile one thread at a time; calls made while another thread is being
+    profiled run unprofiled.
+    """
+
+    def __init__(self, path: str):
+        import cProfile
+
+        self.path = path
+        self._profile = cProfile.Profile()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self) -> Iterator[None]:
+        if not self._lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            try:
+                self._profile.enable()
+            except ValueError:  # another profiler is active
+                yield
+                return
+            try:
+                yield
+            finally:
+                self._profile.disable()
+        finally:
+            self._lock.release()
+
+    def dump(self) -> None:
+        with self._lock:
+            try:
+                self._profile.dump_stats(self.path)
+            except (OSError, TypeError):
+                pass  # TypeError: nothing profiled yet
+
+
+_custom_hook: Optional[Callable[[], ContextManager[Any]]] = None
+_cprofile_hooks: Dict[str, CProfileHook] = {}
+_hooks_lock = threading.Lock()
+
+
+def set_inference_hook(factory: Optional[Callable[[], ContextManager[Any]]]) -> None:
+    """Install `factory` (called once per inference call, returns a context manager); None
+    restores the default (cProfile if TRANSCRIBER_PROFILE is set, otherwise nothing)."""
+    global _custom_hook
+    _custom_hook = factory
+
+
+def inference_hook() -> Callable[[], ContextManager[Any]]:
+    if _custom_hook is not None:
+        return _custom_hook
+    path = os.getenv("TRANSCRIBER_PROFILE")
+    if not path:
+        return contextlib.nullcontext
+    with _hooks_lock:
+        hook = _cprofile_hooks.get(path)
+        if hook is None:
+            hook = _cprofile_hooks[path] = CProfileHook(path)
+        return hook
+
+
+def _dump_profiles() -> None:
+    with _hooks_lock:
+        hooks = list(_cprofile_hooks.values())
+    for hook in hooks:
+        hook.dump()
+
+
+# -- emission -------------------------------------------------------------------------------------
+
+_jsonl_lock = threading.Lock()
+_prom_lock = threading.Lock()
+
+_PROM_HELP = {
+    "transcriber_runs_total": ("counter", "Transcription runs by outcome"),
+    "transcriber_audio_seconds_total": ("counter", "Seconds of audio transcribed"),
+    "transcriber_stage_seconds_total": ("counter", "Wall seconds spent per pipeline stage"),
+    "transcriber_cache_lookups_total": ("counter", "Cache lookups"),
+    "transcriber_cache_hits_total": ("counter", "Cache hits"),
+    "transcriber_last_rtf": ("gauge", "Real-time factor of the latest run (wall / audio seconds)"),
+    "transcriber_peak_rss_bytes": ("gauge", "Peak resident memory of the latest reporting process"),
+}
+_PROM_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$")
+
+
+def _labels(**labels: Any) -> str:
+    parts = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _read_prom(path: str) -> Dict[Tuple[str, str], float]:
+    samples: Dict[Tuple[str, str], float] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                m = _PROM_LINE.match(line.strip())
+                if m:
+                    try:
+                        samples[(m.group(1), m.group(2) or "")] = float(m.group(3))
+                    except ValueError:
+                        pass
+    except OSError:
+        pass
+    return samples
+
+
+@contextmanager
+def _file_lock(path: str, timeout: float = 5.0) -> Iterator[None]:
+    """Cross-process lock held by creating `path` exclusively. A lock file not touched for
+    `timeout` seconds is assumed to be left behind by a crashed process and taken over."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _break_stale_lock(path, timeout):
+                time.sleep(0.01)
+            continue
+        owned = os.fstat(fd).st_ino
+        os.close(fd)
+        break
+    try:
+        yield
+    finally:
+        # a holder that overran `timeout` may have lost the lock to another process; leave theirs
+        try:
+            if os.stat(path).st_ino == owned:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _break_stale_lock(path: str, timeout: float) -> bool:
+    """Remove `path` if it is stale. Returns True when the caller should retry at once.
+
+    Checking the age and removing the file are two steps, so two processes doing both could
+    each remove the lock the other has just created and both go ahead. Takeovers are therefore
+    serialised by a second lock file, and the age is checked again while it is held."""
+    breaker = path + ".break"
+    try:
+        os.close(os.open(breaker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        # only held for a moment, unless its holder crashed inside the takeover
+        try:
+            if time.time() - os.stat(breaker).st_mtime > timeout:
+                os.remove(breaker)
+        except OSError:
+            pass
+        return False
+    try:
+        try:
+            stale = time.time() - os.stat(path).st_mtime > timeout
+        except OSError:
+            return True  # released in the meantime
+        if stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return stale
+    finally:
+        try:
+            os.remove(breaker)
+        except OSError:
+            pass
+
+
+def _write_prom(path: str, record: Dict[str, Any]) -> None:
+    run = {"model": record.get("model"), "backend": record.get("backend")}
+    increments = [
+        ("transcriber_runs_total", _labels(**run, status=record.get("status")), 1),
+        ("transcriber_audio_seconds_total", _labels(**run), record.get("processed_seconds") or 0.0),
+    ]
+    for stage, secs in (record.get("timings") or {}).items():
+        if stage != "total":
+            increments.append(("transcriber_stage_seconds_total", _labels(**run, stage=stage), secs))
+    for cache, hit in (record.get("cache") or {}).items():
+        increments.append(("transcriber_cache_lookups_total", _labels(cache=cache), 1))
+        increments.append(("transcriber_cache_hits_total", _labels(cache=cache), 1 if hit else 0))
+    gauges = []
+    if record.get("rtf") is not None:
+        gauges.append(("transcriber_last_rtf", _labels(**run), record["rtf"]))
+    if record.get("peak_rss_bytes"):
+        gauges.append(("transcriber_peak_rss_bytes", "", record["peak_rss_bytes"]))
+
+    with _prom_lock, _file_lock(path + ".lock"):
+        samples = _read_prom(path)
+        for key in ((name, labels) for name, labels, _ in increments):
+            samples.setdefault(key, 0.0)
+        for name, labels, value in increments:
+            samples[(name, labels)] += value
+        for name, labels, value in gauges:
+            samples[(name, labels)] = value
+        lines = []
+        for name in sorted({n for n, _ in samples}):
+            if name in _PROM_HELP:
+                kind, text = _PROM_HELP[name]
+                lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for (n, labels), value in sorted(samples.items()):
+                if n == name:
+                    lines.append(f"{name}{labels} {float(value)!r}")
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp, path)  # the collector never sees a half-written file
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def emit(record: Dict[str, Any]) -> None:
+    """Send one run record to the configured sinks. Failures to write are ignored: metrics must
+    never fail a transcription."""
+    jsonl = os.getenv("TRANSCRIBER_METRICS")
+    prom = os.getenv("TRANSCRIBER_METRICS_PROM")
+    if jsonl:
+        try:
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            with _jsonl_lock, open(jsonl, "a", encoding="utf-8") as f:
+                f.write(line)  # one write per record, so lines from several processes do not interleave
+        except OSError:
+            pass
+    if prom:
+        try:
+            _write_prom(prom, record)
+        except OSError:
+            pass
+    _dump_profiles()
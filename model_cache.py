@@ -0,0 +1,257 @@
+"""
+model_cache.py
+
+Process-wide registry of loaded models so repeated transcriptions (batch CLI runs, repeated GUI
+runs) pay the model load cost only once.
+
+Models are keyed by (model_name, device, dtype) and kept in LRU order. When the estimated memory of
+the resident models exceeds the budget, the least recently used entries are evicted. The most
+recently loaded model is always kept, even if it alone exceeds the budget.
+
+API:
+- get_registry() -> ModelRegistry  (process-wide default instance)
+- ModelRegistry.load(model_name, device, dtype, loader) -> model
+- ModelRegistry.evict(model_name=None, device=None, dtype=None) -> int
+- ModelRegistry.stats() -> dict
+- ModelRegistry.inference_lock(model_name, device, dtype) -> threading.Lock
+- estimate_model_bytes(model, model_name="", dtype="float32") -> int
+- approx_params(model_name) -> int  (0 for unknown models)
+- available_memory_bytes(device="cpu") -> int | None
+
+The budget of the default registry can be set with the TRANSCRIBER_MODEL_CACHE_MB environment
+variable (unset or 0 means no budget).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ModelKey = Tuple[str, str, str]
+
+# Approximate parameter counts of the official whisper checkpoints, used when the loaded model
+# does not expose torch parameters we can measure.
+_APPROX_PARAMS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large": 1_550_000_000,
+}
+
+_DTYPE_BYTES = {"float32": 4, "float16": 2, "int8": 1}
+
+# Memory a model uses while running beyond its weights (activations, decoder caches), as a
+# fraction of the weights.
+RUNTIME_OVERHEAD = 0.5
+
+
+def approx_params(model_name: str) -> int:
+    """Approximate parameter count of a whisper checkpoint ("small.en", "large-v3" count as their
+    size), or 0 when the name is not one of them."""
+    return _APPROX_PARAMS.get(model_name.split(".")[0].split("-")[0], 0)
+
+
+def estimate_model_bytes(model: Any, model_name: str = "", dtype: str = "float32") -> int:
+    """Best-effort estimate of the memory held by a loaded model, in bytes."""
+    try:
+        total = 0
+        for p in model.parameters():
+            total += p.numel() * p.element_size()
+        for b in model.buffers():
+            total += b.numel() * b.element_size()
+        if total:
+            return total
+    except Exception:
+        pass
+    return approx_params(model_name) * _DTYPE_BYTES.get(dtype, 4)
+
+
+def available_memory_bytes(device: str = "cpu") -> Optional[int]:
+    """Memory currently available for new models on `device` (free VRAM for cuda), or None if it
+    cannot be determined."""
+    if device == "cuda":
+        try:
+            import torch
+            return int(torch.cuda.mem_get_info()[0])
+        except Exception:
+            return None
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if os.name == "nt":
+        try:
+            import ctypes
+
+            class _MemoryStatus(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(status)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+        except Exception:
+            return None
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class _Entry:
+    __slots__ = ("model", "nbytes", "load_seconds", "hits")
+
+    def __init__(self, model: Any, nbytes: int, load_seconds: float):
+        self.model = model
+        self.nbytes = nbytes
+        self.load_seconds = load_seconds
+        self.hits = 0
+
+
+class ModelRegistry:
+    """Thread-safe LRU cache of loaded models with a memory budget."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or None
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        # one lock per key so concurrent requests for the same model load it once,
+        # while loads of different models can proceed in parallel
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        # serialises inference on models that are not safe to call from several threads at once
+        self._inference_locks: Dict[ModelKey, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_seconds = 0.0
+
+    def load(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        dtype: str = "float32",
+        loader: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """Return the resident model for the key, loading it with `loader()` on a miss."""
+        key = (model_name, device, dtype)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.model
+            if loader is None:
+                raise KeyError(f"Model not loaded and no loader given: {key}")
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another thread may have finished loading while we waited
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.model
+                self._misses += 1
+            t0 = time.perf_counter()
+            model = loader()
+            elapsed = time.perf_counter() - t0
+            nbytes = estimate_model_bytes(model, model_name, dtype)
+            with self._lock:
+                self._entries[key] = _Entry(model, nbytes, elapsed)
+                self._load_seconds += elapsed
+                self._enforce_budget()
+            return model
+
+    def _lookup(self, key: ModelKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self._hits += 1
+        return entry
+
+    def _enforce_budget(self) -> None:
+        if not self.max_bytes:
+            return
+        while len(self._entries) > 1 and self._total_bytes() > self.max_bytes:
+            key, entry = self._entries.popitem(last=False)
+            self._release(key, entry)
+
+    def _total_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def _release(self, key: ModelKey, entry: _Entry) -> None:
+        self._evictions += 1
+        self._key_locks.pop(key, None)
+        entry.model = None
+        if key[1] == "cuda":
+            try:
+                import torch
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def evict(self, model_name: Optional[str] = None, device: Optional[str] = None, dtype: Optional[str] = None) -> int:
+        """Evict all entries matching the given fields (None matches anything). Returns the count."""
+        with self._lock:
+            victims = [
+                k for k in self._entries
+                if (model_name is None or k[0] == model_name)
+                and (device is None or k[1] == device)
+                and (dtype is None or k[2] == dtype)
+            ]
+            for k in victims:
+                self._release(k, self._entries.pop(k))
+            return len(victims)
+
+    def inference_lock(self, model_name: str, device: str = "cpu", dtype: str = "float32") -> threading.Lock:
+        """Lock to hold while running a shared model that is not thread-safe (e.g. openai-whisper,
+        whose decoder installs kv-cache hooks on the model for the duration of a call)."""
+        with self._lock:
+            return self._inference_locks.setdefault((model_name, device, dtype), threading.Lock())
+
+    def contains(self, model_name: str, device: str = "cpu", dtype: str = "float32") -> bool:
+        with self._lock:
+            return (model_name, device, dtype) in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": [
+                    {"model": k[0], "device": k[1], "dtype": k[2], "bytes": e.nbytes,
+                     "load_seconds": round(e.load_seconds, 3), "hits": e.hits}
+                    for k, e in self._entries.items()
+                ],
+                "total_bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "load_seconds": round(self._load_seconds, 3),
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            try:
+                budget_mb = int(os.getenv("TRANSCRIBER_MODEL_CACHE_MB", "0") or 0)
+            except ValueError:
+                budget_mb = 0
+            _registry = ModelRegistry(max_bytes=budget_mb * 1024 * 1024 if budget_mb > 0 else None)
+        return _registry
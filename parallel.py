@@ -0,0 +1,385 @@
+"""
+parallel.py
+
+Split-and-merge transcription of one long file on several worker processes.
+
+A single recording normally runs through one model on one process, however many cores the
+machine has. Here the decoded audio is cut into pieces of roughly `piece_seconds`, each cut
+placed at the quietest moment near its target position (smoothed frame energy, so a pause
+between sentences rather than a gap inside a word). Each piece carries `overlap_seconds` of audio
+beyond its cuts, so a word at a cut in continuous speech is still heard whole. The pieces are
+farmed out to a process pool. Every worker keeps its model resident (see `model_cache.py`) and
+transcribes its piece in chunks exactly as `transcriber.transcribe_file` does. The pool itself is
+kept between calls, one per (backend, model, device, worker count), so the model load is paid
+once per worker rather than once per file; `shutdown_pools()` (also run at exit) releases them.
+
+Merging offsets each piece's segments to the file's timeline and keeps a segment only in the
+piece whose cut range contains its midpoint (the same rule `SegmentStitcher` applies to chunk
+overlaps). Words repeated across a cut are dropped from the start of the later piece.
+
+The workers read the audio from a memory-mapped `.npy` (the PCM cache entry when there is one,
+otherwise a temporary file), so no samples are pickled between processes. Each worker gets its
+share of the CPU cores, so wall-clock time scales with the number of workers until memory
+bandwidth or model copies run out.
+
+API:
+- find_cuts(audio, piece_seconds, search_seconds=None) -> list[int]  (sample positions)
+- plan_pieces(total_samples, cuts, overlap_seconds) -> list[Piece]
+- merge_pieces(pieces, piece_segments) -> list[dict]
+- transcribe_parallel(audio, model_name, language, backend, workers, ...) -> (segments, processed_seconds, cancelled)
+- shutdown_pools()
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from audio import SAMPLE_RATE
+
+# pieces shorter than this are not worth a process of their own
+MIN_PIECE_SECONDS = 60.0
+MAX_PIECE_SECONDS = 600.0
+# words compared when dropping text repeated across a cut
+MAX_REPEAT_WORDS = 8
+
+_FRAME_MS = 30.0
+_SMOOTH_SECONDS = 0.5
+
+
+@dataclass
+class Piece:
+    cut_start: int  # samples; the piece owns segments whose midpoint falls in [cut_start, cut_end)
+    cut_end: int
+    start: int  # audio handed to the model, including the overlap around the cuts
+    end: int
+
+
+def piece_seconds_for(duration: float, workers: int) -> float:
+    """About two pieces per worker (so a slow piece does not leave the others idle at the end)."""
+    return min(MAX_PIECE_SECONDS, max(MIN_PIECE_SECONDS, duration / (2 * max(1, workers))))
+
+
+def find_cuts(audio: Any, piece_seconds: float, search_seconds: Optional[float] = None) -> List[int]:
+    """Sample positions to cut `audio` at: the quietest point within `search_seconds` of every
+    multiple of `piece_seconds` (default: a quarter of a piece, at most 15 s either way)."""
+    import numpy as np
+    from vad import frame_energy_db
+
+    frame = int(SAMPLE_RATE * _FRAME_MS / 1000)
+    energy = frame_energy_db(audio, frame)
+    if len(energy) == 0:
+        return []
+    width = max(1, int(_SMOOTH_SECONDS * 1000 / _FRAME_MS))
+    # moving average: one loud frame inside a pause does not hide it, a short gap inside a word
+    # is not taken for one
+    sums = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+    smooth = np.full(len(energy), np.inf)
+    if len(energy) >= width:
+        smooth[width // 2:width // 2 + len(energy) - width + 1] = (sums[width:] - sums[:-width]) / width
+    search = search_seconds if search_seconds is not None else min(15.0, piece_seconds / 4)
+    frames_per_second = 1000 / _FRAME_MS
+    total_seconds = len(audio) / SAMPLE_RATE
+    cuts: List[int] = []
+    target = piece_seconds
+    while target < total_seconds - MIN_PIECE_SECONDS / 4:
+        lo = max(0, int((target - search) * frames_per_second))
+        hi = min(len(smooth), int((target + search) * frames_per_second) + 1)
+        if hi <= lo:
+            break
+        best = lo + int(np.argmin(smooth[lo:hi]))
+        cut = min(len(audio), best * frame + frame // 2)
+        if not cuts or cut > cuts[-1]:
+            cuts.append(cut)
+        target = cut / SAMPLE_RATE + piece_seconds
+    return cuts
+
+
+def plan_pieces(total_samples: int, cuts: List[int], overlap_seconds: float) -> List[Piece]:
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    bounds = [0, *cuts, total_samples]
+    return [Piece(a, b, max(0, a - overlap), min(total_samples, b + overlap)) for a, b in zip(bounds, bounds[1:])]
+
+
+_WORD = re.compile(r"\w+(?:'\w+)*")
+
+
+def _words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def _drop_repeated(previous: str, text: str) -> str:
+    """`text` without leading words that repeat the end of `previous` (two or more words)."""
+    before, after = _words(previous)[-MAX_REPEAT_WORDS:], _words(text)
+    for n in range(min(len(before), len(after), MAX_REPEAT_WORDS), 1, -1):
+        if before[-n:] == after[:n]:
+            tokens = text.split()
+            # drop whole whitespace tokens until n words are gone (punctuation stays attached)
+            dropped = 0
+            while tokens and dropped < n:
+                dropped += len(_words(tokens.pop(0)))
+            return (" " + " ".join(tokens)) if tokens else ""
+    return text
+
+
+def _merge_piece(merged: Any, piece: Piece, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Append the segments `piece` owns to `merged` (a list or `segments.SegmentStore`); returns
+    the ones added."""
+    offset = piece.start / SAMPLE_RATE
+    lo, hi = piece.cut_start / SAMPLE_RATE, piece.cut_end / SAMPLE_RATE
+    added: List[Dict[str, Any]] = []
+    for seg in segments:
+        seg = dict(seg)
+        seg["start"] = seg.get("start", 0.0) + offset
+        seg["end"] = seg.get("end", 0.0) + offset
+        if not lo <= (seg["start"] + seg["end"]) / 2 < hi:
+            continue
+        if not added and merged:
+            seg["text"] = _drop_repeated(merged[-1].get("text", ""), seg.get("text", ""))
+            if not seg["text"].strip():
+                continue
+        added.append(seg)
+    merged.extend(added)
+    return added
+
+
+def merge_pieces(pieces: List[Piece], piece_segments: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Segments of all pieces (timestamps relative to each piece's `start`) on one timeline."""
+    merged: List[Dict[str, Any]] = []
+    for piece, segments in zip(pieces, piece_segments):
+        _merge_piece(merged, piece, segments)
+    return merged
+
+
+# set by the parent to stop every worker after its current window (inherited via the initializer)
+_worker_stop: Any = None
+
+
+def _init_worker(threads: int, stop: Any) -> None:
+    global _worker_stop
+    _worker_stop = stop
+    # read by tuning/backends (and OpenMP) when the worker first imports torch
+    for var in ("TRANSCRIBER_CPU_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+
+def _run_piece(
+    npy_path: str, start: int, end: int, model_name: str, language: Optional[str], backend: Any,
+    chunk_seconds: float, overlap_seconds: float, source: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], int, float, bool]:
+    """Worker: transcribe samples [start, end) of the mapped file. Returns (segments, windows,
+    seconds of the piece processed, stopped early)."""
+    import numpy as np
+    from backends import get_backend
+    from metrics import Trace
+    from transcriber import _load_model, _transcribe_chunks
+
+    # mapped per piece, so no worker keeps the file open once its pieces are done
+    audio = np.load(npy_path, mmap_mode="r")
+    engine = get_backend(backend)
+    model, _device, model_lock = _load_model(engine, engine.capabilities(), model_name, Trace())
+    windows = 0
+
+    def infer(window: Any, initial_prompt: Optional[str] = None) -> Dict[str, Any]:
+        nonlocal windows
+        windows += 1
+        if model_lock is None:
+            return engine.transcribe(model, window, language=language, initial_prompt=initial_prompt, source=source)
+        with model_lock:
+            return engine.transcribe(model, window, language=language, initial_prompt=initial_prompt, source=source)
+
+    try:
+        segments, processed, stopped = _transcribe_chunks(
+            infer, audio[start:end], chunk_seconds, None, _worker_stop, overlap_seconds)
+    finally:
+        del audio
+    return list(segments), windows, processed, stopped
+
+
+@dataclass
+class _Pool:
+    executor: ProcessPoolExecutor
+    stop: Any  # multiprocessing.Event shared with the workers
+    busy: bool = False
+
+
+# worker pools kept between calls, so their models stay loaded: (backend, model, device, workers)
+_pools: Dict[Tuple[str, str, str, int], _Pool] = {}
+_pools_lock = threading.Lock()
+
+
+def _checkout_pool(key: Tuple[str, str, str, int]) -> Tuple[_Pool, bool]:
+    """The kept pool for `key`, or a new one. Returns (pool, kept); while the kept pool serves
+    another call, this call gets a pool of its own that is shut down afterwards."""
+    import multiprocessing
+    from tuning import cpu_cores
+
+    workers = key[3]
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and not pool.busy:
+            pool.busy = True
+            return pool, True
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                       initargs=(max(1, cpu_cores() // workers), stop))
+        pool = _Pool(executor, stop, busy=True)
+        kept = key not in _pools
+        if kept:
+            _pools[key] = pool
+        return pool, kept
+
+
+def _checkin_pool(key: Tuple[str, str, str, int], pool: _Pool, kept: bool, broken: bool) -> None:
+    with _pools_lock:
+        if kept and not broken:
+            pool.stop.clear()
+            pool.busy = False
+            return
+        if kept:
+            _pools.pop(key, None)
+    pool.stop.set()
+    pool.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools() -> None:
+    """Stop the worker processes kept between calls (and free their models). Runs at exit."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.stop.set()
+        pool.executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pools)
+
+
+def transcribe_parallel(
+    audio: Any,
+    model_name: str,
+    language: Optional[str],
+    backend: Any,
+    workers: int,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    progress_callback: Optional[Callable[[float, float], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    segment_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    piece_seconds: Optional[float] = None,
+    on_windows: Optional[Callable[[int], None]] = None,
+    source: Optional[str] = None,
+) -> Tuple[Any, float, bool]:
+    """Transcribe decoded 16 kHz `audio` on `workers` processes. Returns (a `SegmentStore` of
+    segments with absolute timestamps, audio seconds processed, cancelled).
+
+    `segment_callback` receives each piece's merged segments once all earlier pieces are done, so
+    segments still arrive in order. Setting `stop_event` drops the pieces not yet started and
+    stops the running ones after their current window; the result then covers the pieces
+    finished before the first unfinished one, plus what that one had transcribed.
+    """
+    import numpy as np
+    from backends import get_backend
+    from segments import SegmentStore
+    from transcriber import detect_device
+
+    total = len(audio)
+    duration = total / SAMPLE_RATE
+    workers = max(1, int(workers))
+    pieces = plan_pieces(total, find_cuts(audio, piece_seconds or piece_seconds_for(duration, workers)), overlap_seconds)
+
+    npy_path = getattr(audio, "filename", None)
+    temp_path = None
+    if not npy_path or not os.path.exists(npy_path) or getattr(audio, "offset", 0):
+        fd, temp_path = tempfile.mkstemp(suffix=".npy", prefix="transcriber-")
+        os.close(fd)
+        np.save(temp_path, np.asarray(audio, dtype=np.float32))
+        npy_path = temp_path
+
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(pieces)
+    reached = [0.0] * len(pieces)  # seconds of each piece (from its `start`) transcribed
+    complete = [False] * len(pieces)
+    merged = SegmentStore()
+    emitted = 0  # pieces merged so far (always a prefix, so segments stay in order)
+    done_samples = 0
+    t0 = time.perf_counter()
+    engine = get_backend(backend)
+    device = detect_device() if "cuda" in engine.capabilities()["devices"] else "cpu"
+    key = (engine.name, model_name, device, workers)
+    pool, kept = _checkout_pool(key)
+    futures: Dict[Future, int] = {}
+    finished = broken = False
+    try:
+        futures = {
+            pool.executor.submit(_run_piece, npy_path, p.start, p.end, model_name, language, backend,
+                        chunk_seconds, overlap_seconds, source): i
+            for i, p in enumerate(pieces)
+        }
+        pending = set(futures)
+        while pending:
+            if stop_event is not None and stop_event.is_set() and not pool.stop.is_set():
+                # running pieces return after their current window; queued ones never start
+                pool.stop.set()
+                for fut in pending:
+                    fut.cancel()
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            # `wait` reports cancelled pieces as done only once the pool gets round to them
+            pending = {fut for fut in pending if not fut.cancelled()}
+            for fut in done:
+                if fut.cancelled():
+                    continue
+                i = futures[fut]
+                results[i], windows, reached[i], stopped = fut.result()
+                complete[i] = not stopped
+                if on_windows:
+                    on_windows(windows)
+                if complete[i]:
+                    done_samples += pieces[i].cut_end - pieces[i].cut_start
+            while emitted < len(pieces) and complete[emitted]:
+                added = _merge_piece(merged, pieces[emitted], results[emitted])
+                if segment_callback and added:
+                    segment_callback(added)
+                emitted += 1
+            if done and progress_callback:
+                elapsed = time.perf_counter() - t0
+                progress_callback(done_samples / total if total else 1.0,
+                                  done_samples / SAMPLE_RATE / elapsed if elapsed > 0 else 0.0)
+        finished = True
+    except BrokenProcessPool:
+        broken = True
+        raise
+    finally:
+        if not finished and not broken:
+            # an error here or in a piece: stop the others before handing the pool back
+            pool.stop.set()
+            for fut in futures:
+                fut.cancel()
+            wait([fut for fut in futures if not fut.cancelled()])
+        _checkin_pool(key, pool, kept, broken)
+        if temp_path:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    if emitted == len(pieces):
+        return merged, duration, False
+    processed = pieces[emitted - 1].cut_end if emitted else 0
+    partial = results[emitted]
+    if partial is not None:
+        # the first unfinished piece was stopped part-way: keep what it had transcribed
+        piece = pieces[emitted]
+        added = _merge_piece(merged, piece, partial)
+        if segment_callback and added:
+            segment_callback(added)
+        processed = max(processed, min(piece.cut_end, piece.start + int(reached[emitted] * SAMPLE_RATE)))
+    return merged, processed / SAMPLE_RATE, True
@@ -0,0 +1,159 @@
+"""
+pcm_cache.py
+
+On-disk cache of decoded audio, so the same recording is decoded once no matter how many times
+(or with how many models) it is transcribed.
+
+A file is decoded to 16 kHz mono float32 and stored as a `.npy` file named by the hash of the
+source file's bytes. Later runs memory-map that file: windows handed to the model are views into
+the mapping, nothing is copied and the OS page cache shares the samples between processes.
+
+Entries expire by age (TRANSCRIBER_PCM_CACHE_DAYS, default 7) and by total size
+(TRANSCRIBER_PCM_CACHE_MB, default 2048; 0 disables the cache), least recently used first. One
+hour of audio takes about 230 MB. Writes go through a temporary file and an atomic rename.
+
+API:
+- PCMCache(directory=None, max_bytes=None, max_age_seconds=None)
+- PCMCache.enabled -> bool
+- PCMCache.get(audio_hash) -> numpy array (memory-mapped) | None
+- PCMCache.put(audio_hash, samples) -> numpy array (memory-mapped) | None
+- PCMCache.load(path, audio_hash) -> numpy array  (get, or decode with `audio.load_audio` and put)
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from app_paths import cache_dir
+from audio import load_audio
+
+DEFAULT_MAX_MB = 2048
+DEFAULT_MAX_DAYS = 7
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class PCMCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None):
+        if max_bytes is None:
+            max_bytes = int(_env_number("TRANSCRIBER_PCM_CACHE_MB", DEFAULT_MAX_MB) * 1024 * 1024)
+        if max_age_seconds is None:
+            max_age_seconds = _env_number("TRANSCRIBER_PCM_CACHE_DAYS", DEFAULT_MAX_DAYS) * 86400
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._directory = directory
+        self._created = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def directory(self) -> str:
+        # created on first use so a disabled cache never touches the disk
+        if self._directory is None:
+            self._directory = cache_dir("pcm")
+        elif not self._created:
+            os.makedirs(self._directory, exist_ok=True)
+        self._created = True
+        return self._directory
+
+    def _path(self, audio_hash: str) -> str:
+        return os.path.join(self.directory, audio_hash + ".npy")
+
+    def get(self, audio_hash: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        import numpy as np
+
+        try:
+            path = self._path(audio_hash)
+            # copy-on-write mapping: zero-copy reads, and consumers that want a writable array
+            # (torch.from_numpy warns on read-only ones) never modify the file
+            samples = np.load(path, mmap_mode="c")
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return samples
+
+    def put(self, audio_hash: str, samples: Any) -> Optional[Any]:
+        """Store decoded samples; returns the memory-mapped copy (or None if it could not be stored)."""
+        if not self.enabled:
+            return None
+        import numpy as np
+
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return None  # no cache directory (e.g. a read-only home): decode without caching
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(samples, dtype=np.float32))
+            os.replace(tmp, self._path(audio_hash))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return None
+        self._evict()
+        return self.get(audio_hash)
+
+    def load(self, path: str, audio_hash: str) -> Any:
+        """Decoded samples of `path`, from the cache if present, otherwise decoded and stored."""
+        samples = self.get(audio_hash)
+        if samples is not None:
+            return samples
+        samples = load_audio(path)
+        mapped = self.put(audio_hash, samples)
+        # the mapping replaces the private decoded buffer, which can then be freed
+        return mapped if mapped is not None else samples
+
+    def _evict(self) -> None:
+        now = time.time()
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if not (e.is_file() and e.name.endswith(".npy")):
+                    continue
+                st = e.stat()
+                if self.max_age_seconds and now - st.st_mtime > self.max_age_seconds:
+                    try:
+                        os.remove(e.path)
+                    except OSError:
+                        pass
+                    continue
+                files.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+        files.sort()
+        # the newest entry is kept even if it alone exceeds the budget
+        for _, size, path in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith(".npy"):
+                    try:
+                        os.remove(e.path)
+                    except OSError:
+                        pass
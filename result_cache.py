@@ -0,0 +1,125 @@
+"""
+result_cache.py
+
+Content-addressed on-disk cache of transcription results.
+
+Entries are keyed by a streaming hash of the audio bytes plus the model name, language and the
+decode options that change the output, so renaming or copying a file still hits the cache while
+any change to the audio or settings misses. Each entry stores the segment list, which is enough
+to re-render the output in any format without running the model again.
+
+The cache is capped in size (TRANSCRIBER_RESULT_CACHE_MB, default 200 MB); the least recently used
+entries are removed first. Writes go through a temporary file and an atomic rename, so concurrent
+batch workers never see a half-written entry.
+
+API:
+- hash_file(path) -> str
+- ResultCache(directory=None, max_bytes=None)
+- ResultCache.key(audio_hash, model_name, language, options) -> str
+- ResultCache.get(key) -> dict | None
+- ResultCache.put(key, entry)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from app_paths import cache_dir
+
+DEFAULT_MAX_MB = 200
+_HASH_BLOCK = 1 << 20
+
+
+def hash_file(path: str) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_BLOCK)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or cache_dir("results")
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.getenv("TRANSCRIBER_RESULT_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+            except ValueError:
+                max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(audio_hash: str, model_name: str, language: Optional[str], options: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {"audio": audio_hash, "model": model_name, "language": language, "options": options or {}},
+            sort_keys=True,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        if not self.max_bytes:
+            return
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(".json"):
+                    st = e.stat()
+                    files.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith(".json"):
+                    try:
+                        os.remove(e.path)
+                    except OSError:
+                        pass
@@ -0,0 +1,147 @@
+"""
+segments.py
+
+Compact storage for the segments of long transcripts.
+
+A transcription used to be held as a list of segment dicts, and the result dict carried the
+whole formatted text as well. A dict with its floats and string costs several hundred bytes per
+segment, and a recording of many hours has tens of thousands of segments. `SegmentStore` keeps
+the same data in flat arrays: start and end times as doubles, the speaker number, and every
+segment's text UTF-8 encoded in one shared buffer with an offset per segment. That is about
+30 bytes per segment plus the text itself. Reading a segment back builds a small dict
+({"start", "end", "text"} and "speaker" when labelled) on the fly, so the writers, the paragraph
+formatter and `speakers.py` consume a store like any other iterable of segments. Fields other
+than those four (tokens, log probabilities, ...) are not kept.
+
+`Transcript` is what `transcriber.transcribe_file` returns as `transcription`: a handle on the
+segments that renders the paragraphs only when asked (`str()`, `==`, `in`, `write(f)`), so a
+finished run does not keep a second, fully joined copy of the text next to its segments.
+
+API:
+- SegmentStore(segments=()); .append(seg), .extend(segs), len(), [i], iteration, .text(i),
+  .set_speakers(numbers), .map_times(fn), .nbytes
+- Transcript(segments); str(), .paragraphs(), .write(f)
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TextIO, Union
+
+from writers import iter_paragraphs
+
+
+class SegmentStore:
+    """Segments ({"start", "end", "text", optional "speaker"}) in parallel arrays."""
+
+    __slots__ = ("_starts", "_ends", "_speakers", "_offsets", "_text")
+
+    def __init__(self, segments: Iterable[Dict[str, Any]] = ()):
+        self._starts = array("d")
+        self._ends = array("d")
+        self._speakers = array("i")  # 0: not labelled (speaker numbers start at 1)
+        self._offsets = array("Q", [0])  # segment i's text is _text[_offsets[i]:_offsets[i + 1]]
+        self._text = bytearray()
+        self.extend(segments)
+
+    def append(self, seg: Dict[str, Any]) -> None:
+        self._starts.append(float(seg.get("start", 0.0)))
+        self._ends.append(float(seg.get("end", 0.0)))
+        self._speakers.append(int(seg.get("speaker") or 0))
+        self._text += seg.get("text", "").encode("utf-8")
+        self._offsets.append(len(self._text))
+
+    def extend(self, segments: Iterable[Dict[str, Any]]) -> None:
+        for seg in segments:
+            self.append(seg)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def text(self, i: int) -> str:
+        return self._text[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def _segment(self, i: int) -> Dict[str, Any]:
+        seg = {"start": self._starts[i], "end": self._ends[i], "text": self.text(i)}
+        if self._speakers[i]:
+            seg["speaker"] = self._speakers[i]
+        return seg
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [self._segment(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("segment index out of range")
+        return self._segment(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self._segment(i)
+
+    def set_speakers(self, numbers: Iterable[int]) -> None:
+        """Label the segments in order (see `speakers.py`)."""
+        speakers = array("i", numbers)
+        if len(speakers) != len(self):
+            raise ValueError("one speaker number per segment expected")
+        self._speakers = speakers
+
+    def map_times(self, fn: Callable[[float], float]) -> None:
+        """Move every segment to `fn(start)`, `fn(end)` in place (e.g. from the VAD-compacted
+        timeline back to the original one); an end never precedes its start."""
+        for i in range(len(self)):
+            self._starts[i] = fn(self._starts[i])
+            self._ends[i] = max(self._starts[i], fn(self._ends[i]))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self._starts, self._ends, self._speakers, self._offsets)) + len(self._text)
+
+
+class Transcript:
+    """The paragraphs of a transcription, rendered from its segments on demand.
+
+    Compares equal to the text it renders, and supports `in`, `len()` and `str()`; the string
+    itself is built only for those and never kept.
+    """
+
+    __slots__ = ("_segments",)
+
+    def __init__(self, segments: Iterable[Dict[str, Any]]):
+        # a store or a list: something that can be iterated again for every rendering
+        self._segments = segments if isinstance(segments, (SegmentStore, list)) else list(segments)
+
+    def paragraphs(self) -> Iterator[str]:
+        return iter_paragraphs(self._segments)
+
+    def write(self, f: TextIO) -> None:
+        """Write the paragraphs to `f` one at a time."""
+        for n, paragraph in enumerate(self.paragraphs()):
+            f.write("\n\n" + paragraph if n else paragraph)
+
+    def __str__(self) -> str:
+        return "\n\n".join(self.paragraphs())
+
+    def __repr__(self) -> str:
+        return f"<Transcript of {len(self._segments)} segments>"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Transcript):
+            other = str(other)
+        if not isinstance(other, str):
+            return NotImplemented
+        return str(self) == other
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __contains__(self, text: str) -> bool:
+        return text in str(self)
+
+    def __len__(self) -> int:
+        lengths: List[int] = [len(p) for p in self.paragraphs()]
+        return sum(lengths) + 2 * max(0, len(lengths) - 1)
+
+    def __bool__(self) -> bool:
+        return next(self.paragraphs(), None) is not None
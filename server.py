@@ -0,0 +1,620 @@
+"""
+server.py
+
+Local HTTP transcription service built on `transcriber.transcribe_file`.
+
+Clients submit jobs instead of each loading their own model: the server keeps models resident in
+the process-wide registry (see `model_cache.py`) and runs jobs on a small pool of worker threads.
+Short clips queued for the same model are collected into a batch (up to `max_batch` jobs, waiting
+at most `batch_wait` seconds for companions) and run on one worker. With a backend that batches
+(see `Backend.transcribe_batch`), clips of up to `transcriber.SHORT_CLIP_SECONDS` that share a
+language and output formats (and ask for no VAD, streaming or speakers) go through the model
+together via `transcriber.transcribe_clips`; the rest run back-to-back, so the model is looked up
+and locked once per batch instead of once per clip. Segments are pushed to subscribed clients as
+soon as they are final.
+
+Only the standard library is used (asyncio streams); the server binds to 127.0.0.1 by default and
+is meant for local consumers, not the open network: path jobs may read any file this user can.
+
+Endpoints:
+- POST   /jobs                JSON {"path", "model", "language", "vad", "streaming", "speakers", "output_path",
+                              "formats"},
+                              or a raw upload (body = audio bytes, options in the query string,
+                              e.g. /jobs?model=small&filename=call.wav). Returns 202 with the job.
+                              Add ?stream=1 to get the segments stream below as the response.
+- GET    /jobs                status of all known jobs
+- GET    /jobs/{id}           status and progress; the transcription once done
+- GET    /jobs/{id}/segments  newline-delimited JSON, one {"event": "segment", ...} line per segment
+                              as it is produced, then {"event": "end", "job": {...}}
+- DELETE /jobs/{id}           cancel (queued jobs are dropped, running jobs stop after the current chunk)
+- GET    /health              queue depth, workers and resident models
+
+API:
+- TranscriptionService(model_name, backend=None, workers=1, max_batch=8, batch_wait=0.05, ...)
+- serve(service, host, port) -> asyncio.Server
+- start_background(service, host="127.0.0.1", port=0) -> BackgroundServer  (tests, load tests)
+
+Usage:
+  python -m server --backend mock --port 8765
+  python -m server --model small --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from audio import probe_duration
+from backends import BACKEND_CHOICES, get_backend
+from model_cache import get_registry
+from writers import parse_formats
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+_MAX_HEADER_BYTES = 64 * 1024
+_MAX_JSON_BYTES = 1024 * 1024
+_UPLOAD_BLOCK = 1 << 20
+
+
+@dataclass
+class ServerJob:
+    id: str
+    audio_path: str
+    model: str
+    language: Optional[str]
+    options: Dict[str, Any] = field(default_factory=dict)
+    output_path: Optional[str] = None
+    upload: bool = False
+    duration: Optional[float] = None
+    status: str = QUEUED
+    progress: float = 0.0
+    segments: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    batch_size: int = 0
+    stop_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    watchers: List["asyncio.Queue"] = field(default_factory=list, repr=False)
+
+    def to_dict(self, full: bool = False) -> Dict[str, Any]:
+        out = {"id": self.id, "status": self.status, "model": self.model, "language": self.language,
+               "progress": round(self.progress, 4), "segments": len(self.segments), "duration": self.duration,
+               "batch_size": self.batch_size, "error": self.error, "created": self.created,
+               "started": self.started, "finished": self.finished}
+        if full and self.result is not None:
+            # the transcription is a lazy segments.Transcript; rendered only when a client asks
+            out["result"] = {**self.result, "transcription": str(self.result.get("transcription", ""))}
+        return out
+
+
+class TranscriptionService:
+    """Job queue, short-clip batching and worker pool. All public methods run on the event loop."""
+
+    def __init__(
+        self,
+        model_name: str = "large",
+        backend: Optional[str] = None,
+        workers: int = 1,
+        max_batch: int = 8,
+        batch_wait: float = 0.05,
+        short_clip_seconds: float = 60.0,
+        use_cache: bool = True,
+        upload_dir: Optional[str] = None,
+        max_upload_bytes: int = 512 * 1024 * 1024,
+        keep_jobs: int = 1000,
+    ):
+        self.model_name = model_name
+        self.backend = get_backend(backend).name
+        self.workers = max(1, int(workers))
+        self.max_batch = max(1, int(max_batch))
+        self.batch_wait = batch_wait
+        self.short_clip_seconds = short_clip_seconds
+        self.use_cache = use_cache
+        self.upload_dir = upload_dir or tempfile.gettempdir()
+        self.max_upload_bytes = max_upload_bytes
+        self.keep_jobs = keep_jobs
+        self.jobs: "OrderedDict[str, ServerJob]" = OrderedDict()
+        self._pending: List[ServerJob] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ---------------------------------------------------------------------------
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="transcribe")
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        for job in self.jobs.values():
+            job.stop_event.set()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+        if self._pool is not None:
+            await self._loop.run_in_executor(None, self._pool.shutdown)
+
+    # ---- jobs --------------------------------------------------------------------------------
+
+    async def submit(
+        self,
+        audio_path: str,
+        model: Optional[str] = None,
+        language: Optional[str] = None,
+        output_path: Optional[str] = None,
+        upload: bool = False,
+        **options: Any,
+    ) -> ServerJob:
+        job = ServerJob(uuid.uuid4().hex[:12], audio_path, model or self.model_name,
+                        None if language in (None, "", "auto") else language, options, output_path, upload)
+        # probing may shell out to ffprobe; keep it off the event loop
+        job.duration = await self._loop.run_in_executor(None, probe_duration, audio_path)
+        self.jobs[job.id] = job
+        self._pending.append(job)
+        self._wakeup.set()
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[ServerJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ServerJob]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        job.stop_event.set()
+        if job in self._pending:
+            self._pending.remove(job)
+            self._finish(job, CANCELLED, None, None)
+        return job
+
+    async def segments(self, job: ServerJob) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's segments: those produced so far, then new ones until the job ends."""
+        queue: "asyncio.Queue" = asyncio.Queue()
+        backlog = list(job.segments)
+        live = job.status not in FINAL_STATES
+        if live:
+            job.watchers.append(queue)
+        try:
+            for seg in backlog:
+                yield seg
+            while live:
+                segs = await queue.get()
+                if segs is None:
+                    break
+                for seg in segs:
+                    yield seg
+        finally:
+            if live and queue in job.watchers:
+                job.watchers.remove(queue)
+
+    def health(self) -> Dict[str, Any]:
+        running = sum(1 for j in self.jobs.values() if j.status == RUNNING)
+        return {"ok": True, "backend": self.backend, "workers": self.workers, "queued": len(self._pending),
+                "running": running, "jobs": len(self.jobs), "models": get_registry().stats()}
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j.status in FINAL_STATES]
+        for job in finished[: max(0, len(self.jobs) - self.keep_jobs)]:
+            del self.jobs[job.id]
+
+    # ---- scheduling --------------------------------------------------------------------------
+
+    def _is_short(self, job: ServerJob) -> bool:
+        return job.duration is not None and job.duration <= self.short_clip_seconds
+
+    def _take_companions(self, first: ServerJob, limit: int) -> List[ServerJob]:
+        """Remove up to `limit` pending short jobs that can share `first`'s model."""
+        taken = []
+        for job in list(self._pending):
+            if len(taken) >= limit:
+                break
+            if job.model == first.model and self._is_short(job):
+                self._pending.remove(job)
+                taken.append(job)
+        return taken
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            first = self._pending.pop(0)
+            batch = [first]
+            if self._is_short(first) and self.max_batch > 1:
+                deadline = self._loop.time() + self.batch_wait
+                while len(batch) < self.max_batch:
+                    batch.extend(self._take_companions(first, self.max_batch - len(batch)))
+                    remaining = deadline - self._loop.time()
+                    if len(batch) >= self.max_batch or remaining <= 0:
+                        break
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            for job in batch:
+                job.batch_size = len(batch)
+            fut = self._loop.run_in_executor(self._pool, self._run_batch, batch)
+            fut.add_done_callback(lambda _f: self._slots.release())
+
+    # ---- worker threads ----------------------------------------------------------------------
+
+    def _clip_groups(self, batch: List[ServerJob]) -> List[List[ServerJob]]:
+        """Jobs of `batch` that can share model calls, grouped by language and formats."""
+        from transcriber import SHORT_CLIP_SECONDS
+
+        if len(batch) < 2 or not get_backend(self.backend).capabilities()["batched"]:
+            return []
+        groups: Dict[Tuple[Any, ...], List[ServerJob]] = {}
+        for job in batch:
+            if (job.duration is not None and job.duration <= SHORT_CLIP_SECONDS and set(job.options) <= {"formats"}
+                    and not job.stop_event.is_set()):
+                groups.setdefault((job.language, tuple(job.options.get("formats") or ())), []).append(job)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def _run_clips(self, group: List[ServerJob]) -> None:
+        from transcriber import transcribe_clips
+
+        now = time.time()
+        for job in group:
+            job.status, job.started = RUNNING, now
+        finished = set()
+
+        def done(i: int, result: Dict[str, Any]) -> None:
+            finished.add(i)
+            job = group[i]
+            status = FAILED if result["error"] else CANCELLED if result["cancelled"] else DONE
+            self._remove_upload(job)
+            self._loop.call_soon_threadsafe(self._finish, job, status, None if result["error"] else result,
+                                            result["error"])
+
+        try:
+            transcribe_clips(
+                [job.audio_path for job in group], group[0].model, group[0].language,
+                outputs=[job.output_path for job in group], backend=self.backend,
+                max_batch=len(group), batch_wait=0.0, use_cache=self.use_cache,
+                formats=group[0].options.get("formats"), on_result=done,
+                segment_callback=lambda i, segs: self._loop.call_soon_threadsafe(self._publish, group[i], segs),
+            )
+        except Exception as e:
+            for i, job in enumerate(group):
+                if i not in finished:
+                    self._remove_upload(job)
+                    self._loop.call_soon_threadsafe(self._finish, job, FAILED, None, str(e))
+
+    @staticmethod
+    def _remove_upload(job: ServerJob) -> None:
+        if job.upload:
+            try:
+                os.remove(job.audio_path)
+            except OSError:
+                pass
+
+    def _run_batch(self, batch: List[ServerJob]) -> None:
+        # imported here so the server starts (and answers /health) before whisper/torch are loaded
+        from transcriber import transcribe_file
+
+        for group in self._clip_groups(batch):
+            self._run_clips(group)
+            batch = [job for job in batch if all(job is not other for other in group)]
+        for job in batch:
+            if job.stop_event.is_set():
+                self._loop.call_soon_threadsafe(self._finish, job, CANCELLED, None, None)
+                continue
+            job.status = RUNNING
+            job.started = time.time()
+            status, result, error = DONE, None, None
+            try:
+                result = transcribe_file(
+                    job.audio_path,
+                    model_name=job.model,
+                    language=job.language,
+                    output_path=job.output_path,
+                    progress_callback=lambda f, _tp, j=job: setattr(j, "progress", f),
+                    stop_event=job.stop_event,
+                    backend=self.backend,
+                    use_cache=self.use_cache,
+                    segment_callback=lambda segs, j=job: self._loop.call_soon_threadsafe(self._publish, j, segs),
+                    **job.options,
+                )
+                if result.get("cancelled"):
+                    status = CANCELLED
+            except Exception as e:
+                status, error = FAILED, str(e)
+            finally:
+                self._remove_upload(job)
+            self._loop.call_soon_threadsafe(self._finish, job, status, result, error)
+
+    def _publish(self, job: ServerJob, segments: List[Dict[str, Any]]) -> None:
+        job.segments.extend(segments)
+        for queue in job.watchers:
+            queue.put_nowait(segments)
+
+    def _finish(self, job: ServerJob, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        job.status, job.result, job.error = status, result, error
+        job.finished = time.time()
+        if status == DONE:
+            job.progress = 1.0
+        for queue in job.watchers:
+            queue.put_nowait(None)
+
+
+# ---- HTTP --------------------------------------------------------------------------------------
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _truthy(value: Optional[str]) -> bool:
+    return (value or "").lower() in ("1", "true", "yes", "on")
+
+
+def _head(status: int, content_type: str, extra: str = "") -> bytes:
+    return (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Connection: close\r\n{extra}\r\n").encode("latin-1")
+
+
+async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Any) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(_head(status, "application/json", f"Content-Length: {len(body)}\r\n") + body)
+    await writer.drain()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], Dict[str, str]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise _HttpError(400, "request header too large") from None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise _HttpError(400, "malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    url = urlsplit(target)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    return method.upper(), url.path.rstrip("/") or "/", headers, query
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str], limit: int) -> bytes:
+    length = _content_length(headers, limit)
+    return await reader.readexactly(length) if length else b""
+
+
+def _content_length(headers: Dict[str, str], limit: int) -> int:
+    if "transfer-encoding" in headers:
+        raise _HttpError(411, "chunked request bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpError(400, "bad Content-Length") from None
+    if length > limit:
+        raise _HttpError(413, f"body larger than {limit} bytes")
+    return length
+
+
+async def _save_upload(reader: asyncio.StreamReader, headers: Dict[str, str], service: TranscriptionService,
+                       filename: str) -> str:
+    """Stream the request body to a temporary file (never held in memory as a whole)."""
+    length = _content_length(headers, service.max_upload_bytes)
+    if not length:
+        raise _HttpError(400, "empty upload")
+    suffix = os.path.splitext(filename)[1] if filename else ".bin"
+    fd, path = tempfile.mkstemp(dir=service.upload_dir, prefix="upload-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            remaining = length
+            while remaining:
+                block = await reader.read(min(_UPLOAD_BLOCK, remaining))
+                if not block:
+                    raise _HttpError(400, "upload ended early")
+                f.write(block)
+                remaining -= len(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+async def _stream_segments(writer: asyncio.StreamWriter, service: TranscriptionService, job: ServerJob,
+                           announce: bool = False) -> None:
+    writer.write(_head(200, "application/x-ndjson", "Transfer-Encoding: chunked\r\n"))
+
+    def chunk(obj: Dict[str, Any]) -> bytes:
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        return f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n"
+
+    if announce:
+        writer.write(chunk({"event": "job", **job.to_dict()}))
+    await writer.drain()
+    async for seg in service.segments(job):
+        writer.write(chunk({"event": "segment", **seg}))
+        await writer.drain()
+    writer.write(chunk({"event": "end", "job": job.to_dict(full=True)}) + b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def _route(reader, writer, service: TranscriptionService) -> None:
+    method, path, headers, query = await _read_request(reader)
+    parts = [p for p in path.split("/") if p]
+
+    if parts == ["health"] and method == "GET":
+        return await _send_json(writer, 200, service.health())
+
+    if parts == ["jobs"]:
+        if method == "GET":
+            return await _send_json(writer, 200, {"jobs": [j.to_dict() for j in service.jobs.values()]})
+        if method != "POST":
+            raise _HttpError(405, "use GET or POST")
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                spec = json.loads(await _read_body(reader, headers, _MAX_JSON_BYTES) or b"{}")
+            except ValueError:
+                raise _HttpError(400, "invalid JSON") from None
+            audio_path = spec.get("path")
+            if not audio_path or not os.path.isfile(audio_path):
+                raise _HttpError(400, f"not a file: {audio_path}")
+            upload = False
+        else:
+            spec = dict(query)
+            audio_path = await _save_upload(reader, headers, service, query.get("filename", ""))
+            upload = True
+        options = {k: _truthy(str(spec[k])) if isinstance(spec[k], str) else bool(spec[k])
+                   for k in ("vad", "streaming", "speakers") if k in spec}
+        if "formats" in spec:
+            try:
+                options["formats"] = parse_formats(spec["formats"])
+            except ValueError as e:
+                raise _HttpError(400, str(e)) from None
+        job = await service.submit(audio_path, model=spec.get("model"), language=spec.get("language"),
+                                   output_path=None if upload else spec.get("output_path"), upload=upload, **options)
+        if _truthy(query.get("stream")):
+            return await _stream_segments(writer, service, job, announce=True)
+        return await _send_json(writer, 202, job.to_dict())
+
+    if len(parts) in (2, 3) and parts[0] == "jobs":
+        job = service.get(parts[1])
+        if job is None:
+            raise _HttpError(404, f"no such job: {parts[1]}")
+        if len(parts) == 3:
+            if parts[2] != "segments" or method != "GET":
+                raise _HttpError(404, "unknown endpoint")
+            return await _stream_segments(writer, service, job)
+        if method == "GET":
+            return await _send_json(writer, 200, job.to_dict(full=True))
+        if method == "DELETE":
+            return await _send_json(writer, 200, service.cancel(job.id).to_dict())
+        raise _HttpError(405, "use GET or DELETE")
+
+    raise _HttpError(404, "unknown endpoint")
+
+
+async def serve(service: TranscriptionService, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+    """Start the service's scheduler and an HTTP listener on (host, port)."""
+    await service.start()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await _route(reader, writer, service)
+        except _HttpError as e:
+            await _send_json(writer, e.status, {"error": str(e)})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # client went away; its job (if any) keeps running
+        except Exception as e:
+            try:
+                await _send_json(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    return await asyncio.start_server(handle, host, port, limit=_MAX_HEADER_BYTES)
+
+
+class BackgroundServer:
+    """A server running on its own event-loop thread. Use `.url`, then `.stop()`."""
+
+    def __init__(self, service: TranscriptionService, host: str = "127.0.0.1", port: int = 0):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        self._server: Optional[asyncio.AbstractServer] = None
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self._server = self.loop.run_until_complete(serve(service, host, port))
+            ready.set()
+            self.loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="transcribe-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+            await self.service.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+def start_background(service: TranscriptionService, host: str = "127.0.0.1", port: int = 0) -> BackgroundServer:
+    return BackgroundServer(service, host, port)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local HTTP transcription service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="large", help="Default model for jobs that do not name one")
+    parser.add_argument("--backend", default="whisper", choices=BACKEND_CHOICES, help="Inference engine")
+    parser.add_argument("--workers", type=int, default=1, help="Jobs (or batches) transcribed at the same time")
+    parser.add_argument("--max-batch", type=int, default=8, help="Most short clips run together on one worker")
+    parser.add_argument("--batch-wait-ms", type=float, default=50.0, help="How long a short clip waits for companions")
+    parser.add_argument("--short-clip-seconds", type=float, default=60.0, help="Clips up to this long are batched")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    args = parser.parse_args(argv)
+
+    service = TranscriptionService(args.model, backend=args.backend, workers=args.workers, max_batch=args.max_batch,
+                                   batch_wait=args.batch_wait_ms / 1000.0, short_clip_seconds=args.short_clip_seconds,
+                                   use_cache=not args.no_cache)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Listening on http://{args.host}:{args.port} (backend={service.backend}, workers={service.workers})")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+startup_profile.py
+
+Lightweight startup timing for the GUI and CLI entry points (`--profile-startup`).
+
+Entry points call `profile.start()` as early as possible, wrap each startup phase in
+`with profile.phase(name):`, and print `profile.report()` once the app is ready. The report also
+lists which heavy modules (whisper, torch, numpy, ...) were already imported by then, which should
+be none: they are loaded on the first real transcription or by the background warm-up.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+HEAVY_MODULES = ("torch", "whisper", "faster_whisper", "ctranslate2", "numpy")
+
+
+class StartupProfile:
+    def __init__(self):
+        self._t0: Optional[float] = None
+        self.phases: List[Tuple[str, float]] = []
+
+    def start(self, t0: Optional[float] = None) -> None:
+        self._t0 = t0 if t0 is not None else time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0 if self._t0 is not None else 0.0
+
+    def report(self) -> str:
+        lines = ["Startup profile:"]
+        for name, secs in self.phases:
+            lines.append(f"  {name:<32} {secs * 1000:8.1f} ms")
+        lines.append(f"  {'total (since entry point)':<32} {self.elapsed() * 1000:8.1f} ms")
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+        lines.append(f"  heavy modules imported: {', '.join(loaded) if loaded else 'none'}")
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
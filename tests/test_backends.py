@@ -0,0 +1,25 @@
+"""Tests for backend selection and segment normalization."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from backends import MockBackend, WhisperBackend, get_backend, normalize_segments
+
+
+def test_normalize_segments_from_dicts_and_objects():
+    segs = normalize_segments([
+        {"start": 0, "end": 1.5, "text": " hi", "tokens": [1, 2]},
+        SimpleNamespace(start=1.5, end=3, text=" there"),
+    ])
+    assert segs == [{"start": 0.0, "end": 1.5, "text": " hi"}, {"start": 1.5, "end": 3.0, "text": " there"}]
+
+
+def test_get_backend_resolution():
+    assert isinstance(get_backend(None), WhisperBackend)
+    mock = MockBackend()
+    assert get_backend(mock) is mock
+    assert get_backend("auto").name in ("whisper", "faster-whisper")
+    assert get_backend("mock").capabilities()["cacheable"] is False
+    with pytest.raises(ValueError):
+        get_backend("nope")
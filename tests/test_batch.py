@@ -0,0 +1,66 @@
+"""Tests for the batch scheduler in mock mode."""
+
+import os
+import time
+
+import pytest
+
+from batch import BatchJob, plan_jobs, run_batch
+
+
+def _make_files(tmp_path, sizes):
+    files = []
+    for i, n in enumerate(sizes):
+        p = tmp_path / f"clip{i}.wav"
+        p.write_bytes(b"x" * n)
+        files.append(str(p))
+    return files
+
+
+def test_plan_jobs_largest_first(tmp_path):
+    files = _make_files(tmp_path, [10, 300, 50])
+    jobs = plan_jobs(files, "small", out_dir=str(tmp_path / "out"))
+    assert [j.size for j in jobs] == [300, 50, 10]
+    assert jobs[0].output_path.endswith("clip1_transcription_small.txt")
+
+
+def test_run_batch_process_pool_mock(tmp_path):
+    files = _make_files(tmp_path, [10, 20, 30, 40])
+    files.append(str(tmp_path / "missing.wav"))  # fails inside the worker
+    jobs = plan_jobs(files[:-1], "tiny")
+    jobs.append(BatchJob(files[-1], str(tmp_path / "missing.txt")))
+    seen = []
+    summary = run_batch(jobs, "tiny", "en", workers=2, mock=True, queue_size=2, on_result=seen.append)
+    assert len(summary.results) == 5 == len(seen)
+    assert len(summary.succeeded) == 4
+    assert len(summary.failed) == 1 and "not found" in summary.failed[0].error
+    assert len({r.worker_pid for r in summary.succeeded}) >= 1
+    assert "4 succeeded, 1 failed" in summary.to_text()
+
+
+def _wav(path, seconds):
+    import wave
+
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * int(16000 * seconds))
+    return str(path)
+
+
+def test_short_clips_run_in_batches(tmp_path):
+    pytest.importorskip("numpy")
+    files = [_wav(tmp_path / f"vm{i}.wav", 2 + i) for i in range(6)]
+    jobs = plan_jobs(files, "tiny")
+    jobs.append(BatchJob(str(tmp_path / "gone.wav"), str(tmp_path / "gone.txt"), duration=1.0))
+    t0 = time.perf_counter()
+    summary = run_batch(jobs, "tiny", "en", mock=True, max_batch=4, batch_wait=0.5, formats=["txt", "srt"])
+    elapsed = time.perf_counter() - t0
+    assert len(summary.succeeded) == 6 and len(summary.failed) == 1
+    assert sorted(r.batch_size for r in summary.succeeded) == [2, 2, 4, 4, 4, 4]
+    assert elapsed < 6 * 0.3  # two mock model calls instead of six
+    for f in files:
+        out = f.replace(".wav", "_transcription_tiny.txt")
+        assert f"MOCK TRANSCRIPTION for {os.path.basename(f)}" in open(out, encoding="utf-8").read()
+        assert os.path.exists(out.replace(".txt", ".srt"))
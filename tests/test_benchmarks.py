@@ -0,0 +1,28 @@
+"""Smoke test for the benchmark pieces: synthetic audio through the full pipeline with the stand-in model."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.standin import StandInBackend
+from benchmarks.synth import synth_audio, write_wav
+from transcriber import transcribe_file
+
+
+def test_synth_audio_silence_ratio():
+    samples, speech = synth_audio(60, silence_ratio=0.4, seed=3)
+    assert len(samples) == 60 * 16000
+    assert 0.45 < speech / 60 < 0.75
+
+
+def test_pipeline_with_standin_model(tmp_path):
+    path = tmp_path / "synth.wav"
+    write_wav(str(path), synth_audio(40, silence_ratio=0.5, seed=4)[0])
+    out = tmp_path / "out.txt"
+    backend = StandInBackend(cpu_per_audio_second=0.001, load_seconds=0.0)
+    res = transcribe_file(str(path), model_name="bench-test", output_path=str(out), use_cache=False,
+                          backend=backend, vad=True, chunk_seconds=10.0)
+    assert res["duration"] == pytest.approx(40.0)
+    assert res["vad_skipped_seconds"] > 5
+    assert "lorem" in res["transcription"]
+    assert out.read_text(encoding="utf-8").startswith("Model: bench-test")
@@ -0,0 +1,126 @@
+"""Tests for checkpoint journals and resuming an interrupted transcription."""
+
+import threading
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backends import Backend  # noqa: E402
+from checkpoint import Journal, journal_path  # noqa: E402
+from transcriber import SAMPLE_RATE, transcribe_file  # noqa: E402
+
+
+class _PositionBackend(Backend):
+    """Names each segment after the second it starts at and the prompt it was given."""
+
+    name = "position"
+
+    def __init__(self):
+        self.calls = 0
+
+    def load(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        self.calls += 1
+        second = int(round(float(audio[0]) * 200))
+        half = len(audio) / SAMPLE_RATE / 2
+        segs = [{"start": 0.0, "end": half, "text": f" s{second}a p{len(initial_prompt or '')}"},
+                {"start": half, "end": 2 * half, "text": f" s{second}b"}]
+        return {"text": "".join(s["text"] for s in segs), "segments": segs}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(cacheable=False, thread_safe=True)
+        return caps
+
+
+def _wav(path, seconds=30):
+    levels = (np.arange(seconds * SAMPLE_RATE) // SAMPLE_RATE % 100) / 200.0
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((levels * 32767).astype(np.int16).tobytes())
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_resumed_run_matches_uninterrupted_run(tmp_path, streaming):
+    audio = tmp_path / "talk.wav"
+    _wav(audio)
+    opts = dict(model_name="m", chunk_seconds=5.0, overlap_seconds=1.0, streaming=streaming, use_cache=False,
+                formats="txt,json")
+
+    full_backend = _PositionBackend()
+    full = transcribe_file(str(audio), output_path=str(tmp_path / "full.txt"), backend=full_backend, **opts)
+    assert not (tmp_path / "full.txt.journal").exists()
+
+    out = tmp_path / "resumed.txt"
+    stop = threading.Event()
+    seen = []
+
+    def stop_after_three(fraction, _tp):
+        seen.append(fraction)
+        if len(seen) == 3:
+            stop.set()
+
+    first = transcribe_file(str(audio), output_path=str(out), backend=_PositionBackend(),
+                            progress_callback=stop_after_three, stop_event=stop, **opts)
+    assert first["cancelled"] and (tmp_path / "resumed.txt.journal").exists()
+
+    resumed_backend = _PositionBackend()
+    resumed = transcribe_file(str(audio), output_path=str(out), backend=resumed_backend, resume=True, **opts)
+    assert not resumed["cancelled"] and resumed["resumed_seconds"] == 13.0
+    assert resumed_backend.calls == full_backend.calls - 3
+    assert resumed["transcription"] == full["transcription"]
+    assert (tmp_path / "resumed.json").read_text() == (tmp_path / "full.json").read_text()
+    assert not (tmp_path / "resumed.txt.journal").exists()
+
+
+def test_mismatched_or_torn_journal(tmp_path):
+    path = journal_path(str(tmp_path / "out.txt"))
+    header = {"audio": {"size": 1, "mtime_ns": 2}, "model": "m"}
+    journal, state = Journal.open(path, header)
+    assert state is None
+    journal.commit({"start": 0, "processed": 10, "segments": [{"start": 0, "end": 1, "text": "a"}],
+                    "pending": [], "prompt": "a"})
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"start": 5, "proc')  # torn by a crash
+    journal, state = Journal.open(path, header, resume=True)
+    assert state["processed"] == 10 and state["segments"][0]["text"] == "a"
+    journal.commit({"start": 5, "processed": 20, "segments": [], "pending": [], "prompt": None})
+    journal.close()
+    _journal, state = Journal.open(path, header, resume=True)
+    assert state["processed"] == 20
+    _journal.close()
+    _journal, state = Journal.open(path, {**header, "model": "other"}, resume=True)
+    assert state is None and _journal.discarded == "different model"
+    _journal.close(remove=True)
+
+
+def test_recalibrated_chunk_size_still_resumes(tmp_path, caplog):
+    audio = tmp_path / "talk.wav"
+    _wav(audio)
+    out = tmp_path / "out.txt"
+    opts = dict(model_name="m", chunk_seconds=5.0, overlap_seconds=1.0, use_cache=False)
+    stop = threading.Event()
+    first = transcribe_file(str(audio), output_path=str(out), backend=_PositionBackend(), stop_event=stop,
+                            progress_callback=lambda *_: stop.set(), tuned_chunk_seconds=10.0, **opts)
+    assert first["cancelled"]
+
+    # the calibration changed the chunk size between the runs: the journal still applies
+    resumed = transcribe_file(str(audio), output_path=str(out), backend=_PositionBackend(), resume=True,
+                              tuned_chunk_seconds=5.0, **opts)
+    assert not resumed["cancelled"] and resumed["resumed_seconds"] == first["processed_seconds"] > 0
+
+    stop.clear()
+    transcribe_file(str(audio), output_path=str(out), backend=_PositionBackend(), stop_event=stop,
+                    progress_callback=lambda *_: stop.set(), **opts)
+    with caplog.at_level("WARNING", logger="checkpoint"):
+        restarted = transcribe_file(str(audio), output_path=str(out), backend=_PositionBackend(), resume=True,
+                                    **{**opts, "overlap_seconds": 2.0})
+    assert restarted["resumed_seconds"] == 0.0
+    assert "different overlap_seconds" in caplog.text
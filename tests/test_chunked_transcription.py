@@ -0,0 +1,46 @@
+"""Tests for chunked transcription: progress reporting and cooperative cancellation."""
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from transcriber import SAMPLE_RATE, _transcribe_chunks
+
+
+class _FakeInfer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, chunk, initial_prompt=None):
+        self.calls += 1
+        dur = len(chunk) / SAMPLE_RATE
+        return {"text": f"chunk {self.calls}", "segments": [{"start": 0.0, "end": dur, "text": f"chunk {self.calls}"}]}
+
+
+def test_progress_and_absolute_timestamps():
+    audio = np.zeros(SAMPLE_RATE * 25, dtype=np.float32)
+    progress = []
+    segs, processed, cancelled = _transcribe_chunks(
+        _FakeInfer(), audio, 10.0, lambda f, t: progress.append((f, t)), None
+    )
+    assert not cancelled and processed == 25.0
+    assert [round(f, 2) for f, _ in progress] == [0.4, 0.8, 1.0]
+    assert all(t > 0 for _, t in progress)
+    assert [(s["start"], s["end"]) for s in segs] == [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)]
+
+
+def test_stop_event_returns_partial_result():
+    audio = np.zeros(SAMPLE_RATE * 100, dtype=np.float32)
+    stop = threading.Event()
+    model = _FakeInfer()
+
+    def on_progress(fraction, throughput):
+        if fraction >= 0.2:
+            stop.set()
+
+    segs, processed, cancelled = _transcribe_chunks(model, audio, 10.0, on_progress, stop)
+    assert cancelled
+    assert model.calls == 2 and processed == 20.0
+    assert len(segs) == 2
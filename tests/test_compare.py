@@ -0,0 +1,119 @@
+"""Tests for the multi-model comparison (compare.py)."""
+
+import threading
+import time
+
+import pytest
+
+from compare import _MemoryGate, compare_models, parse_models, word_diff, word_error_rate
+
+
+def test_parse_models():
+    assert parse_models(" tiny, small,,tiny ,large") == ["tiny", "small", "large"]
+
+
+def test_word_error_rate():
+    ref = "The cat sat on the mat."
+    assert word_error_rate(ref, "the CAT sat on the mat") == 0.0
+    # one substitution, one deletion
+    assert word_error_rate(ref, "the dog sat on mat") == pytest.approx(2 / 6)
+    # insertions count too, so WER can exceed 1
+    assert word_error_rate("a", "b c d") == 3.0
+    assert word_error_rate("", "") == 0.0
+
+
+def test_word_error_rate_without_numpy_agrees(monkeypatch):
+    pytest.importorskip("numpy")
+    ref = "one two three four five six seven eight nine ten " * 3
+    hyp = "one too three five six seven ate nine ten eleven " * 3
+    expected = word_error_rate(ref, hyp)
+    monkeypatch.setitem(__import__("sys").modules, "numpy", None)
+    assert word_error_rate(ref, hyp) == expected
+
+
+def test_word_diff():
+    diffs = word_diff("the cat sat on the mat", "the dog sat on the mat today", context=1)
+    assert diffs == ["the [-cat-] {+dog+} sat", "mat {+today+}"]
+
+
+def test_memory_gate_admits_oversized_model_alone():
+    gate = _MemoryGate(budget=10)
+    gate.acquire(50)  # nothing running: admitted even though it exceeds the budget
+    admitted = threading.Event()
+
+    def second():
+        gate.acquire(5)
+        admitted.set()
+
+    t = threading.Thread(target=second)
+    t.start()
+    assert not admitted.wait(0.1)
+    gate.release(50)
+    assert admitted.wait(2)
+    t.join()
+
+
+def test_compare_models_mock(tmp_path):
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"x" * 100)
+    seen = []
+    comparison = compare_models(str(audio), "tiny,large", mock=True, memory_budget=1 << 40, on_run=seen.append)
+    assert comparison.reference == "large"
+    assert sorted(r.model for r in seen) == ["large", "tiny"]
+    assert (tmp_path / "talk_transcription_tiny.txt").exists()
+    assert (tmp_path / "talk_transcription_large.txt").exists()
+    tiny = comparison.run("tiny")
+    # the mock transcripts differ only in the model name
+    assert tiny.ok and 0 < tiny.wer < 0.5
+    report = (tmp_path / "talk_comparison.txt").read_text(encoding="utf-8")
+    assert "(reference)" in report and "[-large-] {+tiny+}" in report
+
+
+def test_compare_models_run_concurrently_within_budget(tmp_path, monkeypatch):
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"x" * 100)
+    running = []
+    peak = []
+
+    def fake_transcribe(audio_path, model_name, **kwargs):
+        assert kwargs["use_cache"] is False  # a cached transcript would time nothing
+        running.append(model_name)
+        peak.append(len(running))
+        time.sleep(0.1)
+        running.remove(model_name)
+        return {"transcription": f"words from {model_name}", "duration": 10.0, "output_files": {},
+                "timings": {"load": 5.0, "inference": 2.0, "total": 7.0}}
+
+    monkeypatch.setattr("transcriber.transcribe_file", fake_transcribe)
+    comparison = compare_models(str(audio), ["tiny", "small"], mock=True, memory_budget=1 << 40, report_path="")
+    assert max(peak) == 2
+    # RTF counts the time in the model, not loading or waiting next to the other model
+    assert comparison.run("small").rtf == pytest.approx(0.2)
+
+    # a budget that fits one model at a time runs them one after the other
+    peak.clear()
+    compare_models(str(audio), ["tiny", "small"], mock=True, memory_budget=1, report_path="")
+    assert max(peak) == 1
+
+
+def test_compare_models_evicts_only_when_the_next_model_does_not_fit(tmp_path, monkeypatch):
+    from model_cache import get_registry
+
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"x" * 100)
+    evicted = []
+    monkeypatch.setattr("transcriber.transcribe_file", lambda audio_path, model_name, **kwargs: {
+        "transcription": model_name, "duration": 10.0, "output_files": {}})
+    registry = get_registry()
+    registry.evict("base")
+    registry.evict("medium")
+    monkeypatch.setattr(registry, "evict", lambda model_name, device, dtype: evicted.append(model_name))
+
+    compare_models(str(audio), ["base", "medium"], language="en", mock=True, memory_budget=1 << 40,
+                   concurrency=1, report_path="")
+    assert evicted == []
+
+    # medium runs first; base would not fit next to it, and nothing follows base
+    compare_models(str(audio), ["base", "medium"], language="en", mock=True, memory_budget=1,
+                   concurrency=1, report_path="")
+    assert evicted == ["medium"]
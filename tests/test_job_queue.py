@@ -0,0 +1,31 @@
+"""Tests for the GUI job queue helpers (no window is shown)."""
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from ui.job_queue import expand_paths, format_eta, unique_output_path  # noqa: E402
+
+
+def test_expand_paths_keeps_files_and_expands_folders(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "b.mp3").write_bytes(b"x")
+    (sub / "notes.txt").write_text("x")
+    single = tmp_path / "a.wav"
+    single.write_bytes(b"x")
+    assert expand_paths([str(single), str(tmp_path / "sub"), str(tmp_path / "missing.wav")]) == [
+        str(single), str(sub / "b.mp3")]
+
+
+def test_unique_output_path_avoids_disk_and_queued(tmp_path):
+    out = tmp_path / "a_transcription_small.txt"
+    out.write_text("old")
+    taken = {str(tmp_path / "a_transcription_small (1).txt")}
+    assert unique_output_path(str(out), taken) == str(tmp_path / "a_transcription_small (2).txt")
+
+
+def test_format_eta():
+    assert format_eta(None) == ""
+    assert format_eta(75.4) == "1:15"
+    assert format_eta(3720) == "1h02m"
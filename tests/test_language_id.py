@@ -0,0 +1,65 @@
+"""Tests for language identification before transcription (language_id.py)."""
+
+import json
+
+from batch import order_by_language, plan_jobs, run_batch
+from language_id import format_detection, identify, rank, sample_offsets
+from languages import normalize_language
+from transcriber import transcribe_file
+
+
+def test_normalize_language():
+    assert normalize_language("auto") is None and normalize_language("") is None
+    assert normalize_language("Hebrew") == "he" and normalize_language("EN") == "en"
+
+
+def test_samples_spread_and_ranking():
+    assert sample_offsets(None) == [0.0] and sample_offsets(5.0) == [0.0]
+    assert sample_offsets(300.0, count=3, seconds=10.0) == [45.0, 145.0, 245.0]
+    ranking = rank([{"he": 0.8, "ar": 0.2}, {"he": 0.6, "en": 0.4}])
+    assert ranking[0] == ["he", 0.7] and {c for c, _ in ranking} == {"he", "ar", "en"}
+    assert format_detection({"language": "he", "probability": 0.7, "ranking": ranking}) == "he (70%; en 20%, ar 10%)"
+
+
+def test_identify_uses_decoded_samples():
+    seen = []
+
+    def detect(clip):
+        seen.append(len(clip))
+        return {"fr": 1.0}
+
+    samples = [0.0] * (16000 * 60)
+    detection = identify(detect, "unused.wav", requires_audio=False, samples=samples, seconds=5.0)
+    assert detection["language"] == "fr" and seen == [16000 * 5] * 3
+    assert identify(lambda clip: {}, "unused.wav", requires_audio=False, samples=samples) is None
+
+
+def test_auto_language_is_detected_and_recorded(tmp_path):
+    audio = tmp_path / "talk_he.wav"
+    audio.write_bytes(b"RIFF0000WAVEfmt ")
+    out = tmp_path / "talk.txt"
+    res = transcribe_file(str(audio), model_name="small", language="auto", output_path=str(out), mock=True,
+                          formats="txt,json")
+    assert res["language"] == "he" and res["language_probability"] == 0.9
+    assert "language=he" in res["transcription"]
+    assert "Language: he (detected, 90%)" in out.read_text(encoding="utf-8")
+    head = json.loads((tmp_path / "talk.json").read_text(encoding="utf-8"))
+    assert head["language"] == "he" and head["language_probability"] == 0.9
+
+    res = transcribe_file(str(audio), model_name="small", language="en", mock=True)
+    assert res["language"] == "en" and res["language_probability"] is None
+
+
+def test_batch_groups_by_language(tmp_path):
+    files = []
+    for name, size in (("a_he.wav", 10), ("b_en.wav", 40), ("c_he.wav", 20), ("d_en.wav", 5)):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        files.append(str(path))
+    jobs = plan_jobs(files, "small")
+    order = []
+    summary = run_batch(jobs, "small", mock=True, on_result=lambda r: order.append(r.audio_path))
+    assert [p.rsplit("/", 1)[-1] for p in order] == ["b_en.wav", "d_en.wav", "c_he.wav", "a_he.wav"]
+    assert {r.language for r in summary.results} == {"en", "he"}
+    assert "Languages: en 2, he 2" in summary.to_text()
+    assert order_by_language([]) == []
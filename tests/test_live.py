@@ -0,0 +1,129 @@
+"""Tests for live transcription of a PCM stream (live.py), fed by a real-time replay."""
+
+import os
+import threading
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio import SAMPLE_RATE  # noqa: E402
+from backends import Backend  # noqa: E402
+from live import latency_stats, replay, transcribe_live  # noqa: E402
+
+
+def _write_wav(path, seconds):
+    """Second k of the file is a constant level of (k + 1) / 1000: the stand-in model reads it back."""
+    levels = np.repeat((np.arange(seconds) + 1) / 1000.0, SAMPLE_RATE)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((levels * 32767).astype("<i2").tobytes())
+
+
+class _WordPerSecondBackend(Backend):
+    """One segment per complete second of the window, naming which second of the stream it is."""
+
+    name = "words"
+
+    def load(self, model_name, device):
+        return model_name
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        segments = []
+        for i in range(len(audio) // SAMPLE_RATE):
+            k = int(round(float(audio[i * SAMPLE_RATE + SAMPLE_RATE // 2]) * 1000)) - 1
+            segments.append({"start": float(i), "end": float(i + 1), "text": f" w{k}"})
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(cacheable=False, thread_safe=True)
+        return caps
+
+
+def test_latency_stats():
+    stats = latency_stats([0.5, 0.1, 0.3, 0.2, 0.4])
+    assert stats == {"count": 5, "p50": 0.3, "p90": 0.5, "p99": 0.5, "max": 0.5}
+    assert latency_stats([])["p50"] is None
+
+
+def test_replayed_stream_is_committed_once_in_order(tmp_path):
+    _write_wav(tmp_path / "talk.wav", 12)
+    read_fd, write_fd = os.pipe()
+    writer = os.fdopen(write_fd, "wb")
+
+    def play():
+        with writer:
+            replay(str(tmp_path / "talk.wav"), writer, speed=8.0)
+
+    player = threading.Thread(target=play)
+    player.start()
+    committed, tentative = [], []
+    with os.fdopen(read_fd, "rb") as stream:
+        res = transcribe_live(stream, "tiny", language="en", backend=_WordPerSecondBackend(), latency_seconds=1.0,
+                              on_commit=committed.extend, on_tentative=tentative.append,
+                              output_path=str(tmp_path / "live.txt"), formats="txt,srt")
+    player.join()
+
+    assert [s["text"] for s in committed] == [f" w{k}" for k in range(12)]
+    assert [s["start"] for s in committed] == [float(k) for k in range(12)]
+    assert res["duration"] == 12.0 and not res["cancelled"] and res["windows"] >= 12
+    assert any(tentative) and tentative[-1] == []
+    assert res["latency"]["committed"]["count"] == 12 and res["latency"]["committed"]["p50"] < 2.0
+    assert res["latency"]["tentative"]["count"] > 0
+    assert "w0 w1 w2" in res["transcription"]
+    assert "w11" in (tmp_path / "live.srt").read_text(encoding="utf-8")
+
+
+class _UnsureLanguageBackend(_WordPerSecondBackend):
+    """Says "de" with a confidence that grows with the speech it is given; records every call."""
+
+    def __init__(self):
+        self.detections = []
+        self.languages = []
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        self.languages.append(language)
+        return {"text": "", "segments": []}
+
+    def detect_language(self, model, audio, source=None):
+        seconds = len(audio) / SAMPLE_RATE
+        self.detections.append(seconds)
+        p = 0.6 if seconds < 10 else 0.9
+        return {"de": p, "en": 1 - p}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(language_detection=True)
+        return caps
+
+
+def test_language_is_fixed_once_enough_speech_is_confident(tmp_path):
+    t = np.arange(16 * SAMPLE_RATE) / SAMPLE_RATE
+    with wave.open(str(tmp_path / "tone.wav"), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((0.3 * np.sin(2 * np.pi * 200 * t) * 32767).astype("<i2").tobytes())
+    read_fd, write_fd = os.pipe()
+    writer = os.fdopen(write_fd, "wb")
+
+    def play():
+        with writer:
+            replay(str(tmp_path / "tone.wav"), writer, speed=8.0)
+
+    player = threading.Thread(target=play)
+    player.start()
+    engine = _UnsureLanguageBackend()
+    with os.fdopen(read_fd, "rb") as stream:
+        res = transcribe_live(stream, "tiny", backend=engine, latency_seconds=1.0)
+    player.join()
+
+    # nothing decided on the first second of speech; unsure at 5 s, settled at 10 s
+    first, second = engine.detections
+    assert 5.0 <= first < 7.0 and 10.0 <= second < 12.0
+    assert res["language"] == "de"
+    assert engine.languages[0] is None and engine.languages[-1] == "de"
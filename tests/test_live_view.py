@@ -0,0 +1,52 @@
+"""Tests for the GUI live transcript helpers (no window is shown)."""
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from ui.live_view import SegmentBatcher, format_line  # noqa: E402
+
+
+def test_format_line():
+    assert format_line({"start": 83.4, "end": 85.0, "text": " Hello there. "}) == "[1:23] Hello there."
+    assert format_line({"start": 3725.0, "text": "Late.", "speaker": 2}) == "[1:02:05] Speaker 2: Late."
+    assert format_line({"start": 1.0, "text": "  "}) == ""
+
+
+def test_batcher_coalesces_fast_callbacks():
+    batches = []
+    batcher = SegmentBatcher(batches.append, interval=60.0)
+    for i in range(5):
+        batcher.add([{"start": float(i), "text": str(i)}])
+    assert [len(b) for b in batches] == [1]  # the first goes out at once, the rest wait
+    batcher.flush()
+    assert [len(b) for b in batches] == [1, 4]
+    batcher.flush()
+    assert len(batches) == 2
+
+    batches.clear()
+    eager = SegmentBatcher(batches.append, interval=0.0)
+    eager.add([{"text": "a"}])
+    eager.add([{"text": "b"}])
+    assert len(batches) == 2
+
+
+def test_batcher_sends_held_back_segments_without_another_add():
+    import threading
+    import time
+
+    from PyQt6 import QtCore
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    batches = []
+    batcher = SegmentBatcher(batches.append, interval=0.1)
+    # the last callbacks of a run, from the worker thread, with nothing after them
+    worker = threading.Thread(target=lambda: [batcher.add([{"text": str(i)}]) for i in range(3)])
+    worker.start()
+    worker.join()
+    assert [len(b) for b in batches] == [1]
+    deadline = time.monotonic() + 2.0
+    while len(batches) < 2 and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert [len(b) for b in batches] == [1, 2]
@@ -0,0 +1,135 @@
+"""Tests for per-run metrics and tracing (metrics.py)."""
+
+import contextlib
+import json
+import pstats
+
+import pytest
+
+import metrics
+from metrics import Trace, set_inference_hook, timed_iter
+from transcriber import transcribe_file
+
+
+@pytest.fixture
+def audio(tmp_path):
+    p = tmp_path / "a.wav"
+    p.write_bytes(b"x" * 100)
+    return str(p)
+
+
+def test_trace_accumulates_stages():
+    trace = Trace(model="tiny")
+    for _ in range(3):
+        with trace.stage("inference"):
+            pass
+    assert list(timed_iter(iter([1, 2]), trace, "decode")) == [1, 2]
+    timings = trace.timings()
+    assert set(metrics.STAGES) <= set(timings) and "total" in timings
+    assert timings["inference"] >= 0 and timings["total"] >= timings["inference"]
+
+
+def test_result_has_timings_and_jsonl_record(tmp_path, audio, monkeypatch):
+    log = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv("TRANSCRIBER_METRICS", str(log))
+    res = transcribe_file(audio, model_name="tiny", output_path=str(tmp_path / "out.txt"), mock=True, use_cache=False)
+    assert res["timings"]["inference"] > 0
+    assert res["timings"]["total"] >= res["timings"]["inference"]
+    assert res["rtf"] == pytest.approx(res["timings"]["total"] / res["processed_seconds"], rel=1e-3)
+
+    with pytest.raises(FileNotFoundError):
+        transcribe_file(str(tmp_path / "missing.wav"), model_name="tiny", mock=True)
+
+    done, failed = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert done["status"] == "done" and done["model"] == "tiny" and done["backend"] == "mock"
+    assert done["windows"] == 1 and set(done["cache"]) == {"model"}
+    assert failed["status"] == "failed" and "not found" in failed["error"]
+
+
+def test_prometheus_counters_accumulate(tmp_path, audio, monkeypatch):
+    prom = tmp_path / "transcriber.prom"
+    monkeypatch.setenv("TRANSCRIBER_METRICS_PROM", str(prom))
+    for _ in range(2):
+        transcribe_file(audio, model_name="tiny", mock=True, use_cache=False)
+    text = prom.read_text(encoding="utf-8")
+    assert "# TYPE transcriber_runs_total counter" in text
+    assert 'transcriber_runs_total{backend="mock",model="tiny",status="done"} 2.0' in text
+    assert 'transcriber_stage_seconds_total{backend="mock",model="tiny",stage="inference"}' in text
+    assert not (tmp_path / "transcriber.prom.lock").exists()
+
+
+def test_inference_hooks(tmp_path, audio, monkeypatch):
+    calls = []
+
+    @contextlib.contextmanager
+    def hook():
+        calls.append("enter")
+        yield
+
+    set_inference_hook(hook)
+    try:
+        transcribe_file(audio, model_name="tiny", mock=True, use_cache=False)
+    finally:
+        set_inference_hook(None)
+    assert calls == ["enter"]
+
+    prof = tmp_path / "inference.prof"
+    monkeypatch.setenv("TRANSCRIBER_PROFILE", str(prof))
+    transcribe_file(audio, model_name="tiny", mock=True, use_cache=False)
+    stats = pstats.Stats(str(prof))
+    assert any(func[2] == "transcribe" for func in stats.stats)
+
+
+def test_file_lock_waits_for_a_live_holder_and_takes_over_a_stale_one(tmp_path):
+    import os
+    import threading
+    import time
+
+    lock = tmp_path / "metrics.prom.lock"
+    lock.touch()  # held by another process
+    threading.Timer(0.3, lock.unlink).start()
+    t0 = time.monotonic()
+    with metrics._file_lock(str(lock), timeout=5.0):
+        assert time.monotonic() - t0 >= 0.25
+        assert lock.exists()
+    assert not lock.exists()
+
+    lock.touch()
+    old = time.time() - 60
+    os.utime(lock, (old, old))  # left behind by a crashed process
+    t0 = time.monotonic()
+    with metrics._file_lock(str(lock), timeout=5.0):
+        assert time.monotonic() - t0 < 1.0
+        assert os.stat(lock).st_mtime > old
+    assert not lock.exists()
+
+
+def test_stale_lock_is_taken_over_by_one_process_at_a_time(tmp_path):
+    import os
+    import threading
+    import time
+
+    lock = tmp_path / "metrics.prom.lock"
+    holders = []
+    overlaps = []
+
+    def contend(start):
+        start.wait()
+        with metrics._file_lock(str(lock), timeout=1.0):
+            holders.append(1)
+            overlaps.append(len(holders))
+            time.sleep(0.02)
+            holders.pop()
+
+    for _ in range(10):
+        lock.touch()
+        old = time.time() - 60
+        os.utime(lock, (old, old))  # every contender finds the same stale lock
+        start = threading.Barrier(8)
+        threads = [threading.Thread(target=contend, args=(start,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(overlaps) == 80 and max(overlaps) == 1
+    assert not lock.exists() and not os.path.exists(str(lock) + ".break")
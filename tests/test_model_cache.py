@@ -0,0 +1,60 @@
+"""Tests for the process-wide model registry (no real models required)."""
+
+import threading
+
+from model_cache import ModelRegistry
+
+
+class _FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_registry_loads_once_and_evicts_lru(monkeypatch):
+    import model_cache
+    monkeypatch.setitem(model_cache._APPROX_PARAMS, "fake", 100)
+    reg = ModelRegistry(max_bytes=1000)  # float32 "fake" models are 400 bytes, float16 200
+    calls = []
+
+    def loader(name):
+        def _load():
+            calls.append(name)
+            return _FakeModel(name)
+        return _load
+
+    a = reg.load("fake", "cpu", "float32", loader("a"))
+    assert reg.load("fake", "cpu", "float32", loader("a-again")) is a
+    reg.load("fake", "cuda", "float32", loader("b"))
+    reg.load("fake", "cpu", "float32", loader("unused"))  # touch -> cpu entry becomes most recent
+    reg.load("fake", "cpu", "float16", loader("c"))  # 200 bytes, fits
+    reg.load("fake", "mps", "float32", loader("d"))  # over budget -> evicts LRU (cuda)
+
+    assert calls == ["a", "b", "c", "d"]
+    assert not reg.contains("fake", "cuda", "float32")
+    assert reg.contains("fake", "cpu", "float32")
+    stats = reg.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert reg.evict(model_name="fake") == 3
+    assert reg.stats()["total_bytes"] == 0
+
+
+def test_registry_concurrent_load_is_single_flight():
+    reg = ModelRegistry()
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        gate.wait(1)
+        calls.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reg.load("tiny", loader=loader))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
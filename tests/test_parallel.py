@@ -0,0 +1,97 @@
+"""Tests for split-and-merge transcription of one file on a process pool (parallel.py)."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio import SAMPLE_RATE
+from parallel import Piece, find_cuts, merge_pieces, plan_pieces
+
+
+def _speech_with_pauses(seconds, pauses):
+    rng = np.random.default_rng(0)
+    audio = (0.1 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_cuts_land_in_pauses():
+    pauses = [(93.0, 94.5), (190.0, 191.0)]
+    audio = _speech_with_pauses(300, pauses)
+    cuts = find_cuts(audio, 100.0, search_seconds=20.0)
+    assert len(cuts) == 2
+    for cut, (start, end) in zip(cuts, pauses):
+        assert start * SAMPLE_RATE <= cut <= end * SAMPLE_RATE
+
+    pieces = plan_pieces(len(audio), cuts, 2.0)
+    assert [p.cut_start for p in pieces] == [0, *cuts] and pieces[-1].cut_end == len(audio)
+    assert pieces[1].start == cuts[0] - 2 * SAMPLE_RATE and pieces[0].end == cuts[0] + 2 * SAMPLE_RATE
+
+
+def test_merge_keeps_each_segment_once_and_drops_repeated_words():
+    sr = SAMPLE_RATE
+    pieces = [Piece(0, 10 * sr, 0, 12 * sr), Piece(10 * sr, 20 * sr, 8 * sr, 20 * sr)]
+    first = [{"start": 0.0, "end": 5.0, "text": " One two."},
+             {"start": 5.0, "end": 9.5, "text": " We went to the"},
+             {"start": 10.5, "end": 12.0, "text": " station"}]  # midpoint in the next piece's range
+    second = [{"start": 0.5, "end": 2.5, "text": " to the station today."},  # 8.5-10.5: owned by piece 0
+              {"start": 2.5, "end": 4.0, "text": " to the station, then home."},
+              {"start": 4.0, "end": 8.0, "text": " Bye."}]
+    merged = merge_pieces(pieces, [first, second])
+    assert [s["text"] for s in merged] == [" One two.", " We went to the", " station, then home.", " Bye."]
+    assert merged[2]["start"] == 10.5 and merged[-1]["end"] == 16.0
+
+
+def test_transcribe_file_in_parallel(tmp_path):
+    from transcriber import transcribe_file
+
+    audio = _speech_with_pauses(150, [(59.0, 60.0), (119.0, 120.0)])
+    (tmp_path / "long.wav").write_bytes(b"")
+    batches = []
+    res = transcribe_file(str(tmp_path / "long.wav"), "tiny", language="en", mock=True, samples=audio,
+                          chunk_seconds=70.0, parallel=2, segment_callback=batches.append)
+    segments = [s for batch in batches for s in batch]
+    assert len(segments) == 3 and not res["cancelled"]
+    # one window per piece; each cut falls in a pause and the next piece starts 2 s (the overlap) before it
+    assert [round(s["start"]) for s in segments] == [0, 57, 117] and round(segments[-1]["end"]) == 150
+    assert res["processed_seconds"] == res["duration"] == 150.0
+    assert str(res["transcription"]).count("MOCK TRANSCRIPTION") == 3
+
+
+def test_cancel_stops_workers_promptly():
+    import threading
+    import time
+
+    from parallel import transcribe_parallel
+
+    audio = _speech_with_pauses(600, [])
+    stop = threading.Event()
+    timer = threading.Timer(1.0, stop.set)
+    t0 = time.perf_counter()
+    timer.start()
+    try:
+        # 10 pieces of 12 mock windows (0.3 s each): about 18 s uncancelled on two workers
+        segments, processed, cancelled = transcribe_parallel(
+            audio, "tiny", "en", "mock", 2, 5.0, 0.0, stop_event=stop, piece_seconds=60.0)
+    finally:
+        timer.cancel()
+    assert time.perf_counter() - t0 < 4.0
+    assert cancelled and 0.0 < processed < 600.0
+    assert len(segments) > 0 and segments[len(segments) - 1]["end"] <= processed + 5.0
+
+
+def test_pool_and_its_workers_are_kept_between_files():
+    import parallel
+
+    parallel.shutdown_pools()
+    audio = _speech_with_pauses(150, [(59.0, 60.0), (119.0, 120.0)])
+    parallel.transcribe_parallel(audio, "tiny", "en", "mock", 2, 70.0, 0.0)
+    (key, pool), = parallel._pools.items()
+    pids = set(pool.executor._processes)
+    segments, processed, cancelled = parallel.transcribe_parallel(audio, "tiny", "en", "mock", 2, 70.0, 0.0)
+    assert parallel._pools == {key: pool} and not pool.busy
+    assert set(pool.executor._processes) == pids  # the same workers, with the model still loaded
+    assert len(segments) == 3 and processed == 150.0 and not cancelled
+    parallel.shutdown_pools()
+    assert parallel._pools == {}
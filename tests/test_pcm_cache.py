@@ -0,0 +1,89 @@
+"""Tests for the decoded-PCM cache."""
+
+import os
+import time
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import pcm_cache  # noqa: E402
+from backends import Backend  # noqa: E402
+from pcm_cache import PCMCache  # noqa: E402
+from transcriber import SAMPLE_RATE, transcribe_file  # noqa: E402
+
+
+def _wav(path, seconds=2.0):
+    samples = (np.sin(np.arange(int(seconds * SAMPLE_RATE)) / 10.0) * 0.3 * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+
+
+class _Counting:
+    def __init__(self, monkeypatch):
+        self.calls = 0
+        real = pcm_cache.load_audio
+
+        def load(path):
+            self.calls += 1
+            return real(path)
+
+        monkeypatch.setattr(pcm_cache, "load_audio", load)
+
+
+def test_decode_once_then_memory_map(tmp_path, monkeypatch):
+    decodes = _Counting(monkeypatch)
+    audio = tmp_path / "a.wav"
+    _wav(audio)
+    cache = PCMCache(str(tmp_path / "pcm"), max_bytes=10 * 1024 * 1024)
+    first = cache.load(str(audio), "h1")
+    second = cache.load(str(audio), "h1")
+    assert decodes.calls == 1
+    assert isinstance(second, np.memmap) and second.dtype == np.float32
+    assert np.array_equal(first, second)
+    window = second[100:200]
+    assert np.shares_memory(window, second)  # views, not copies
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    cache = PCMCache(str(tmp_path), max_bytes=3 * 4000 * 4, max_age_seconds=3600)
+    for i in range(4):
+        cache.put(f"k{i}", np.zeros(4000, dtype=np.float32))
+        time.sleep(0.01)
+    assert cache.get("k0") is None and cache.get("k3") is not None
+    old = os.path.join(str(tmp_path), "k3.npy")
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+    cache.put("k4", np.zeros(10, dtype=np.float32))
+    assert not os.path.exists(old)
+    assert PCMCache(str(tmp_path), max_bytes=0).get("k4") is None  # disabled cache
+
+
+class _EchoBackend(Backend):
+    name = "echo"
+
+    def load(self, model_name, device):
+        return model_name
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        text = f" {model}:{len(audio)}"
+        return {"text": text, "segments": [{"start": 0.0, "end": len(audio) / SAMPLE_RATE, "text": text}]}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(cacheable=False, thread_safe=True)
+        return caps
+
+
+def test_second_model_reuses_decoded_audio(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIBER_CACHE_DIR", str(tmp_path / "cache"))
+    decodes = _Counting(monkeypatch)
+    audio = tmp_path / "talk.wav"
+    _wav(audio)
+    small = transcribe_file(str(audio), "small", backend=_EchoBackend())
+    large = transcribe_file(str(audio), "large", backend=_EchoBackend(), streaming=True)
+    assert decodes.calls == 1
+    assert small["transcription"] == "small:32000" and large["transcription"] == "large:32000"
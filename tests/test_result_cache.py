@@ -0,0 +1,73 @@
+"""Tests for the content-addressed result cache."""
+
+import os
+
+from backends import Backend
+from result_cache import ResultCache, hash_file
+from transcriber import SAMPLE_RATE, transcribe_file
+
+
+def test_key_depends_on_content_and_settings(tmp_path):
+    a = tmp_path / "a.wav"
+    b = tmp_path / "copy_of_a.wav"
+    a.write_bytes(b"same audio")
+    b.write_bytes(b"same audio")
+    assert hash_file(str(a)) == hash_file(str(b))
+    h = hash_file(str(a))
+    assert ResultCache.key(h, "small", "en") == ResultCache.key(h, "small", "en", {})
+    assert ResultCache.key(h, "small", "en") != ResultCache.key(h, "large", "en")
+    assert ResultCache.key(h, "small", "en") != ResultCache.key(h, "small", "en", {"vad": True})
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=350)  # room for three ~107 byte entries
+    entry = {"segments": [{"start": 0, "end": 1, "text": "x" * 60}]}
+    for i, k in enumerate(["k1", "k2", "k3"]):
+        cache.put(k, entry)
+        os.utime(tmp_path / f"{k}.json", (i, i))
+    cache.get("k1")  # touch -> most recent
+    cache.put("k4", entry)
+    assert cache.get("k1") is not None
+    assert cache.get("k2") is None
+
+
+def test_cache_hit_skips_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIBER_CACHE_DIR", str(tmp_path / "cache"))
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"RIFF....")
+    cache = ResultCache()
+    key = ResultCache.key(hash_file(str(audio)), "small", "en",
+                          {"backend": "whisper", "chunk_seconds": 30.0, "overlap_seconds": 2.0, "streaming": False, "vad": False})
+    cache.put(key, {"device": "cpu", "duration": 4.0,
+                    "segments": [{"start": 0.0, "end": 2.0, "text": " Hello"}, {"start": 2.0, "end": 4.0, "text": " there."}]})
+    out = tmp_path / "talk.txt"
+    res = transcribe_file(str(audio), model_name="small", language="en", output_path=str(out))
+    assert res["cache_hit"] and res["transcription"] == "Hello there."
+    # a calibrated chunk size does not change the key
+    assert transcribe_file(str(audio), model_name="small", language="en", tuned_chunk_seconds=90.0)["cache_hit"]
+    assert out.read_text(encoding="utf-8").endswith("Hello there.")
+
+
+class _HelloBackend(Backend):
+    name = "hello"
+
+    def load(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        return {"text": " Hello.", "segments": [{"start": 0.0, "end": 1.0, "text": " Hello."}]}
+
+
+def test_unusable_cache_dir_runs_uncached(tmp_path, monkeypatch, caplog):
+    import numpy as np
+
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setenv("TRANSCRIBER_CACHE_DIR", str(blocker / "cache"))
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"RIFF....")
+    with caplog.at_level("WARNING", logger="transcriber"):
+        res = transcribe_file(str(audio), model_name="tiny", language="en", backend=_HelloBackend(),
+                              samples=np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert res["transcription"] == "Hello." and not res["cache_hit"]
+    assert "Result cache unavailable" in caplog.text
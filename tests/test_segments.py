@@ -0,0 +1,52 @@
+"""Tests for the compact segment store and the lazy transcript handle (segments.py)."""
+
+import io
+import sys
+
+import pytest
+
+from segments import SegmentStore, Transcript
+from writers import iter_paragraphs
+
+
+def _segments(n):
+    return [{"start": i * 2.0, "end": i * 2.0 + 1.5, "text": f" Sentence number {i}, café.", "tokens": [1, 2, 3]}
+            for i in range(n)]
+
+
+def test_store_round_trip():
+    segs = _segments(5)
+    store = SegmentStore(segs[:3])
+    store.extend(segs[3:])
+    assert len(store) == 5
+    assert store[0] == {"start": 0.0, "end": 1.5, "text": " Sentence number 0, café."}
+    assert store[-1]["text"] == store.text(4) == " Sentence number 4, café."
+    assert [s["start"] for s in store[1:3]] == [2.0, 4.0]
+    assert list(iter_paragraphs(store)) == list(iter_paragraphs(segs))
+
+    store.set_speakers([1, 1, 2, 2, 1])
+    assert [s["speaker"] for s in store] == [1, 1, 2, 2, 1]
+    with pytest.raises(ValueError):
+        store.set_speakers([1, 2])
+    assert [s["speaker"] for s in store] == [1, 1, 2, 2, 1]  # a bad call leaves the labels alone
+    store.map_times(lambda t: t + 10.0)
+    assert (store[1]["start"], store[1]["end"]) == (12.0, 13.5)
+
+
+def test_store_is_much_smaller_than_dicts():
+    segs = _segments(20000)
+    store = SegmentStore(segs)
+    as_dicts = sum(sys.getsizeof(s) + sys.getsizeof(s["text"]) + 2 * sys.getsizeof(s["start"]) for s in segs)
+    assert store.nbytes * 4 < as_dicts
+
+
+def test_transcript_renders_on_demand():
+    segs = _segments(7)
+    transcript = Transcript(SegmentStore(segs))
+    text = "\n\n".join(iter_paragraphs(segs))
+    assert transcript == text and str(transcript) == text and len(transcript) == len(text)
+    assert "number 6" in transcript and "number 7" not in transcript
+    out = io.StringIO()
+    transcript.write(out)
+    assert out.getvalue() == text
+    assert not Transcript([]) and Transcript([]) == ""
@@ -0,0 +1,100 @@
+"""Tests for the local HTTP transcription service (mock backend, real sockets)."""
+
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from server import TranscriptionService, start_background
+
+
+@pytest.fixture
+def server():
+    srv = start_background(TranscriptionService("small", backend="mock", workers=1, max_batch=4,
+                                                batch_wait=0.2, use_cache=False))
+    yield srv
+    srv.stop()
+
+
+def _request(srv, method, path, body=None, headers=None):
+    url = urlsplit(srv.url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    conn.request(method, path, body=body, headers=headers or {})
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    return resp.status, data
+
+
+def _json(srv, method, path, payload=None):
+    body = json.dumps(payload) if payload is not None else None
+    status, data = _request(srv, method, path, body, {"Content-Type": "application/json"})
+    return status, json.loads(data)
+
+
+def _wait_done(srv, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job = _json(srv, "GET", f"/jobs/{job_id}")
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_path_job_status_and_segments(server, tmp_path):
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"not really audio")
+    status, job = _json(server, "POST", "/jobs", {"path": str(audio), "language": "en"})
+    assert status == 202 and job["status"] in ("queued", "running")
+    done = _wait_done(server, job["id"])
+    assert done["status"] == "done"
+    assert "MOCK TRANSCRIPTION for clip.wav" in done["result"]["transcription"]
+
+    status, data = _request(server, "GET", f"/jobs/{job['id']}/segments")
+    lines = [json.loads(line) for line in data.decode().splitlines()]
+    assert status == 200
+    assert [line["event"] for line in lines] == ["segment", "end"]
+    assert lines[-1]["job"]["status"] == "done"
+
+
+def test_upload_streams_segments_and_cleans_up(server):
+    status, data = _request(server, "POST", "/jobs?filename=call.wav&stream=1", b"RIFF....",
+                            {"Content-Type": "audio/wav"})
+    events = [json.loads(line) for line in data.decode().splitlines()]
+    assert status == 200
+    assert events[0]["event"] == "job" and events[-1]["event"] == "end"
+    assert any(e["event"] == "segment" and "MOCK TRANSCRIPTION" in e["text"] for e in events)
+    assert events[-1]["job"]["status"] == "done"
+
+
+def test_short_clips_are_batched(server, tmp_path):
+    import wave
+
+    ids = []
+    for i in range(4):
+        p = tmp_path / f"c{i}.wav"
+        with wave.open(str(p), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\0\0" * 1600)
+        ids.append(_json(server, "POST", "/jobs", {"path": str(p)})[1]["id"])
+    jobs = [_wait_done(server, i) for i in ids]
+    assert all(j["status"] == "done" for j in jobs)
+    assert max(j["batch_size"] for j in jobs) > 1
+
+
+def test_errors_and_cancel(server, tmp_path):
+    assert _json(server, "POST", "/jobs", {"path": str(tmp_path / "missing.wav")})[0] == 400
+    assert _json(server, "GET", "/jobs/nope")[0] == 404
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"x")
+    job = _json(server, "POST", "/jobs", {"path": str(audio)})[1]
+    status, cancelled = _json(server, "DELETE", f"/jobs/{job['id']}")
+    assert status == 200
+    assert _wait_done(server, job["id"])["status"] in ("cancelled", "done")
+    status, health = _json(server, "GET", "/health")
+    assert status == 200 and health["backend"] == "mock"
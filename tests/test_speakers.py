@@ -0,0 +1,140 @@
+"""Tests for speaker segmentation (speakers.py) and speaker-aware output."""
+
+import pytest
+
+from backends import Backend
+from writers import iter_paragraphs, output_paths, write_outputs
+
+SR = 16000
+
+
+def _voice(np, rng, seconds, f0, formants):
+    """A buzzy vowel-like tone: harmonics of `f0` shaped by `formants`, syllable-rate envelope."""
+    t = np.arange(int(seconds * SR)) / SR
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, 6)))) / SR
+    x = sum(np.sin(h * phase) / h for h in range(1, 30))
+    freqs = np.fft.rfftfreq(len(x), 1 / SR)
+    shape = sum(np.exp(-((freqs - f) / 120) ** 2) for f in formants) + 0.05
+    y = np.fft.irfft(np.fft.rfft(x) * shape, len(x))
+    y = 0.1 * y / np.abs(y).max() * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    return (y + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _conversation(pattern):
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(1)
+    voices = {"A": (110, [500, 1500, 2500]), "B": (210, [800, 1200, 2900])}
+    parts, segments, t = [], [], 0.0
+    for who in pattern:
+        seconds = float(rng.uniform(2, 5))
+        parts.append(_voice(np, rng, seconds, *voices[who]))
+        segments.append({"start": t, "end": t + seconds, "text": f" {who} talks."})
+        parts.append(np.zeros(int(0.3 * SR), np.float32))
+        t += seconds + 0.3
+    return np.concatenate(parts), segments
+
+
+def test_two_voices_are_told_apart():
+    from speakers import label_speakers
+
+    audio, segments = _conversation("AABABBBAAB")
+    assert label_speakers(audio, segments) == 2
+    assert [s["speaker"] for s in segments] == [1, 1, 2, 1, 2, 2, 2, 1, 1, 2]
+
+    one, segments = _conversation("AAAAAA")
+    assert label_speakers(one, segments) == 1
+
+
+def test_streamed_windows_match_whole_file():
+    from speakers import SpeakerFeatures, label_speakers
+
+    audio, segments = _conversation("ABBA")
+    features = SpeakerFeatures()
+    step, window = 5 * SR, 7 * SR  # overlapping windows, as the streaming decoder delivers them
+    for start in range(0, len(audio), step):
+        features.add(start, audio[start:start + window])
+    streamed = [dict(s) for s in segments]
+    assert features.label(streamed) == label_speakers(audio, segments) == 2
+    assert [s["speaker"] for s in streamed] == [s["speaker"] for s in segments] == [1, 2, 2, 1]
+
+
+def test_clustering_scales_to_many_turns():
+    np = pytest.importorskip("numpy")
+    import time
+
+    from speakers import _cluster
+
+    # 10k turns of three voices, speakers changing at random: the pairwise matrix alone would
+    # take gigabytes and the merge loop minutes
+    rng = np.random.default_rng(0)
+    voices = rng.standard_normal((3, 12))
+    who = rng.integers(0, 3, 10000)
+    means = voices[who] + 0.1 * rng.standard_normal((len(who), 12))
+    t0 = time.perf_counter()
+    ids = _cluster(means, np.full(len(who), 200.0), 0.45, 8, None)
+    assert time.perf_counter() - t0 < 5.0
+    assert len(set(ids.tolist())) == 3
+    assert all(len(set(ids[who == v].tolist())) == 1 for v in range(3))
+
+
+def test_clustering_scales_when_no_turns_sound_alike():
+    np = pytest.importorskip("numpy")
+    import time
+
+    from speakers import _cluster
+
+    # 5k turns all further apart than the threshold: nothing merges on distance alone
+    rng = np.random.default_rng(0)
+    means = 5 * rng.standard_normal((5000, 12))
+    t0 = time.perf_counter()
+    ids = _cluster(means, np.full(len(means), 200.0), 0.45, 8, None)
+    assert time.perf_counter() - t0 < 5.0
+    assert len(set(ids.tolist())) <= 8
+
+
+def test_speaker_paragraphs_and_prefixes(tmp_path):
+    segs = [
+        {"start": 0.0, "end": 1.0, "text": " Hello.", "speaker": 1},
+        {"start": 1.0, "end": 2.0, "text": " How are you?", "speaker": 1},
+        {"start": 2.0, "end": 3.0, "text": " Fine.", "speaker": 2},
+        {"start": 3.0, "end": 4.0, "text": " Good.", "speaker": 1},
+    ]
+    assert list(iter_paragraphs(segs)) == ["Speaker 1: Hello. How are you?", "Speaker 2: Fine.", "Speaker 1: Good."]
+    paths = output_paths(str(tmp_path / "out.txt"), ["srt", "tsv", "json"])
+    write_outputs(segs, paths, "small", "cpu")
+    assert "Speaker 2: Fine." in (tmp_path / "out.srt").read_text(encoding="utf-8")
+    assert "2000\t3000\tSpeaker 2: Fine." in (tmp_path / "out.tsv").read_text(encoding="utf-8")
+    assert '"speaker": 2' in (tmp_path / "out.json").read_text(encoding="utf-8")
+
+
+class _TurnsBackend(Backend):
+    """Returns fixed segments (one window covers the whole test file)."""
+
+    name = "turns"
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    def load(self, model_name, device):
+        return model_name
+
+    def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+        return {"text": "".join(s["text"] for s in self.segments), "segments": [dict(s) for s in self.segments]}
+
+    def capabilities(self):
+        caps = super().capabilities()
+        caps.update(cacheable=False, thread_safe=True)
+        return caps
+
+
+def test_transcribe_file_labels_speakers(tmp_path):
+    from transcriber import transcribe_file
+
+    audio, segments = _conversation("ABA")
+    (tmp_path / "meeting.wav").write_bytes(b"")
+    out = tmp_path / "meeting.txt"
+    res = transcribe_file(str(tmp_path / "meeting.wav"), "small", language="en", output_path=str(out),
+                          backend=_TurnsBackend(segments), samples=audio, chunk_seconds=60.0, speakers=True)
+    assert res["speakers"] == 2 and res["timings"]["speakers"] > 0
+    assert res["transcription"] == "Speaker 1: A talks.\n\nSpeaker 2: B talks.\n\nSpeaker 1: A talks."
+    assert "Speaker 2: B talks." in out.read_text(encoding="utf-8")
@@ -0,0 +1,59 @@
+"""Tests for the streaming decode -> inference -> stitch pipeline (WAV input, no ffmpeg needed)."""
+
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio import SAMPLE_RATE, StreamingDecoder
+from transcriber import SegmentStitcher, _transcribe_streaming
+
+
+def _write_wav(path, seconds):
+    samples = (np.arange(int(seconds * SAMPLE_RATE)) % 1000).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return samples.astype(np.float32) / 32768.0
+
+
+def test_decoder_windows_overlap_and_cover_file(tmp_path):
+    path = tmp_path / "a.wav"
+    expected = _write_wav(path, 7.5)
+    starts = []
+    for start, window in StreamingDecoder(str(path), window_seconds=2.0, overlap_seconds=0.5, slots=2):
+        assert np.array_equal(window, expected[start:start + len(window)])
+        starts.append((start, len(window)))
+    assert [s for s, _ in starts] == [0, 24000, 48000, 72000, 96000]
+    assert starts[-1][0] + starts[-1][1] == len(expected)
+
+
+def test_stitcher_keeps_overlap_text_once():
+    st = SegmentStitcher()
+    assert st.add(0.0, 0.0, [{"start": 0.0, "end": 4.0, "text": "a"}, {"start": 8.0, "end": 10.0, "text": "b"}]) == []
+    final = st.add(8.0, 2.0, [{"start": 8.1, "end": 9.9, "text": "b"}, {"start": 10.0, "end": 12.0, "text": "c"}])
+    assert [s["text"] for s in final] == ["a"]
+    assert [s["text"] for s in st.flush()] == ["b", "c"]
+
+
+class _WindowInfer:
+    def __call__(self, chunk, initial_prompt=None):
+        dur = len(chunk) / SAMPLE_RATE
+        return {"text": "w", "segments": [{"start": 0.0, "end": dur / 2, "text": "x"},
+                                          {"start": dur / 2, "end": dur, "text": "y"}]}
+
+
+def test_streaming_transcription_progress(tmp_path):
+    path = tmp_path / "b.wav"
+    _write_wav(path, 10.0)
+    progress = []
+    segs, processed, cancelled = _transcribe_streaming(
+        _WindowInfer(), str(path), 4.0, 1.0, lambda f, t: progress.append(f), None
+    )
+    assert not cancelled and processed == 10.0
+    assert progress[-1] == 1.0
+    starts = [s["start"] for s in segs]
+    assert starts == sorted(starts)
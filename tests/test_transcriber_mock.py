@@ -12,3 +12,11 @@ def test_mock_transcription(tmp_path):
     assert res["output_file"] == str(out)
     assert "MOCK TRANSCRIPTION" in res["transcription"]
 
+
+
+def test_mock_transcription_with_vad_on_non_audio(tmp_path):
+    audio = tmp_path / "sample.wav"
+    audio.write_bytes(b"RIFF....")
+    res = transcribe_file(str(audio), model_name="small", language="en", mock=True, vad=True, use_cache=False)
+    assert "MOCK TRANSCRIPTION" in res["transcription"]
+    assert res["vad_skipped_seconds"] == 0.0
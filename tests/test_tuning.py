@@ -0,0 +1,99 @@
+"""Tests for hardware-aware tuning (tuning.py)."""
+
+import os
+
+import pytest
+
+import tuning
+
+GB = 1024 ** 3
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # config in a temp dir, no user thread override, and environment changes undone afterwards
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    monkeypatch.setattr(tuning, "_USER_THREADS", None)
+    for var in ("TRANSCRIBER_CPU_THREADS", "TRANSCRIBER_INTEROP_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.setenv(var, "")
+
+
+def test_threads_split_across_workers():
+    assert tuning.plan("small", workers=4, cores=8, memory=64 * GB).threads == 2
+    # whisper threads sharing one model take turns, so each gets every core
+    assert tuning.plan("small", workers=4, cores=8, memory=64 * GB, shared_model=True).threads == 8
+    # faster-whisper runs them concurrently
+    assert tuning.plan("small", workers=4, cores=8, backend="faster-whisper", shared_model=True).threads == 2
+    assert tuning.plan("small", workers=4, cores=8, memory=64 * GB, threads=3).threads == 3
+
+
+def test_memory_warning_and_downgrade():
+    plan = tuning.plan("large", cores=8, memory=2 * GB)
+    assert plan.model_name == "large"
+    assert len(plan.warnings) == 1 and "try small" in plan.warnings[0]
+
+    plan = tuning.plan("large", cores=8, memory=2 * GB, downgrade=True)
+    assert plan.model_name == "small" and "using small instead" in plan.warnings[0]
+
+    plan = tuning.plan("medium.en", workers=4, cores=8, memory=2 * GB, downgrade=True)
+    assert plan.model_name == "base.en"
+
+    assert tuning.plan("large", cores=8, memory=64 * GB).warnings == []
+
+
+def test_chunk_for_rtf():
+    assert tuning.chunk_for_rtf(1.0) == 30.0  # slow host: never below whisper's window
+    assert tuning.chunk_for_rtf(0.1) == 150.0
+    assert tuning.chunk_for_rtf(0.001) == tuning.MAX_CHUNK_SECONDS
+
+
+def test_apply_sets_environment():
+    tuning.apply(tuning.TuningPlan("small", threads=3))
+    assert os.environ["TRANSCRIBER_CPU_THREADS"] == "3"
+    assert os.environ["OMP_NUM_THREADS"] == "3"
+
+
+def test_calibrate_saves_to_config(tmp_path):
+    pytest.importorskip("numpy")
+    (tmp_path / "Transcriber").mkdir()
+    cfg = tmp_path / "Transcriber" / tuning.CONFIG_FILE_NAME
+    cfg.write_text('{"model": "small"}', encoding="utf-8")
+
+    entry = tuning.calibrate("tiny", backend="mock", clip_seconds=5.0, candidates=[2, 1])
+    assert entry["threads"] in (1, 2) and set(entry["results"]) == {"1", "2"}
+    assert tuning.load_calibration("tiny", backend="mock") == entry
+    assert '"model": "small"' in cfg.read_text(encoding="utf-8")  # other settings are kept
+
+    plan = tuning.plan("tiny", backend="mock", threads=entry["threads"])
+    assert plan.calibrated and plan.chunk_seconds == entry["chunk_seconds"]
+    assert tuning.plan("tiny", backend="mock", workers=64).threads == 1
+
+
+def test_calibrate_reloads_backends_with_load_time_threads():
+    pytest.importorskip("numpy")
+    from backends import MockBackend
+
+    class LoadTimeThreads(MockBackend):
+        name = "load-time-threads"
+
+        def __init__(self):
+            self.timed = []
+
+        def load(self, model_name, device):
+            # like faster-whisper's cpu_threads, read once when the model is built
+            return {"threads": int(os.environ["TRANSCRIBER_CPU_THREADS"])}
+
+        def transcribe(self, model, audio, language=None, initial_prompt=None, source=None):
+            if len(audio) > 16000 * 2:  # not the warm-up call
+                self.timed.append(model["threads"])
+            return {"text": "", "segments": []}
+
+        def capabilities(self):
+            caps = super().capabilities()
+            caps.update(runtime_threads=False)
+            return caps
+
+    engine = LoadTimeThreads()
+    entry = tuning.calibrate("tiny", backend=engine, clip_seconds=5.0, candidates=[4, 2, 1])
+    assert engine.timed == [4, 2, 1]
+    assert set(entry["results"]) == {"1", "2", "4"}
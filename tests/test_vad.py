@@ -0,0 +1,43 @@
+"""Tests for the energy VAD and timestamp mapping."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio import SAMPLE_RATE
+from vad import SpeechMap, detect_speech, has_speech
+
+
+def _tone(seconds, amp=0.3):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amp * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def test_detects_speech_regions_and_maps_back():
+    audio = np.concatenate([_silence(5), _tone(3), _silence(10), _tone(2), _silence(4)])
+    regions = detect_speech(audio, pad=0.0)
+    assert len(regions) == 2
+    (s1, e1), (s2, e2) = regions
+    assert abs(s1 / SAMPLE_RATE - 5) < 0.1 and abs(e1 / SAMPLE_RATE - 8) < 0.1
+    assert abs(s2 / SAMPLE_RATE - 18) < 0.1 and abs(e2 / SAMPLE_RATE - 20) < 0.1
+
+    compact, smap = SpeechMap.from_audio(audio, regions)
+    assert len(compact) == smap.compact_samples
+    assert smap.skipped_seconds == pytest.approx(19, abs=0.2)
+    second_start = (e1 - s1) / SAMPLE_RATE + SpeechMap.JOIN_SECONDS
+    segs = smap.map_segments([{"start": 0.5, "end": 2.5, "text": "a"},
+                              {"start": second_start + 0.5, "end": second_start + 1.5, "text": "b"}])
+    assert segs[0]["start"] == pytest.approx(5.5, abs=0.1)
+    assert segs[1]["start"] == pytest.approx(18.5, abs=0.1)
+    # the real pause between the two segments survives the round trip
+    assert segs[1]["start"] - segs[0]["end"] > 2.0
+
+
+def test_continuous_loud_audio_is_speech_and_silence_is_not():
+    assert has_speech(_tone(5))
+    assert not has_speech(_silence(5))
@@ -0,0 +1,96 @@
+"""Tests for the watch-folder daemon (polling mode, fake transcription)."""
+
+import os
+import threading
+import time
+
+from batch import JobResult
+from watch import FolderWatcher, ProcessedIndex, _DirPoller
+
+
+def _run_until(watcher, predicate, timeout=10.0):
+    stop = threading.Event()
+    t = threading.Thread(target=watcher.run, args=(stop,))
+    t.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        t.join()
+
+
+def _watcher(tmp_path, handled, **kw):
+    def handle(path):
+        handled.append(os.path.basename(path))
+        return JobResult(path, path + ".txt", True)
+
+    index = ProcessedIndex(str(tmp_path / "index.jsonl"), root=str(tmp_path / "in"))
+    return FolderWatcher(str(tmp_path / "in"), handle, index, settle_seconds=0.1, poll_interval=0.02,
+                         use_events=False, **kw)
+
+
+def test_existing_and_new_files_are_processed_once(tmp_path):
+    (tmp_path / "in" / "sub").mkdir(parents=True)
+    (tmp_path / "in" / "old.wav").write_bytes(b"a")
+    (tmp_path / "in" / "notes.txt").write_text("ignored")
+    handled = []
+    watcher = _watcher(tmp_path, handled)
+
+    def arrive():
+        time.sleep(0.2)
+        (tmp_path / "in" / "sub" / "new.mp3").write_bytes(b"b")
+
+    threading.Thread(target=arrive).start()
+    _run_until(watcher, lambda: len(handled) >= 2)
+    assert sorted(handled) == ["new.mp3", "old.wav"]
+
+    # a restart finds everything in the index and does no work
+    handled2 = []
+    _run_until(_watcher(tmp_path, handled2), lambda: False, timeout=0.4)
+    assert handled2 == []
+
+
+def test_file_still_growing_waits_until_stable(tmp_path):
+    (tmp_path / "in").mkdir()
+    target = tmp_path / "in" / "rec.wav"
+    handled = []
+    watcher = _watcher(tmp_path, handled)
+    seen_size = []
+
+    def grow():
+        with open(target, "wb") as f:
+            for _ in range(10):
+                f.write(b"x" * 100)
+                f.flush()
+                time.sleep(0.03)
+
+    orig = watcher.handle
+    watcher.handle = lambda p: (seen_size.append(os.path.getsize(p)), orig(p))[1]
+    threading.Thread(target=grow).start()
+    _run_until(watcher, lambda: handled)
+    assert seen_size == [1000]
+
+
+def test_changed_file_is_reprocessed(tmp_path):
+    (tmp_path / "in").mkdir()
+    f = tmp_path / "in" / "a.wav"
+    f.write_bytes(b"v1")
+    index = ProcessedIndex(str(tmp_path / "index.jsonl"), root=str(tmp_path / "in"))
+    stamp = (os.stat(f).st_size, os.stat(f).st_mtime_ns)
+    index.record(str(f), stamp, JobResult(str(f), "out.txt", True))
+    assert ProcessedIndex(str(tmp_path / "index.jsonl"), root=str(tmp_path / "in")).is_done(str(f), stamp)
+    assert not index.is_done(str(f), (stamp[0] + 1, stamp[1]))
+
+
+def test_poller_lists_only_changed_directories(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "x.wav").write_bytes(b"x")
+    poller = _DirPoller(str(tmp_path))
+    assert len(poller.scan()) == 1
+    assert poller.poll() == []
+    time.sleep(0.01)
+    (tmp_path / "a" / "y.wav").write_bytes(b"y")
+    assert poller.poll() == [str(tmp_path / "a" / "y.wav")]
@@ -0,0 +1,81 @@
+"""Tests for the one-pass output writers."""
+
+import json
+import random
+
+from backends import MockBackend
+from transcriber import transcribe_file
+from writers import iter_paragraphs, output_paths, parse_formats, write_outputs
+
+
+def _reference_paragraphs(segments):
+    # the original list-based formatter, kept here as the behavioural reference
+    paragraphs, current = [], []
+    for i, segment in enumerate(segments):
+        text = segment.get("text", "").strip()
+        if not text:
+            continue
+        current.append(text)
+        if len(current) >= 3 or (i < len(segments) - 1 and segments[i + 1].get("start", 0) - segment.get("end", 0) > 2.0):
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return paragraphs
+
+
+def test_streaming_paragraphs_match_reference():
+    rng = random.Random(3)
+    for _ in range(200):
+        t, segs = 0.0, []
+        for i in range(rng.randint(0, 12)):
+            start = t + rng.choice([0.0, 0.5, 2.5, 4.0])
+            t = start + rng.uniform(0.5, 3.0)
+            segs.append({"start": start, "end": t, "text": rng.choice(["", " ", f" w{i}"])})
+        assert list(iter_paragraphs(iter(segs))) == _reference_paragraphs(segs)
+
+
+def test_output_paths_and_formats():
+    assert parse_formats("SRT, txt,srt") == ["srt", "txt"]
+    assert output_paths("/o/a_transcription_small.txt", ["txt", "srt"]) == {
+        "txt": "/o/a_transcription_small.txt", "srt": "/o/a_transcription_small.srt"}
+    assert output_paths("/o/a.vtt", ["vtt", "json"]) == {"vtt": "/o/a.vtt", "json": "/o/a.json"}
+
+
+def test_all_formats_in_one_pass(tmp_path):
+    segs = [{"start": 0.0, "end": 1.5, "text": " Hello"}, {"start": 3661.25, "end": 3662.0, "text": " there\tfriend"}]
+    paths = output_paths(str(tmp_path / "out.txt"), parse_formats("txt,srt,vtt,json,tsv"))
+    write_outputs(iter(segs), paths, "small", "cpu", language="en")
+    assert (tmp_path / "out.txt").read_text().endswith("Hello\n\nthere\tfriend")
+    srt = (tmp_path / "out.srt").read_text()
+    assert "2\n01:01:01,250 --> 01:01:02,000\nthere\tfriend\n" in srt
+    assert (tmp_path / "out.vtt").read_text().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\nHello\n")
+    data = json.loads((tmp_path / "out.json").read_text())
+    assert data["language"] == "en" and [s["text"] for s in data["segments"]] == [" Hello", " there\tfriend"]
+    assert (tmp_path / "out.tsv").read_text().splitlines()[2] == "3661250\t3662000\tthere friend"
+
+
+def test_formats_rendered_from_cache_without_inference(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIBER_CACHE_DIR", str(tmp_path / "cache"))
+
+    class CountingBackend(MockBackend):
+        calls = 0
+
+        def transcribe(self, *a, **kw):
+            CountingBackend.calls += 1
+            return super().transcribe(*a, **kw)
+
+        def capabilities(self):
+            caps = super().capabilities()
+            caps.update(cacheable=True)
+            return caps
+
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"abc")
+    out = str(tmp_path / "a.txt")
+    transcribe_file(str(audio), "small", output_path=out, backend=CountingBackend())
+    calls = CountingBackend.calls
+    res = transcribe_file(str(audio), "small", output_path=out, backend=CountingBackend(), formats="srt,json")
+    assert res["cache_hit"] and CountingBackend.calls == calls
+    assert set(res["output_files"]) == {"srt", "json"}
+    assert "MOCK TRANSCRIPTION" in (tmp_path / "a.srt").read_text()
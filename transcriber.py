@@ -7,11 +7,62 @@ This module prefers to use `whisper` (and `torch`) when available. If not availa
 
 API:
 - detect_device() -> str
-- transcribe_file(audio_path, model_name, language, output_path, progress_callback=None, stop_event=None, mock=False) -> dict
+- transcribe_file(audio_path, model_name, language, output_path, progress_callback=None, stop_event=None, mock=False,
+                  segment_callback=None, ...) -> dict
+- transcribe_clips(audio_paths, model_name, language, outputs=None, max_batch=8, batch_wait=0.05, ...)
+  -> list[dict]
+
+Loaded models are kept in the process-wide registry from `model_cache`, so repeated calls with the
+same model (batch runs, repeated GUI runs) load the checkpoint only once.
+
+The audio is decoded once and transcribed in chunks of `chunk_seconds`. After each chunk
+`progress_callback(fraction, throughput)` is called with the fraction of audio processed and the
+throughput in audio-seconds per wall-second, and `stop_event` is checked so a cancelled run stops
+within about one chunk. A cancelled run returns (and writes) the partial transcription with
+`cancelled=True` in the result. Consecutive chunks overlap by `overlap_seconds` and their segments
+are stitched at the middle of the overlap.
+
+With `streaming=True` the file is never decoded as a whole: a decoder thread fills a small ring
+buffer of windows (see `audio.StreamingDecoder`) while the model works on the previous window, so
+peak memory does not grow with the length of the recording.
+
+With `vad=True` a voice-activity pre-pass (see `vad.py`) removes silence before inference and the
+segment timestamps are mapped back to the original timeline. In streaming mode whole windows without
+speech are skipped. The result reports the skipped audio as `vad_skipped_seconds`.
+
+Segments are collected in a compact `segments.SegmentStore` (flat arrays instead of a dict per
+segment), and the result's `transcription` is a `segments.Transcript`: a handle that renders the
+paragraphs when it is read (`str()`, `==`, `in`) instead of a copy of the whole text.
+
+Finished results are stored in a content-addressed cache (see `result_cache.py`) keyed by the
+audio bytes, model, language and decode options. A repeat request returns the stored segments and
+re-renders the output without loading a model (`cache_hit=True`). Decoded audio is cached as well
+(see `pcm_cache.py`), so a new model or setting on the same file skips decoding. Pass
+`use_cache=False` to bypass both caches.
+Because the cache holds segments, any output format can be produced from a hit.
+
+Without a language ("auto"), the language is identified once on a few short samples from across
+the file (see `language_id.py`) and then fixed for the whole run, instead of the model guessing it
+again on every chunk. The result reports it with its probability.
+
+With `speakers=True` the segments are labelled by speaker (see `speakers.py`): voice features are
+taken from the decoded audio (window by window while streaming) and the finished segments are
+clustered by voice. Outputs then break paragraphs at speaker changes and prefix "Speaker N:".
+
+With `parallel=N` a long file (decoded as a whole, not streamed or resumed) is cut at pauses into
+pieces that N worker processes transcribe side by side (see `parallel.py`); the pieces' segments
+are merged back in order.
+
+Many short clips (voicemail, up to SHORT_CLIP_SECONDS) are better served by `transcribe_clips`:
+each clip fills at most one whisper window, so instead of one model call per clip they are decoded
+in the background and run through the model `max_batch` at a time.
+
+Inference itself is delegated to a backend (see `backends.py`): openai-whisper by default, the
+int8 CTranslate2 engine with backend="faster-whisper", or the mock backend.
 
 Behavior:
-- Attempts to import whisper and torch. If missing and mock=False, raises ImportError with instructions.
-- If mock=True, writes a tiny dummy transcription output and returns a result dict.
+- The whisper backend imports whisper and torch on first use. If missing, raises ImportError with instructions.
+- If mock=True, runs the pipeline with the mock backend (no model) and writes a tiny dummy transcription.
 
 """
 
@@ -19,10 +70,38 @@ from __future__ import annotations
 
 import os
 import json
+import logging
 import time
 import sys
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, Iterable, List, Union
 import threading
+import queue
+from functools import lru_cache
+
+from audio import SAMPLE_RATE, StreamingDecoder, load_audio, probe_duration
+from model_cache import get_registry
+import vad as vad_mod
+from result_cache import ResultCache, hash_file
+from pcm_cache import PCMCache
+from backends import BACKEND_CHOICES, Backend, get_backend
+from checkpoint import Journal, audio_identity, journal_path
+from segments import SegmentStore, Transcript
+from writers import FORMATS, output_paths, parse_formats, write_outputs
+from languages import normalize_language
+from language_id import identify as identify_language
+from speakers import SpeakerFeatures
+from parallel import MIN_PIECE_SECONDS, transcribe_parallel
+from metrics import Trace, emit as emit_metrics, inference_hook, peak_cuda_bytes, peak_rss_bytes, timed_iter
+
+logger = logging.getLogger(__name__)
+
+# Audio seconds per model call. Bounds how long a cancel request waits and how often progress
+# is reported.
+DEFAULT_CHUNK_SECONDS = 30.0
+# Audio shared by consecutive chunks so words cut at a chunk edge are heard whole once.
+DEFAULT_OVERLAP_SECONDS = 2.0
+# Clips up to whisper's window length; transcribe_clips runs these in batches.
+SHORT_CLIP_SECONDS = 30.0
 
 # If running as a bundled app (PyInstaller onefile), make bundled ffmpeg available on PATH
 if getattr(sys, 'frozen', False):
@@ -41,9 +120,11 @@ if getattr(sys, 'frozen', False):
             break
 
 
+@lru_cache(maxsize=None)
 def detect_device() -> str:
     """Detects whether a CUDA-capable GPU is available and returns the device to use ('cuda' or 'cpu').
     Falls back to 'cpu' if torch is not installed or CUDA is not available.
+    The answer is cached: probing imports torch, which is slow, and the hardware does not change.
     """
     try:
         import torch
@@ -54,20 +135,216 @@ def detect_device() -> str:
     return "cpu"
 
 
-def _format_paragraphs_from_segments(segments: list[Dict[str, Any]]) -> str:
-    paragraphs = []
-    current_paragraph = []
-    for i, segment in enumerate(segments):
-        text = segment.get("text", "").strip()
-        if not text:
-            continue
-        current_paragraph.append(text)
-        if len(current_paragraph) >= 3 or (i < len(segments) - 1 and segments[i+1].get("start", 0) - segment.get("end", 0) > 2.0):
-            paragraphs.append(" ".join(current_paragraph))
-            current_paragraph = []
-    if current_paragraph:
-        paragraphs.append(" ".join(current_paragraph))
-    return "\n\n".join(paragraphs)
+class SegmentStitcher:
+    """Merge the segments of overlapping windows into one timeline.
+
+    Consecutive windows share an overlap region; the cut is placed in its middle. A segment from
+    the earlier window is kept if its midpoint falls before the cut, a segment from the later
+    window if its midpoint falls at or after it, so text in the overlap appears exactly once.
+    Segments are held back until the next window arrives, then released as final.
+    """
+
+    def __init__(self, pending: Optional[list[Dict[str, Any]]] = None):
+        self._pending: list[Dict[str, Any]] = list(pending or [])
+
+    @property
+    def pending(self) -> list[Dict[str, Any]]:
+        """Segments held back until the next window (saved in checkpoints)."""
+        return list(self._pending)
+
+    @staticmethod
+    def _mid(seg: Dict[str, Any]) -> float:
+        return (seg.get("start", 0.0) + seg.get("end", 0.0)) / 2.0
+
+    def add(self, window_start: float, overlap: float, segments: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """Add a window's segments (absolute timestamps). Returns the segments that are now final."""
+        cut = window_start + overlap / 2.0
+        final = [seg for seg in self._pending if self._mid(seg) < cut]
+        self._pending = [seg for seg in segments if self._mid(seg) >= cut]
+        return final
+
+    def flush(self) -> list[Dict[str, Any]]:
+        final, self._pending = self._pending, []
+        return final
+
+
+def _iter_array_windows(audio: Any, window: int, overlap: int):
+    """Yield (start_sample, view) windows over an in-memory array, sharing `overlap` samples."""
+    total = len(audio)
+    step = max(1, window - overlap)
+    start = 0
+    while start < total:
+        yield start, audio[start:start + window]
+        if start + window >= total:
+            break
+        start += step
+
+
+def _transcribe_windows(
+    infer: Callable[..., Dict[str, Any]],
+    windows: Iterable[tuple[int, Any]],
+    total_samples: Optional[int],
+    overlap_seconds: float,
+    progress_callback: Optional[Callable[[float, float], None]],
+    stop_event: Optional[threading.Event],
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]] = None,
+    resume: Optional[Dict[str, Any]] = None,
+    on_commit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> tuple[SegmentStore, float, bool]:
+    """Run inference over audio windows and stitch the results.
+
+    `infer(window, initial_prompt=...)` returns {"text", "segments"} with window-relative times.
+    `segment_callback(segments)` receives each batch of segments as soon as it is final.
+    `on_commit(record)` is called after every window with the state a checkpoint needs, and a
+    `resume` state (see `checkpoint.py`) skips the windows it covers and continues from there.
+    Returns (segments with absolute timestamps, audio seconds processed, cancelled).
+    """
+
+    def _emit(final: list[Dict[str, Any]]) -> None:
+        segments.extend(final)
+        if segment_callback and final:
+            segment_callback(final)
+
+    segments = SegmentStore()
+    stitcher = SegmentStitcher(resume["pending"] if resume else None)
+    prompt: Optional[str] = resume["prompt"] if resume else None
+    processed = resume["processed"] if resume else 0
+    resumed_at = processed
+    if resume:
+        _emit(list(resume["segments"]))
+    t0 = time.perf_counter()
+    for start, chunk in windows:
+        if resume and start <= resume["start"]:
+            continue  # already transcribed before the interruption
+        if stop_event is not None and stop_event.is_set():
+            _emit(stitcher.flush())
+            return segments, processed / SAMPLE_RATE, True
+        offset = start / SAMPLE_RATE
+        result = infer(chunk, initial_prompt=prompt)
+        window_segments = []
+        for seg in result.get("segments", []):
+            seg = dict(seg)
+            seg["start"] = seg.get("start", 0.0) + offset
+            seg["end"] = seg.get("end", 0.0) + offset
+            window_segments.append(seg)
+        final = stitcher.add(offset, overlap_seconds if start else 0.0, window_segments)
+        _emit(final)
+        # carry the tail of the text over so the next chunk keeps context across the cut
+        text = result.get("text", "").strip()
+        prompt = text[-200:] if text else None
+        processed = start + len(chunk)
+        if on_commit:
+            on_commit({"start": start, "processed": processed, "segments": final, "pending": stitcher.pending,
+                       "prompt": prompt})
+        if progress_callback:
+            elapsed = time.perf_counter() - t0
+            done = (processed - resumed_at) / SAMPLE_RATE
+            fraction = min(1.0, processed / total_samples) if total_samples else 0.0
+            progress_callback(fraction, done / elapsed if elapsed > 0 else 0.0)
+    _emit(stitcher.flush())
+    if progress_callback and not total_samples:
+        progress_callback(1.0, 0.0)
+    return segments, processed / SAMPLE_RATE, False
+
+
+def _transcribe_chunks(
+    infer: Callable[..., Dict[str, Any]],
+    audio: Any,
+    chunk_seconds: float,
+    progress_callback: Optional[Callable[[float, float], None]],
+    stop_event: Optional[threading.Event],
+    overlap_seconds: float = 0.0,
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]] = None,
+    resume: Optional[Dict[str, Any]] = None,
+    on_commit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> tuple[SegmentStore, float, bool]:
+    """Run the model over an in-memory `audio` array chunk by chunk."""
+    window = max(1, int(chunk_seconds * SAMPLE_RATE))
+    overlap = min(int(overlap_seconds * SAMPLE_RATE), window // 2)
+    return _transcribe_windows(
+        infer, _iter_array_windows(audio, window, overlap), len(audio), overlap / SAMPLE_RATE,
+        progress_callback, stop_event, segment_callback, resume, on_commit,
+    )
+
+
+def _feed_features(windows: Iterable[tuple[int, Any]], features: SpeakerFeatures, trace: Optional[Trace]):
+    """Pass windows through, adding each to the speaker features on the way."""
+    for start, chunk in windows:
+        if trace is None:
+            features.add(start, chunk)
+        else:
+            with trace.stage("speakers"):
+                features.add(start, chunk)
+        yield start, chunk
+
+
+def _transcribe_streaming(
+    infer: Callable[..., Dict[str, Any]],
+    audio_path: str,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    progress_callback: Optional[Callable[[float, float], None]],
+    stop_event: Optional[threading.Event],
+    vad: bool = False,
+    vad_stats: Optional[Dict[str, float]] = None,
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]] = None,
+    resume: Optional[Dict[str, Any]] = None,
+    on_commit: Optional[Callable[[Dict[str, Any]], None]] = None,
+    samples: Any = None,
+    trace: Optional[Trace] = None,
+    features: Optional[SpeakerFeatures] = None,
+) -> tuple[SegmentStore, float, bool]:
+    """Decode and transcribe at the same time, holding only a few windows in memory.
+
+    If the decoded audio is already available as `samples` (a memory-mapped PCM cache entry),
+    windows are views into it instead of being decoded again.
+
+    With `vad`, windows without speech are not sent to the model; the skipped audio (excluding
+    overlap) is accumulated in `vad_stats["skipped_seconds"]`. Windows covered by `resume` are
+    still decoded (decoding is cheap next to inference) but skip VAD and the model.
+
+    With a `trace`, time spent waiting for decoded windows counts as "decode" and VAD as "vad".
+    Speaker `features`, if given, are fed every decoded window (resumed ones included).
+    """
+    if samples is not None:
+        window = max(1, int(chunk_seconds * SAMPLE_RATE))
+        overlap = min(int(overlap_seconds * SAMPLE_RATE), window // 2)
+        duration = len(samples) / SAMPLE_RATE
+        windows = _iter_array_windows(samples, window, overlap)
+    else:
+        duration = probe_duration(audio_path)
+        decoder = StreamingDecoder(audio_path, chunk_seconds, overlap_seconds)
+        overlap = decoder.overlap
+        windows = iter(decoder)
+    source = windows
+    if trace is not None:
+        windows = timed_iter(source, trace, "decode")
+    if features is not None:
+        windows = _feed_features(windows, features, trace)
+
+    def _has_speech(chunk: Any) -> bool:
+        if trace is None:
+            return vad_mod.has_speech(chunk)
+        with trace.stage("vad"):
+            return vad_mod.has_speech(chunk)
+
+    def _speech_windows():
+        for start, chunk in windows:
+            if resume and start <= resume["start"]:
+                continue
+            if _has_speech(chunk):
+                yield start, chunk
+            elif vad_stats is not None:
+                vad_stats["skipped_seconds"] = vad_stats.get("skipped_seconds", 0.0) + (len(chunk) - overlap) / SAMPLE_RATE
+
+    try:
+        return _transcribe_windows(
+            infer, _speech_windows() if vad else windows, int(duration * SAMPLE_RATE) if duration else None,
+            overlap / SAMPLE_RATE, progress_callback, stop_event, segment_callback, resume, on_commit,
+        )
+    finally:
+        windows.close()
+        source.close()
 
 
 def transcribe_file(
@@ -75,87 +352,627 @@ def transcribe_file(
     model_name: str = "large",
     language: Optional[str] = None,
     output_path: Optional[str] = None,
-    progress_callback: Optional[Callable[[float], None]] = None,
+    progress_callback: Optional[Callable[[float, float], None]] = None,
     stop_event: Optional[threading.Event] = None,
     mock: bool = False,
+    chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+    streaming: bool = False,
+    vad: bool = False,
+    use_cache: bool = True,
+    backend: Union[str, Backend, None] = None,
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]] = None,
+    formats: Union[str, Iterable[str], None] = None,
+    resume: bool = False,
+    samples: Any = None,
+    language_detection: Optional[Dict[str, Any]] = None,
+    speakers: bool = False,
+    parallel: int = 0,
+    tuned_chunk_seconds: Optional[float] = None,
 ) -> Dict[str, Any]:
     """Transcribe a single audio file.
 
-    Returns a result dict with keys: `model`, `device`, `transcription`, `output_file`.
+    Returns a result dict with keys: `model`, `device`, `transcription`, `output_file`,
+    `output_files` ({format: path}), `duration` (audio seconds), `processed_seconds`, `cancelled`,
+    `vad_skipped_seconds`, `cache_hit`, `timings` (seconds per stage: load, decode, vad,
+    inference, write, hash when the file is hashed for the caches, and total) and `rtf` (wall seconds per audio second transcribed),
+    `language`, `language_probability` / `language_ranking` when the language was detected, and
+    `speakers` (number of speakers found with `speakers=True`, else 0).
+
+    `language` is a code or name ("he", "Hebrew"); None or "auto" detects it before transcribing
+    unless `language_detection` (a detection from `language_id`, e.g. made by a batch run while
+    grouping files) is passed in.
+
+    Every run, including failed ones, is also reported to the metrics sinks (see `metrics.py`).
+
+    `formats` lists the files to write next to `output_path` (any of txt, srt, vtt, json, tsv;
+    default txt). They are all written in one pass over the segments, see `writers.py`.
+
+    While writing to `output_path`, every processed window is checkpointed to
+    `<output>.journal` (see `checkpoint.py`). With `resume=True` a matching journal from an
+    interrupted or cancelled run is replayed and only the remaining audio is transcribed; the
+    result reports the restored audio as `resumed_seconds`.
+
+    `backend` selects the inference engine by name ("whisper", "faster-whisper", "mock", "auto") or
+    takes a `backends.Backend` instance (the benchmark harness plugs in a stand-in this way).
+    `mock=True` is shorthand for backend="mock".
+
+    `segment_callback(segments)` is called with each batch of segments (absolute timestamps) as
+    soon as it is final, so callers can show or stream text before the whole file is done.
+
+    `samples` are the already decoded 16 kHz mono samples of `audio_path`; callers that
+    transcribe one file several times (see `compare.py`) decode it once and pass them here.
+
+    `parallel` > 1 transcribes a decoded file of a few minutes or more on that many worker
+    processes (see `parallel.py`). It is ignored with `streaming` and when resuming a journal.
+
+    `tuned_chunk_seconds` (from `tuning.plan`) replaces `chunk_seconds` as the length of each
+    model call. The result cache and the journal stay keyed on `chunk_seconds`, so a cached result
+    or an interrupted run is still found after the host is recalibrated.
     """
+    trace = Trace(model=model_name)
+    try:
+        result = _transcribe_file(
+            trace, audio_path, model_name, normalize_language(language), output_path, progress_callback, stop_event,
+            mock, chunk_seconds, overlap_seconds, streaming, vad, use_cache, backend, segment_callback, formats,
+            resume, samples, language_detection, speakers, parallel, tuned_chunk_seconds,
+        )
+    except BaseException as e:
+        _report(trace, audio_path, None, e)
+        raise
+    _report(trace, audio_path, result)
+    return result
+
+
+def _load_model(engine: Backend, caps: Dict[str, Any], model_name: str, trace: Trace) -> tuple[Any, str, Any]:
+    """Load `model_name` (or reuse the resident one). Returns (model, device, inference lock or None)."""
+    device = detect_device() if "cuda" in caps["devices"] else "cpu"
+    registry = get_registry()
+    trace.cache("model", registry.contains(model_name, device, engine.dtype(device)))
+    try:
+        with trace.stage("load"):
+            model = registry.load(model_name, device, engine.dtype(device), loader=lambda: engine.load(model_name, device))
+    except ImportError:
+        raise
+    except Exception:
+        if device != "cuda":
+            raise
+        # best-effort, continue on CPU
+        device = "cpu"
+        with trace.stage("load"):
+            model = registry.load(model_name, device, engine.dtype(device), loader=lambda: engine.load(model_name, device))
+    trace.fields["device"] = device
+
+    # Several callers (GUI queue, server) may share one resident model; serialise calls into
+    # models that cannot run concurrently.
+    model_lock = None if caps["thread_safe"] else registry.inference_lock(model_name, device, engine.dtype(device))
+    return model, device, model_lock
+
+
+def _result_cache() -> Optional[ResultCache]:
+    """The result cache, or None when its directory cannot be created (e.g. a read-only home):
+    the cache is an optimisation, so the run goes ahead uncached."""
+    try:
+        return ResultCache()
+    except OSError as e:
+        logger.warning("Result cache unavailable, transcribing without it: %s", e)
+        return None
+
+
+def _report(trace: Trace, audio_path: str, result: Optional[Dict[str, Any]], error: Optional[BaseException] = None) -> None:
+    """Add the timings to `result` and emit the run's metrics record."""
+    timings = trace.timings()
+    res = result or {}
+    transcribed = res.get("processed_seconds", 0.0) - res.get("resumed_seconds", 0.0)
+    rtf = round(timings["total"] / transcribed, 4) if transcribed > 0 and not res.get("cache_hit") else None
+    if result is not None:
+        result.update(timings=timings, rtf=rtf)
+    if error is not None:
+        status = "failed"
+    else:
+        status = "cached" if res["cache_hit"] else "cancelled" if res["cancelled"] else "done"
+    emit_metrics({
+        "ts": round(time.time(), 3), "audio": audio_path, **trace.fields, "status": status,
+        "error": (str(error) or type(error).__name__) if error is not None else None,
+        "duration": res.get("duration"), "processed_seconds": res.get("processed_seconds"), "rtf": rtf,
+        "timings": timings, "windows": trace.counters.get("windows", 0), "cache": trace.caches,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_cuda_bytes": peak_cuda_bytes() if trace.fields.get("device") == "cuda" else None,
+    })
+
+
+def _transcribe_file(
+    trace: Trace,
+    audio_path: str,
+    model_name: str,
+    language: Optional[str],
+    output_path: Optional[str],
+    progress_callback: Optional[Callable[[float, float], None]],
+    stop_event: Optional[threading.Event],
+    mock: bool,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    streaming: bool,
+    vad: bool,
+    use_cache: bool,
+    backend: Union[str, Backend, None],
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]],
+    formats: Union[str, Iterable[str], None],
+    resume: bool,
+    samples: Any,
+    detection: Optional[Dict[str, Any]],
+    speakers: bool,
+    parallel: int,
+    tuned_chunk_seconds: Optional[float],
+) -> Dict[str, Any]:
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-    device = detect_device()
+    engine = get_backend("mock" if mock else backend)
+    caps = engine.capabilities()
+    trace.fields.update(backend=engine.name, device="cpu")
+    paths = output_paths(output_path, parse_formats(formats)) if output_path else {}
+    main_output = paths.get("txt", next(iter(paths.values()), None))
+    # probing for CUDA imports torch, so it is done only once a model is actually needed
+    device = "cpu"
+    result: Dict[str, Any] = {"model": model_name, "device": device, "transcription": "", "output_file": main_output,
+                              "output_files": paths, "duration": 0.0, "processed_seconds": 0.0, "cancelled": False,
+                              "vad_skipped_seconds": 0.0, "cache_hit": False, "resumed_seconds": 0.0,
+                              "language": language, "language_probability": None, "language_ranking": None,
+                              "speakers": 0}
+
+    # A repeat request for the same audio and settings is served from the result cache
+    cache: Optional[ResultCache] = None
+    cache_key = ""
+    audio_hash: Optional[str] = None
+    if use_cache and caps["cacheable"]:
+        cache = _result_cache()
+    if cache is not None:
+        cache_options = {"backend": engine.name, "chunk_seconds": chunk_seconds, "overlap_seconds": overlap_seconds,
+                         "streaming": streaming, "vad": vad}
+        if speakers:
+            cache_options["speakers"] = True  # only when set, so entries made before it still match
+        if parallel > 1 and not streaming:
+            cache_options["parallel"] = True  # pieces are cut differently from chunks
+        with trace.stage("hash"):
+            audio_hash = hash_file(audio_path)
+        cache_key = ResultCache.key(audio_hash, model_name, language, cache_options)
+        entry = cache.get(cache_key)
+        trace.cache("result", entry is not None)
+        if entry is not None:
+            if not language and entry.get("language"):
+                result.update(language=entry["language"], language_probability=entry.get("language_probability"),
+                              language_ranking=entry.get("language_ranking"))
+            if paths:
+                with trace.stage("write"):
+                    write_outputs(entry["segments"], paths, model_name, entry.get("device", device), result["language"],
+                                  language_probability=result["language_probability"])
+            if segment_callback and entry["segments"]:
+                segment_callback(entry["segments"])
+            if progress_callback:
+                progress_callback(1.0, 0.0)
+            result.update(device=entry.get("device", device), transcription=Transcript(entry["segments"]),
+                          duration=entry.get("duration", 0.0), processed_seconds=entry.get("duration", 0.0),
+                          vad_skipped_seconds=entry.get("vad_skipped_seconds", 0.0), cache_hit=True,
+                          speakers=entry.get("speakers", 0))
+            return result
 
-    if mock:
-        # Produce a small deterministic fake transcription for tests and CI
-        text = f"[MOCK TRANSCRIPTION for {os.path.basename(audio_path)} with model={model_name} language={language}]"
-        time.sleep(0.3)  # simulate work
-        formatted = text
-        if output_path:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(f"Model: {model_name}\nDevice: {device}\n\n")
-                f.write(formatted)
-        return {"model": model_name, "device": device, "transcription": formatted, "output_file": output_path}
+    model, device, model_lock = _load_model(engine, caps, model_name, trace)
 
-    # Real mode - try to use whisper (and torch)
+    hook = inference_hook()
+
+    def infer(window: Any, initial_prompt: Optional[str] = None) -> Dict[str, Any]:
+        trace.count("windows")
+        with trace.stage("inference"), hook():
+            if model_lock is None:
+                return engine.transcribe(model, window, language=language, initial_prompt=initial_prompt, source=audio_path)
+            with model_lock:
+                return engine.transcribe(model, window, language=language, initial_prompt=initial_prompt, source=audio_path)
+
+    if streaming and not caps["requires_audio"] and probe_duration(audio_path) is None:
+        streaming = False  # mock run on a file that is not real audio
+
+    # Decoded audio is cached by content hash, so transcribing the same file again (e.g. with
+    # another model) maps the stored PCM instead of running ffmpeg
+    pcm: Optional[PCMCache] = None
+    if use_cache and caps["requires_audio"] and samples is None:
+        pcm = PCMCache()
+        if pcm.enabled:
+            if audio_hash is None:
+                with trace.stage("hash"):
+                    audio_hash = hash_file(audio_path)
+        else:
+            pcm = None
+
+    # Identify the language once, on a few short clips, and fix it for every chunk; left to
+    # itself the model would guess again per chunk and could switch language mid-file
+    requested_language = language
+    if not language and detection is None:
+        if model_name.endswith(".en"):
+            detection = {"language": "en", "probability": 1.0, "ranking": [["en", 1.0]]}
+        elif caps["language_detection"]:
+            def detect(clip: Any) -> Dict[str, float]:
+                if model_lock is None:
+                    return engine.detect_language(model, clip, source=audio_path)
+                with model_lock:
+                    return engine.detect_language(model, clip, source=audio_path)
+
+            with trace.stage("language"):
+                cached = samples if samples is not None else pcm.get(audio_hash) if pcm is not None else None
+                detection = identify_language(detect, audio_path, caps["requires_audio"], cached)
+    if not language and detection:
+        language = detection["language"]
+        result.update(language=language, language_probability=detection["probability"],
+                      language_ranking=detection["ranking"])
+
+    # worker processes load their own model, so they get what they need to do so
+    split: Optional[Dict[str, Any]] = None
+    if parallel > 1 and not streaming:
+        split = {"model_name": model_name, "language": language, "workers": parallel, "source": audio_path,
+                 "backend": backend if isinstance(backend, Backend) else engine.name}
+
+    # Transcribe chunk by chunk so we can report progress and honour stop_event, checkpointing
+    # every window next to the output so an interrupted run can be resumed.
+    journal: Optional[Journal] = None
+    state: Optional[Dict[str, Any]] = None
+    if main_output:
+        journal, state = Journal.open(journal_path(main_output), {
+            "audio": audio_identity(audio_path), "model": model_name, "language": requested_language,
+            "backend": engine.name,
+            "chunk_seconds": chunk_seconds, "overlap_seconds": overlap_seconds, "streaming": streaming, "vad": vad,
+        }, resume=resume)
+        if journal.discarded:
+            trace.fields["resume_discarded"] = journal.discarded
+    features = SpeakerFeatures() if speakers else None
     try:
-        # Try importing whisper; support potential alternate package names
+        segments, processed, cancelled, duration, skipped = _run_windows(
+            infer, audio_path, caps, tuned_chunk_seconds or chunk_seconds, overlap_seconds, streaming, vad,
+            progress_callback, stop_event, segment_callback, state, journal, trace, pcm, audio_hash, samples,
+            features, split,
+        )
+    except BaseException:
+        if journal is not None:
+            journal.close()
+        raise
+    if journal is not None:
+        journal.close(remove=not cancelled)
+    result["resumed_seconds"] = state["processed"] / SAMPLE_RATE if state else 0.0
+    if features is not None:
+        with trace.stage("speakers"):
+            result["speakers"] = features.label(segments)
+
+    # Save (partial output on cancel, so the work done so far is not lost)
+    if paths:
+        note = f"Cancelled after {processed:.0f}s of {duration:.0f}s" if cancelled else None
+        with trace.stage("write"):
+            write_outputs(segments, paths, model_name, device, language, note=note, cancelled=cancelled,
+                          language_probability=result["language_probability"])
+
+    if cache is not None and not cancelled:
         try:
-            import whisper
-        except Exception:
-            try:
-                import openai_whisper as whisper  # some installs may alias differently
-            except Exception:
-                whisper = None
+            cache.put(cache_key, {
+                "model": model_name, "device": device, "duration": duration, "vad_skipped_seconds": skipped,
+                "language": language, "language_probability": result["language_probability"],
+                "language_ranking": result["language_ranking"], "speakers": result["speakers"],
+                "segments": [{"start": seg.get("start", 0.0), "end": seg.get("end", 0.0), "text": seg.get("text", ""),
+                              **({"speaker": seg["speaker"]} if "speaker" in seg else {})}
+                             for seg in segments],
+            })
+        except OSError:
+            pass  # the cache is an optimisation; a full or read-only disk must not fail the run
+
+    result.update(device=device, transcription=Transcript(segments), duration=duration, processed_seconds=processed,
+                  cancelled=cancelled, vad_skipped_seconds=skipped)
+    return result
+
+
+def _run_windows(
+    infer: Callable[..., Dict[str, Any]],
+    audio_path: str,
+    caps: Dict[str, Any],
+    chunk_seconds: float,
+    overlap_seconds: float,
+    streaming: bool,
+    vad: bool,
+    progress_callback: Optional[Callable[[float, float], None]],
+    stop_event: Optional[threading.Event],
+    segment_callback: Optional[Callable[[list[Dict[str, Any]]], None]],
+    state: Optional[Dict[str, Any]],
+    journal: Optional[Journal],
+    trace: Trace,
+    pcm: Optional[PCMCache] = None,
+    audio_hash: Optional[str] = None,
+    samples: Any = None,
+    features: Optional[SpeakerFeatures] = None,
+    split: Optional[Dict[str, Any]] = None,
+) -> tuple[SegmentStore, float, bool, float, float]:
+    """Decode and transcribe `audio_path` (streaming or whole-file, with optional VAD).
+
+    In streaming mode decoding runs concurrently with inference and only a few windows are ever
+    held in memory; otherwise the file is decoded once up front. With `pcm` the decoded audio is
+    read from (and, for whole-file decodes, stored in) the PCM cache; pre-decoded `samples` skip
+    decoding altogether. Speaker `features` are fed the decoded audio (before VAD).
+    `split` (options for `parallel.transcribe_parallel`) runs a long decoded file on a process pool
+    instead, without per-window checkpoints; a resumed run stays sequential.
+    Returns (segments, processed seconds, cancelled, duration, VAD-skipped seconds).
+    """
+    skipped = 0.0
+    if streaming:
+        vad_stats: Dict[str, float] = {"skipped_seconds": state["skipped"]} if state else {}
+
+        def commit(record: Dict[str, Any]) -> None:
+            journal.commit({**record, "skipped": vad_stats.get("skipped_seconds", 0.0)})
 
+        if samples is None and pcm is not None:
+            samples = pcm.get(audio_hash)
+            trace.cache("pcm", samples is not None)
+        segments, processed, cancelled = _transcribe_streaming(
+            infer, audio_path, chunk_seconds, overlap_seconds, progress_callback, stop_event,
+            vad=vad, vad_stats=vad_stats, segment_callback=segment_callback,
+            resume=state, on_commit=commit if journal else None, samples=samples, trace=trace,
+            features=features,
+        )
+        duration = processed if not cancelled else (probe_duration(audio_path) or processed)
+        skipped = vad_stats.get("skipped_seconds", 0.0)
+    else:
         try:
-            import torch
+            with trace.stage("decode"):
+                if samples is not None:
+                    audio = samples
+                elif pcm is not None:
+                    audio = pcm.get(audio_hash)
+                    trace.cache("pcm", audio is not None)
+                    if audio is None:
+                        audio = pcm.load(audio_path, audio_hash)
+                else:
+                    audio = load_audio(audio_path)
+            duration = len(audio) / SAMPLE_RATE
         except Exception:
-            torch = None
-
-        if whisper is None or torch is None:
-            raise ImportError("missing")
-    except ImportError as e:
-        # Build helpful diagnostics so users can install into the same Python environment
-        exe = sys.executable or "python"
-        msg_lines = [
-            "whisper and/or torch not available in this Python environment.",
-            "Details:",
-            f"  sys.executable: {exe}",
-            f"  sys.path: {sys.path}",
-            "Recommendation:",
-            f"  Install inside this Python: {exe} -m pip install -U openai-whisper",
-            "  For torch, follow the official install instructions: https://pytorch.org/ (choose correct CUDA/cpu build).",
-            "If you are running the GUI or a packaged exe, ensure the runtime includes these packages or use mock mode.",
-            "To run a quick test without models, call transcribe_file(..., mock=True).",
-        ]
-        raise ImportError("\n".join(msg_lines)) from e
-
-    # Load model
-    model = whisper.load_model(model_name)
+            if caps["requires_audio"]:
+                raise
+            # the mock backend also runs on files that are not real audio (tests, CI), and
+            # without numpy installed: one second of "silence" as a plain list is enough for it
+            audio = [0.0] * SAMPLE_RATE
+            duration = 0.0
+        if features is not None and hasattr(audio, "dtype"):
+            with trace.stage("speakers"):
+                features.add(0, audio)
+        speech_map = None
+        on_segments = segment_callback
+        if vad and hasattr(audio, "dtype"):  # not on the mock's placeholder list
+            with trace.stage("vad"):
+                audio, speech_map = vad_mod.SpeechMap.from_audio(audio, vad_mod.detect_speech(audio))
+            skipped = speech_map.skipped_seconds
+            if segment_callback:
+                on_segments = lambda segs: segment_callback(speech_map.map_segments(segs))  # noqa: E731
+        if split and not state and hasattr(audio, "dtype") and len(audio) >= 2 * MIN_PIECE_SECONDS * SAMPLE_RATE:
+            with trace.stage("inference"):
+                segments, processed, cancelled = transcribe_parallel(
+                    audio, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds,
+                    progress_callback=progress_callback, stop_event=stop_event, segment_callback=on_segments,
+                    on_windows=lambda n: trace.count("windows", n), **split,
+                )
+        else:
+            segments, processed, cancelled = _transcribe_chunks(
+                infer, audio, chunk_seconds, progress_callback, stop_event, overlap_seconds, on_segments,
+                resume=state, on_commit=journal.commit if journal else None,
+            )
+        if speech_map is not None:
+            segments.map_times(speech_map.to_original)
+            processed = speech_map.to_original(processed) if cancelled else duration
+        del audio
+    return segments, processed, cancelled, duration, skipped
+
+
+def transcribe_clips(
+    audio_paths: List[str],
+    model_name: str = "large",
+    language: Optional[str] = None,
+    outputs: Optional[List[Optional[str]]] = None,
+    mock: bool = False,
+    backend: Union[str, Backend, None] = None,
+    max_batch: int = 8,
+    batch_wait: float = 0.05,
+    use_cache: bool = True,
+    formats: Union[str, Iterable[str], None] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    segment_callback: Optional[Callable[[int, list[Dict[str, Any]]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Transcribe many short clips, up to `max_batch` of them per model call.
+
+    A background thread decodes the clips while the previous batch runs. A batch starts once
+    `max_batch` clips are decoded or `batch_wait` seconds after its first clip, whichever comes
+    first, and goes to `Backend.transcribe_batch` (whisper runs the whole batch through the encoder
+    at once and decodes the clips together). Each clip's segments are written to its own output
+    (`outputs[i]`, a path as for transcribe_file, in `formats`). Clips longer than SHORT_CLIP_SECONDS are passed on to
+    `transcribe_file`.
+
+    Returns one result per clip, in order, with the keys of `transcribe_file`'s result plus
+    `batch_size` and `error` (the message if this clip failed; the other clips are unaffected).
+    `on_result(index, result)` is called as each clip finishes, after `segment_callback(index,
+    segments)` if given. Clips not yet started when
+    `stop_event` is set come back with `cancelled=True`.
+
+    Results are cached under their own key: a batched clip is one segment without inner timestamps.
+    """
+    language = normalize_language(language)
+    engine = get_backend("mock" if mock else backend)
+    caps = engine.capabilities()
+    fmts = parse_formats(formats)
+    outputs = list(outputs or [None] * len(audio_paths))
+    traces = [Trace(model=model_name, backend=engine.name, device="cpu") for _ in audio_paths]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(audio_paths)
+    max_batch = max(1, int(max_batch))
+
+    def new_result(i: int) -> Dict[str, Any]:
+        paths = output_paths(outputs[i], fmts) if outputs[i] else {}
+        return {"model": model_name, "device": "cpu", "transcription": "",
+                "output_file": paths.get("txt", next(iter(paths.values()), None)), "output_files": paths,
+                "duration": 0.0, "processed_seconds": 0.0, "cancelled": False, "vad_skipped_seconds": 0.0,
+                "cache_hit": False, "resumed_seconds": 0.0, "language": language, "language_probability": None,
+                "language_ranking": None, "speakers": 0, "batch_size": 0, "error": None}
+
+    def finish(i: int, result: Dict[str, Any], error: Optional[BaseException] = None) -> None:
+        _report(traces[i], audio_paths[i], None if error else result, error)
+        if error is not None:
+            result["error"] = str(error) or type(error).__name__
+        results[i] = result
+        if on_result:
+            on_result(i, result)
+
+    # Clips already transcribed with these settings are served from the result cache
+    cache = _result_cache() if use_cache and caps["cacheable"] else None
+    keys: Dict[int, str] = {}
+    todo: List[int] = []
+    for i, path in enumerate(audio_paths):
+        result = new_result(i)
+        if not os.path.exists(path):
+            finish(i, result, FileNotFoundError(f"Audio file not found: {path}"))
+            continue
+        if cache is not None:
+            with traces[i].stage("hash"):
+                keys[i] = ResultCache.key(hash_file(path), model_name, language, {"backend": engine.name, "batched": True})
+            entry = cache.get(keys[i])
+            traces[i].cache("result", entry is not None)
+            if entry is not None:
+                result.update(device=entry.get("device", "cpu"),
+                              transcription=Transcript(entry["segments"]),
+                              duration=entry.get("duration", 0.0), processed_seconds=entry.get("duration", 0.0),
+                              cache_hit=True, language=entry.get("language") or language,
+                              language_probability=entry.get("language_probability"))
+                if result["output_files"]:
+                    with traces[i].stage("write"):
+                        write_outputs(entry["segments"], result["output_files"], model_name, result["device"],
+                                      result["language"], language_probability=result["language_probability"])
+                if segment_callback and entry["segments"]:
+                    segment_callback(i, entry["segments"])
+                finish(i, result)
+                continue
+        todo.append(i)
+    if not todo:
+        return results
+
     try:
-        # move model to device if possible
-        if device == "cuda":
-            model.to("cuda")
-    except Exception:
-        # best-effort, continue on CPU
-        device = "cpu"
+        model, device, model_lock = _load_model(engine, caps, model_name, traces[todo[0]])
+    except Exception as e:
+        for i in todo:
+            finish(i, new_result(i), e)
+        return results
+    for i in todo:
+        traces[i].fields["device"] = device
 
-    # Transcribe
-    # whisper.transcribe will do its own progress printing; we call it and then postprocess
-    result = model.transcribe(audio_path, language=language, fp16=False)
-    segments = result.get("segments", [])
-    formatted = _format_paragraphs_from_segments(segments)
+    decoded: "queue.Queue" = queue.Queue(maxsize=2 * max_batch)
 
-    # Save
-    if output_path:
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(f"Model: {model_name}\nDevice: {device}\n\n")
-            f.write(formatted)
+    def decode_all() -> None:
+        for i in todo:
+            if stop_event is not None and stop_event.is_set():
+                break
+            audio, error = None, None
+            with traces[i].stage("decode"):
+                try:
+                    audio = load_audio(audio_paths[i])
+                except Exception as e:
+                    if caps["requires_audio"]:
+                        error = e
+                    else:
+                        audio = [0.0] * SAMPLE_RATE  # mock backend on a file that is not real audio
+            decoded.put((i, audio, error))
+        decoded.put(None)
+
+    threading.Thread(target=decode_all, name="clip-decoder", daemon=True).start()
+    hook = inference_hook()
+
+    def run(batch: List[tuple]) -> None:
+        clips = []
+        for i, audio, error in batch:
+            if error is not None:
+                finish(i, new_result(i), error)
+            elif len(audio) > SHORT_CLIP_SECONDS * SAMPLE_RATE:
+                # not a short clip after all: chunked like any other file, on the audio already decoded
+                on_segments = (lambda segs, i=i: segment_callback(i, segs)) if segment_callback else None
+                try:
+                    result = transcribe_file(audio_paths[i], model_name, language, outputs[i], stop_event=stop_event,
+                                             backend=engine, use_cache=use_cache, formats=fmts, samples=audio,
+                                             segment_callback=on_segments)
+                    results[i] = {**new_result(i), **result, "batch_size": 1}
+                except Exception as e:
+                    results[i] = {**new_result(i), "error": str(e) or type(e).__name__}
+                if on_result:
+                    on_result(i, results[i])
+            else:
+                clips.append((i, audio))
+        if not clips:
+            return
+        t0 = time.perf_counter()
+        try:
+            with hook():
+                audio, sources = [a for _, a in clips], [audio_paths[i] for i, _ in clips]
+                if model_lock is None:
+                    outs = engine.transcribe_batch(model, audio, language, sources)
+                else:
+                    with model_lock:
+                        outs = engine.transcribe_batch(model, audio, language, sources)
+        except Exception as e:
+            for i, _ in clips:
+                finish(i, new_result(i), e)
+            return
+        share = (time.perf_counter() - t0) / len(clips)
+        for (i, audio), out in zip(clips, outs):
+            trace = traces[i]
+            trace.add("inference", share)
+            trace.count("windows")
+            segments = out.get("segments", [])
+            duration = len(audio) / SAMPLE_RATE if hasattr(audio, "dtype") else 0.0
+            result = new_result(i)
+            result.update(device=device, transcription=Transcript(segments), duration=duration,
+                          processed_seconds=duration, batch_size=len(clips), language=out.get("language") or language,
+                          language_probability=out.get("language_probability"))
+            try:
+                if result["output_files"]:
+                    with trace.stage("write"):
+                        write_outputs(segments, result["output_files"], model_name, device, result["language"],
+                                      language_probability=result["language_probability"])
+            except OSError as e:
+                finish(i, result, e)
+                continue
+            if cache is not None:
+                try:
+                    cache.put(keys[i], {"model": model_name, "device": device, "duration": duration,
+                                        "language": result["language"],
+                                        "language_probability": result["language_probability"],
+                                        "segments": segments})
+                except OSError:
+                    pass
+            if segment_callback and segments:
+                segment_callback(i, segments)
+            finish(i, result)
+
+    while True:
+        item = decoded.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = time.perf_counter() + batch_wait
+        while len(batch) < max_batch:
+            try:
+                item = decoded.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is None:
+                decoded.put(None)  # seen again by the outer loop
+                break
+            batch.append(item)
+        if stop_event is not None and stop_event.is_set():
+            continue  # drain what was decoded so the decoder thread can finish
+        run(batch)
 
-    return {"model": model_name, "device": device, "transcription": formatted, "output_file": output_path}
+    for i in todo:
+        if results[i] is None:
+            result = new_result(i)
+            result["cancelled"] = True
+            finish(i, result)
+    return results
 
 
 if __name__ == "__main__":
@@ -168,8 +985,19 @@ if __name__ == "__main__":
     parser.add_argument("--lang", default=None)
     parser.add_argument("--out", default=None)
     parser.add_argument("--mock", action="store_true", help="Run in mock mode (no model required)")
+    parser.add_argument("--backend", default="whisper", choices=BACKEND_CHOICES, help="Inference engine")
+    parser.add_argument("--streaming", action="store_true", help="Decode and transcribe concurrently with flat memory use")
+    parser.add_argument("--vad", action="store_true", help="Skip silence with a voice-activity pre-pass")
+    parser.add_argument("--speakers", action="store_true", help="Label segments by speaker")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--formats", default="txt", help=f"Comma-separated output formats ({','.join(FORMATS)})")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint journal")
 
     args = parser.parse_args()
     out = args.out or os.path.splitext(args.audio_file)[0] + "_transcription_" + args.model + ".txt"
-    res = transcribe_file(args.audio_file, model_name=args.model, language=args.lang, output_path=out, mock=args.mock)
-    print("Wrote:", res.get("output_file"))
+    res = transcribe_file(args.audio_file, model_name=args.model, language=args.lang, output_path=out, mock=args.mock,
+                          streaming=args.streaming, vad=args.vad, use_cache=not args.no_cache, backend=args.backend,
+                          formats=args.formats, resume=args.resume, speakers=args.speakers)
+    print("Wrote:", ", ".join(res["output_files"].values()), "(cached)" if res.get("cache_hit") else "")
+    if args.vad:
+        print(f"VAD skipped {res.get('vad_skipped_seconds', 0.0):.1f}s of {res.get('duration', 0.0):.1f}s")
@@ -1,8 +1,19 @@
 """Launcher script for the Transcriber GUI.
 
 Used as the PyInstaller entrypoint or for direct `python transcriber_gui.py` runs.
+Pass --profile-startup to print import/startup phase timings and exit once the window is shown.
 """
-from ui.main_window import main
+import time
+
+_T0 = time.perf_counter()
+
+from startup_profile import profile
+
+profile.start(_T0)
+with profile.phase("import PyQt6"):
+    import PyQt6.QtWidgets  # noqa: F401
+with profile.phase("import ui.main_window"):
+    from ui.main_window import main
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,314 @@
+"""
+tuning.py
+
+Hardware-aware settings for CPU hosts.
+
+Left alone, torch (and CTranslate2) use one thread per core in every process, so N batch workers
+on an N-core machine run N*N threads and spend their time switching. `plan()` looks at the cores,
+the available memory and the number of jobs that will run at once, and returns:
+
+- threads: intra-op threads per job (cores / concurrent jobs), interop_threads: 1 (whisper's
+  graph is sequential; more only adds idle threads)
+- chunk_seconds: audio per model call. With a calibration on record, chunks are sized so one call
+  takes about TARGET_CHUNK_WALL_SECONDS (long enough to amortise per-call overhead, short enough
+  for prompt cancellation and progress), in multiples of whisper's 30 s window; otherwise None
+  (keep the default)
+- model_name: the requested model, or with `downgrade=True` the largest smaller one whose
+  estimated memory fits (each worker process holds its own copy); warnings explain either case
+
+`apply()` puts the thread counts into effect for this process and, through the environment,
+for worker processes started afterwards (TRANSCRIBER_CPU_THREADS and TRANSCRIBER_INTEROP_THREADS,
+plus OMP_NUM_THREADS/MKL_NUM_THREADS). A TRANSCRIBER_CPU_THREADS set before startup wins over the
+computed value.
+
+`calibrate()` times a short clip with a few thread counts and stores the fastest, with its
+real-time factor and chunk size, under "tuning" in the config JSON (`transcriber_config.json`
+in `app_paths.config_dir()`), keyed by backend, model and device. Later plans use it.
+
+API:
+- cpu_cores() -> int
+- plan(model_name, workers=1, backend="whisper", device="cpu", shared_model=False, downgrade=False, threads=None) -> TuningPlan
+- apply(plan)
+- calibrate(model_name, backend="whisper", device="cpu", audio_path=None, clip_seconds=30.0, candidates=None, language=None) -> dict
+- load_calibration(model_name, backend="whisper", device="cpu") -> dict | None
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app_paths import config_dir
+from model_cache import RUNTIME_OVERHEAD, available_memory_bytes, estimate_model_bytes
+
+CONFIG_FILE_NAME = "transcriber_config.json"
+
+WHISPER_WINDOW_SECONDS = 30.0
+TARGET_CHUNK_WALL_SECONDS = 15.0
+MAX_CHUNK_SECONDS = 300.0
+
+# smallest last; downgrades walk down this list
+MODEL_LADDER = ("large", "medium", "small", "base", "tiny")
+
+# thread count given by the user before startup (apply() sets the variable for child processes)
+_USER_THREADS = os.getenv("TRANSCRIBER_CPU_THREADS")
+
+
+@dataclass
+class TuningPlan:
+    model_name: str
+    threads: int
+    interop_threads: int = 1
+    chunk_seconds: Optional[float] = None
+    warnings: List[str] = field(default_factory=list)
+    calibrated: bool = False
+
+
+def cpu_cores() -> int:
+    """Physical cores available to this process (logical CPUs if that cannot be determined)."""
+    try:
+        logical = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        logical = os.cpu_count() or 1
+    physical = None
+    try:
+        import psutil
+        physical = psutil.cpu_count(logical=False)
+    except Exception:
+        try:
+            cores = set()
+            phys = None
+            with open("/proc/cpuinfo", encoding="ascii", errors="replace") as f:
+                for line in f:
+                    if line.startswith("physical id"):
+                        phys = line.split(":", 1)[1].strip()
+                    elif line.startswith("core id"):
+                        cores.add((phys, line.split(":", 1)[1].strip()))
+            physical = len(cores) or None
+        except OSError:
+            pass
+    # hyper-threads add little to matrix multiplies; an affinity mask can only lower the count
+    return max(1, min(logical, physical or logical))
+
+
+def _config_file() -> str:
+    return os.path.join(config_dir(), CONFIG_FILE_NAME)
+
+
+def _read_config() -> Dict[str, Any]:
+    try:
+        with open(_config_file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _calibration_key(model_name: str, backend: str, device: str) -> str:
+    return f"{backend}/{model_name}/{device}"
+
+
+def load_calibration(model_name: str, backend: str = "whisper", device: str = "cpu") -> Optional[Dict[str, Any]]:
+    entry = _read_config().get("tuning", {}).get(_calibration_key(model_name, backend, device))
+    # a calibration from other hardware (config synced between machines) does not apply
+    if not entry or entry.get("cores") != cpu_cores():
+        return None
+    return entry
+
+
+def _save_calibration(key: str, entry: Dict[str, Any]) -> None:
+    config = _read_config()
+    config.setdefault("tuning", {})[key] = entry
+    path = _config_file()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp, path)
+
+
+def chunk_for_rtf(rtf: float) -> float:
+    """Chunk length (multiple of whisper's window) for a model running at real-time factor `rtf`."""
+    if rtf <= 0:
+        return WHISPER_WINDOW_SECONDS
+    windows = max(1, int(TARGET_CHUNK_WALL_SECONDS / rtf // WHISPER_WINDOW_SECONDS))
+    return min(MAX_CHUNK_SECONDS, windows * WHISPER_WINDOW_SECONDS)
+
+
+def _smaller_models(model_name: str) -> List[str]:
+    base = model_name.split(".")[0].split("-")[0]
+    if base not in MODEL_LADDER:
+        return []
+    suffix = ".en" if model_name.endswith(".en") else ""
+    return [m + (suffix if m != "large" else "") for m in MODEL_LADDER[MODEL_LADDER.index(base) + 1:]]
+
+
+def _gb(nbytes: float) -> str:
+    return f"{nbytes / 1024 ** 3:.1f} GB"
+
+
+def plan(
+    model_name: str,
+    workers: int = 1,
+    backend: Optional[str] = "whisper",
+    device: str = "cpu",
+    shared_model: bool = False,
+    downgrade: bool = False,
+    threads: Optional[int] = None,
+    memory: Optional[int] = None,
+    cores: Optional[int] = None,
+) -> TuningPlan:
+    """Settings for running `workers` jobs at once with `model_name`.
+
+    `shared_model`: the jobs are threads sharing one model (watch mode, GUI queue) rather than
+    processes with a model each. `threads` forces the per-job thread count. `memory` and `cores`
+    override what is detected (tests, planning for another host).
+    """
+    from backends import get_backend
+
+    engine = get_backend(backend)
+    caps = engine.capabilities()
+    cores = cores or cpu_cores()
+    workers = max(1, int(workers))
+    # threads sharing a model that is not thread-safe take turns, so only one runs at a time
+    concurrent = 1 if shared_model and not caps["thread_safe"] else workers
+    copies = 1 if shared_model else workers
+
+    result = TuningPlan(model_name, threads=1)
+    calibration = load_calibration(model_name, engine.name, device)
+    if threads is None and _USER_THREADS:
+        try:
+            threads = int(_USER_THREADS)
+        except ValueError:
+            pass
+    if threads:
+        result.threads = threads
+    else:
+        result.threads = max(1, cores // concurrent)
+        if calibration and calibration.get("threads"):
+            # more threads than the calibrated optimum only made things slower
+            result.threads = max(1, min(result.threads, int(calibration["threads"])))
+
+    if calibration and calibration.get("rtf"):
+        result.calibrated = True
+        # the calibrated speed, scaled to the threads this job actually gets
+        rtf = calibration["rtf"] * max(1, int(calibration.get("threads") or 1)) / result.threads
+        result.chunk_seconds = chunk_for_rtf(rtf)
+
+    if device == "cpu" and caps["requires_audio"]:  # the mock backend loads nothing
+        available = memory if memory is not None else available_memory_bytes(device)
+        dtype = engine.dtype(device)
+
+        def need(name: str) -> int:
+            return int(estimate_model_bytes(None, name, dtype) * (1 + RUNTIME_OVERHEAD)) * copies
+
+        if available is not None and need(model_name) > available:
+            jobs = f" for {copies} workers" if copies > 1 else ""
+            message = f"Model {model_name} needs about {_gb(need(model_name))}{jobs} but only {_gb(available)} is available"
+            fitting = next((m for m in _smaller_models(model_name) if need(m) <= available), None)
+            if downgrade and fitting:
+                result.warnings.append(f"{message}; using {fitting} instead")
+                result.model_name = fitting
+            elif copies > 1:
+                result.warnings.append(f"{message}; use fewer workers" + (f" or a smaller model ({fitting})" if fitting else ""))
+            else:
+                result.warnings.append(f"{message}; expect heavy swapping" + (f" (try {fitting})" if fitting else ""))
+    return result
+
+
+def apply(plan: TuningPlan) -> None:
+    """Put the plan's thread counts into effect for this process and future child processes."""
+    os.environ["TRANSCRIBER_CPU_THREADS"] = str(plan.threads)
+    os.environ["TRANSCRIBER_INTEROP_THREADS"] = str(plan.interop_threads)
+    # read by torch/OpenMP at import, so they cover processes that have not imported torch yet
+    os.environ["OMP_NUM_THREADS"] = str(plan.threads)
+    os.environ["MKL_NUM_THREADS"] = str(plan.threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        from backends import configure_torch_threads
+        configure_torch_threads(torch)
+
+
+def _calibration_clip(audio_path: Optional[str], clip_seconds: float) -> Any:
+    import numpy as np
+
+    n = int(clip_seconds * 16000)
+    if audio_path:
+        from audio import load_audio
+        return np.ascontiguousarray(load_audio(audio_path)[:n])
+    # no recording given: amplitude-modulated noise at speech-like syllable rate. Real speech is
+    # more representative (decoding stops early on noise), so prefer passing a file.
+    rng = np.random.default_rng(0)
+    t = np.arange(n) / 16000.0
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t)
+    return (0.1 * envelope * rng.standard_normal(n)).astype(np.float32)
+
+
+def calibrate(
+    model_name: str,
+    backend: Optional[str] = "whisper",
+    device: str = "cpu",
+    audio_path: Optional[str] = None,
+    clip_seconds: float = 30.0,
+    candidates: Optional[Iterable[int]] = None,
+    language: Optional[str] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Time `model_name` on a clip of `clip_seconds` with each thread count in `candidates`
+    (default: all cores, half, a quarter) and save the fastest to the config. Backends that fix
+    the thread count at load time load the model again for each candidate. Returns the entry:
+    {"threads", "rtf", "chunk_seconds", "results": {threads: rtf}, "cores", "clip_seconds",
+    "calibrated_at"}."""
+    from backends import get_backend
+    from model_cache import get_registry
+
+    engine = get_backend(backend)
+    cores = cpu_cores()
+    candidates = sorted({max(1, int(c)) for c in (candidates or (cores, cores // 2, cores // 4))}, reverse=True)
+    clip = _calibration_clip(audio_path, clip_seconds)
+    seconds = len(clip) / 16000.0
+    if seconds <= 0:
+        raise ValueError("Calibration clip is empty")
+
+    def warm_up(model: Any) -> None:
+        # the first call pays one-off costs (kernel selection, allocations); keep them out of the timings
+        engine.transcribe(model, clip[:16000 * 2], language=language or "en")
+
+    # faster-whisper fixes its thread count when the model is built: such backends get a fresh model
+    # per candidate, kept out of the registry so the other settings are not left loaded
+    reload = not engine.capabilities()["runtime_threads"]
+    if not reload:
+        model = get_registry().load(model_name, device, engine.dtype(device), loader=lambda: engine.load(model_name, device))
+        warm_up(model)
+    results: Dict[str, float] = {}
+    for threads in candidates:
+        apply(TuningPlan(model_name, threads))
+        if reload:
+            model = None  # free the previous candidate's copy first
+            model = engine.load(model_name, device)
+            warm_up(model)
+        t0 = time.perf_counter()
+        engine.transcribe(model, clip, language=language)
+        rtf = (time.perf_counter() - t0) / seconds
+        results[str(threads)] = round(rtf, 4)
+        if log:
+            log(f"  {threads:>3} threads: RTF {rtf:.3f}")
+    best = min(results, key=results.get)
+    apply(TuningPlan(model_name, int(best)))
+    if reload:
+        # a copy loaded earlier keeps its old thread count; the next load picks up the best one
+        get_registry().evict(model_name, device, engine.dtype(device))
+    entry = {
+        "threads": int(best),
+        "rtf": results[best],
+        "chunk_seconds": chunk_for_rtf(results[best]),
+        "results": results,
+        "cores": cores,
+        "clip_seconds": round(seconds, 1),
+        "calibrated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    _save_calibration(_calibration_key(model_name, engine.name, device), entry)
+    return entry
@@ -0,0 +1,300 @@
+"""
+Multi-file job queue for the Transcriber GUI.
+
+`JobQueueWidget` shows one row per queued file with its status, a progress bar and an ETA. Files
+can be added with the buttons, by choosing a whole folder, or by drag-and-drop (files or folders).
+Up to `concurrency` jobs run at once, each on its own worker thread; all of them share the
+process-wide model registry, so a model is loaded once no matter how many jobs use it. Workers
+report back through queued Qt signals, so the UI thread never waits on a job. Any job can be
+cancelled from the list (queued jobs are dropped, running jobs stop after their current chunk).
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from PyQt6 import QtCore
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QProgressBar,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from audio import is_audio_file
+
+COL_FILE, COL_STATUS, COL_PROGRESS, COL_ETA = range(4)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+@dataclass
+class QueueJob:
+    audio_path: str
+    output_path: str
+    model: str
+    language: Optional[str]
+    mock: bool
+    status: str = QUEUED
+    fraction: float = 0.0
+    started: float = 0.0
+    worker: object = None
+    error: str = ""
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Files are kept as-is; folders are expanded (recursively) to the audio files they contain."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _dirs, files in os.walk(p):
+                out.extend(os.path.join(root, f) for f in sorted(files) if is_audio_file(f))
+        elif os.path.isfile(p):
+            out.append(p)
+    return out
+
+
+def unique_output_path(path: str, taken: set) -> str:
+    """Append ' (n)' before the extension until the path is neither on disk nor already queued."""
+    if not os.path.exists(path) and path not in taken:
+        return path
+    base, ext = os.path.splitext(path)
+    i = 1
+    while True:
+        candidate = f"{base} ({i}){ext}"
+        if not os.path.exists(candidate) and candidate not in taken:
+            return candidate
+        i += 1
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}" if seconds < 3600 else f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class JobQueueWidget(QWidget):
+    """Queue view. `settings()` returns (model, language, mock) for newly added jobs, and
+    `worker_factory(audio, model, language, output, mock)` creates the worker thread for a job."""
+
+    job_finished = QtCore.pyqtSignal(str, str)  # (message, status)
+
+    def __init__(
+        self,
+        t: Callable[..., str],
+        settings: Callable[[], tuple],
+        output_for: Callable[[str, str], str],
+        worker_factory: Callable[..., QtCore.QThread],
+        concurrency: int = 2,
+        parent: Optional[QWidget] = None,
+    ):
+        super().__init__(parent)
+        self._t = t
+        self._settings = settings
+        self._output_for = output_for
+        self._worker_factory = worker_factory
+        self.jobs: List[QueueJob] = []
+        self.setAcceptDrops(True)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        buttons = QHBoxLayout()
+        add_files = QPushButton(self._t("add_files"))
+        add_files.clicked.connect(self.browse_files)
+        add_folder = QPushButton(self._t("add_folder"))
+        add_folder.clicked.connect(self.browse_folder)
+        self.cancel_btn = QPushButton(self._t("cancel_selected"))
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        clear_btn = QPushButton(self._t("clear_finished"))
+        clear_btn.clicked.connect(self.clear_finished)
+        self.concurrency = QSpinBox()
+        self.concurrency.setRange(1, max(1, os.cpu_count() or 1))
+        self.concurrency.setValue(concurrency)
+        self.concurrency.valueChanged.connect(lambda _v: self._schedule())
+        for w in (add_files, add_folder, self.cancel_btn, clear_btn):
+            buttons.addWidget(w)
+        buttons.addStretch()
+        buttons.addWidget(QLabel(self._t("concurrency")))
+        buttons.addWidget(self.concurrency)
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels([self._t("col_file"), self._t("col_status"),
+                                              self._t("col_progress"), self._t("col_eta")])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(COL_FILE, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        # ETA labels tick once a second rather than on every progress signal
+        self._eta_timer = QtCore.QTimer(self)
+        self._eta_timer.setInterval(1000)
+        self._eta_timer.timeout.connect(self._refresh_eta)
+
+    # ---- adding jobs -------------------------------------------------------------------------
+
+    def browse_files(self):
+        files, _ = QFileDialog.getOpenFileNames(self, self._t("select_audio_title"))
+        if files:
+            self.add_paths(files)
+
+    def browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, self._t("select_folder_title"))
+        if folder:
+            self.add_paths([folder])
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = [u.toLocalFile() for u in event.mimeData().urls() if u.isLocalFile()]
+        if paths:
+            self.add_paths(paths)
+            event.acceptProposedAction()
+
+    def add_paths(self, paths: List[str]) -> int:
+        """Queue audio files (folders are expanded). Returns the number of jobs added."""
+        model, language, mock = self._settings()
+        taken = {j.output_path for j in self.jobs}
+        added = 0
+        for f in expand_paths(paths):
+            out = unique_output_path(self._output_for(f, model), taken)
+            taken.add(out)
+            job = QueueJob(f, out, model, language, mock)
+            self.jobs.append(job)
+            self._add_row(job)
+            added += 1
+        self._schedule()
+        return added
+
+    def _add_row(self, job: QueueJob):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        item = QTableWidgetItem(os.path.basename(job.audio_path))
+        item.setToolTip(f"{job.audio_path}\n-> {job.output_path}")
+        self.table.setItem(row, COL_FILE, item)
+        self.table.setItem(row, COL_STATUS, QTableWidgetItem(self._t("status_" + job.status)))
+        bar = QProgressBar()
+        bar.setRange(0, 100)
+        self.table.setCellWidget(row, COL_PROGRESS, bar)
+        self.table.setItem(row, COL_ETA, QTableWidgetItem(""))
+
+    # ---- scheduling --------------------------------------------------------------------------
+
+    def _running(self) -> int:
+        return sum(1 for j in self.jobs if j.status == RUNNING)
+
+    def _schedule(self):
+        for job in self.jobs:
+            if self._running() >= self.concurrency.value():
+                break
+            if job.status == QUEUED:
+                self._start(job)
+        if self._running():
+            self._eta_timer.start()
+        else:
+            self._eta_timer.stop()
+
+    def _start(self, job: QueueJob):
+        worker = self._worker_factory(job.audio_path, job.model, job.language, job.output_path, job.mock)
+        job.worker = worker
+        job.status = RUNNING
+        job.started = time.monotonic()
+        # bind the job, not the row: rows shift when finished jobs are cleared
+        worker.progress.connect(lambda f, _tp, j=job: self._on_progress(j, f))
+        worker.finished_success.connect(lambda res, j=job: self._on_done(j, res))
+        worker.finished_error.connect(lambda err, j=job: self._on_failed(j, err))
+        # keep the QThread referenced until its run() has fully returned
+        worker.finished.connect(lambda j=job: setattr(j, "worker", None))
+        self._update_row(job)
+        worker.start()
+
+    def _row_of(self, job: QueueJob) -> int:
+        return self.jobs.index(job)
+
+    def _update_row(self, job: QueueJob):
+        row = self._row_of(job)
+        self.table.item(row, COL_STATUS).setText(self._t("status_" + job.status))
+        bar = self.table.cellWidget(row, COL_PROGRESS)
+        bar.setValue(int(job.fraction * 100))
+        if job.status != RUNNING:
+            self.table.item(row, COL_ETA).setText("")
+
+    def _eta(self, job: QueueJob) -> Optional[float]:
+        if job.status != RUNNING or job.fraction <= 0.0:
+            return None
+        elapsed = time.monotonic() - job.started
+        return elapsed * (1.0 - job.fraction) / job.fraction
+
+    def _refresh_eta(self):
+        for row, job in enumerate(self.jobs):
+            if job.status == RUNNING:
+                self.table.item(row, COL_ETA).setText(format_eta(self._eta(job)))
+
+    def _on_progress(self, job: QueueJob, fraction: float):
+        job.fraction = fraction
+        self.table.cellWidget(self._row_of(job), COL_PROGRESS).setValue(int(fraction * 100))
+
+    def _finish(self, job: QueueJob, status: str, message: str):
+        job.status = status
+        self._update_row(job)
+        self.job_finished.emit(message, status)
+        self._schedule()
+
+    def _on_done(self, job: QueueJob, result: dict):
+        if result.get("cancelled"):
+            self._finish(job, CANCELLED, self._t("cancelled_partial", path=result.get("output_file"),
+                                                 done=f"{result.get('processed_seconds', 0):.0f}",
+                                                 total=f"{result.get('duration', 0):.0f}"))
+            return
+        job.fraction = 1.0
+        self._finish(job, DONE, self._t("done_wrote", path=result.get("output_file")))
+
+    def _on_failed(self, job: QueueJob, error: str):
+        job.error = error
+        self._finish(job, FAILED, f"Error: {job.audio_path}: {error}")
+
+    # ---- cancel / clear ----------------------------------------------------------------------
+
+    def cancel_selected(self):
+        rows = sorted({idx.row() for idx in self.table.selectedIndexes()})
+        for row in rows:
+            job = self.jobs[row]
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                self._update_row(job)
+            elif job.status == RUNNING and job.worker is not None:
+                job.worker.stop()  # the worker reports back via finished_success(cancelled=True)
+                self.table.item(row, COL_STATUS).setText(self._t("status_stopping"))
+
+    def cancel_all(self, wait_ms: int = 0):
+        workers = []
+        for job in self.jobs:
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                self._update_row(job)
+            elif job.worker is not None:
+                job.worker.stop()
+                workers.append(job.worker)
+        for w in workers:
+            w.wait(wait_ms)
+
+    def clear_finished(self):
+        for row in reversed(range(len(self.jobs))):
+            if self.jobs[row].status in (DONE, FAILED, CANCELLED):
+                del self.jobs[row]
+                self.table.removeRow(row)
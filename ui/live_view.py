@@ -0,0 +1,128 @@
+"""
+Live transcript pane for the Transcriber GUI.
+
+`transcriber.transcribe_file` hands over segments through `segment_callback` as soon as they are
+final (one batch per window, or a whole file at once on a cache hit). The worker thread passes
+them through a `SegmentBatcher`, which turns the callbacks into at most one Qt signal per
+`interval`, so a fast producer cannot flood the event loop with queued signals; what it holds
+back is sent when the interval is up, not with the next window.
+
+`LiveTranscriptView` shows one "[m:ss] text" line per segment. Incoming lines are queued and
+appended by a timer, at most LINES_PER_TICK per tick in a single call, so even a burst of tens of
+thousands of segments is spread over many event-loop turns and the window stays responsive. It is
+a QPlainTextEdit, which lays out only the visible blocks, and the document is capped at MAX_LINES
+(the oldest lines scroll out; the output file has the whole transcript). The view follows new
+text only while it is scrolled to the bottom.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from PyQt6 import QtCore
+from PyQt6.QtWidgets import QPlainTextEdit
+
+TICK_MS = 50
+LINES_PER_TICK = 200
+MAX_LINES = 20000
+
+
+def format_line(seg: Dict[str, Any]) -> str:
+    """"[m:ss] text" (or "[h:mm:ss] ...") for a segment; "" for a segment without text."""
+    text = seg.get("text", "").strip()
+    if not text:
+        return ""
+    total = max(0, int(seg.get("start", 0.0)))
+    h, rem = divmod(total, 3600)
+    m, s = divmod(rem, 60)
+    clock = f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+    speaker = f"Speaker {seg['speaker']}: " if seg.get("speaker") is not None else ""
+    return f"[{clock}] {speaker}{text}"
+
+
+class SegmentBatcher(QtCore.QObject):
+    """Collects segments from `segment_callback` calls (any thread) and passes them to `emit`
+    in batches, at most once per `interval` seconds. Segments held back are sent by a single-shot
+    timer once the interval is up, so the last ones of a burst do not wait for the next window.
+    Create it in the GUI thread (the timer runs on its event loop); call `flush()` when the run ends."""
+
+    # asks the GUI thread to arm the timer (milliseconds); queued when emitted from a worker
+    _arm = QtCore.pyqtSignal(int)
+
+    def __init__(self, emit: Callable[[List[Dict[str, Any]]], None], interval: float = 0.25, parent=None):
+        super().__init__(parent)
+        self._emit = emit
+        self._interval = interval
+        self._pending: List[Dict[str, Any]] = []
+        self._last = float("-inf")
+        self._armed = False
+        self._lock = threading.Lock()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._arm.connect(self._start_timer)
+
+    def add(self, segments: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._pending.extend(segments)
+            now = time.monotonic()
+            wait = self._interval - (now - self._last)
+            if wait > 0:
+                if self._armed:
+                    return  # the timer sends it
+                self._armed = True
+            else:
+                batch, self._pending, self._last = self._pending, [], now
+        if wait > 0:
+            self._arm.emit(int(wait * 1000) + 1)
+        elif batch:
+            self._emit(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending, self._armed = self._pending, [], False
+            if batch:
+                self._last = time.monotonic()
+        if batch:
+            self._emit(batch)
+
+    @QtCore.pyqtSlot(int)
+    def _start_timer(self, msec: int) -> None:
+        self._timer.start(msec)
+
+
+class LiveTranscriptView(QPlainTextEdit):
+    """Read-only pane that fills in as segments arrive (see the module docstring)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(MAX_LINES)
+        self._lines: deque = deque()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(TICK_MS)
+        self._timer.timeout.connect(self._drain)
+
+    def add_segments(self, segments: List[Dict[str, Any]]) -> None:
+        self._lines.extend(line for line in map(format_line, segments) if line)
+        if self._lines and not self._timer.isActive():
+            self._timer.start()
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self._timer.stop()
+        super().clear()
+
+    def _drain(self) -> None:
+        if not self._lines:
+            self._timer.stop()
+            return
+        bar = self.verticalScrollBar()
+        follow = bar.value() >= bar.maximum() - 2
+        n = min(len(self._lines), LINES_PER_TICK)
+        # one append (one layout pass) per tick
+        self.appendPlainText("\n".join(self._lines.popleft() for _ in range(n)))
+        if follow:
+            bar.setValue(bar.maximum())
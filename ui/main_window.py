@@ -7,10 +7,19 @@ This module exposes `main()` which launches the GUI. The window provides:
 - model dropdown
 - language dropdown
 - Start / Stop buttons
+- Compare models: transcribe the file with several models and report speed and word error rate
+  (see `compare.py`)
 - progress bar
+- live transcript that fills in while a file is transcribed (see `ui/live_view.py`)
 - log area
+- a Queue tab for transcribing many files (see `ui/job_queue.py`); files and folders can also be
+  dropped anywhere on the window
 
 It uses `transcriber.transcribe_file` in a QThread to avoid blocking the UI. Mock mode can be enabled for testing by setting the environment variable TRANSCRIBER_MOCK to 1/true/yes.
+
+Startup stays fast: whisper/torch are not imported while the window is built (the language list is
+a bundled static table). Once the window is shown they are imported on a background thread so the
+first transcription does not pay for it. Run with --profile-startup to print phase timings.
 """
 from __future__ import annotations
 
@@ -18,6 +27,7 @@ import sys
 import os
 import json
 import threading
+import importlib.util
 from typing import Optional
 
 from PyQt6 import QtWidgets, QtCore
@@ -35,20 +45,33 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QProgressBar,
     QHBoxLayout,
+    QTabWidget,
+    QInputDialog,
 )
 
 # Local import
 import transcriber
+import tuning
+from backends import prewarm
+from languages import LANGUAGES
+from language_id import format_detection
+from startup_profile import profile
+from ui.job_queue import JobQueueWidget
+from ui.live_view import LiveTranscriptView, SegmentBatcher
 
 CONFIG_FILE_NAME = "transcriber_config.json"
 
 
 class TranscribeWorker(QtCore.QThread):
-    progress = QtCore.pyqtSignal(float)
+    # fraction done (0..1), throughput in audio-seconds per wall-second
+    progress = QtCore.pyqtSignal(float, float)
+    # final segments as they are produced, batched (see ui/live_view.SegmentBatcher)
+    segments = QtCore.pyqtSignal(list)
     finished_success = QtCore.pyqtSignal(dict)
     finished_error = QtCore.pyqtSignal(str)
 
-    def __init__(self, audio_path: str, model: str, language: Optional[str], output_path: str, mock: bool = False):
+    def __init__(self, audio_path: str, model: str, language: Optional[str], output_path: str, mock: bool = False,
+                 resume: bool = True):
         super().__init__()
         self.audio_path = audio_path
         self.model = model
@@ -56,8 +79,12 @@ class TranscribeWorker(QtCore.QThread):
         self.output_path = output_path
         self._stop_event = threading.Event()
         self.mock = mock
+        self.resume = resume
+        # created here, in the GUI thread, whose event loop sends what it holds back
+        self._batcher = SegmentBatcher(self.segments.emit)
 
     def run(self):
+        batcher = self._batcher
         try:
             # transcribe_file handles device detection
             result = transcriber.transcribe_file(
@@ -65,10 +92,55 @@ class TranscribeWorker(QtCore.QThread):
                 model_name=self.model,
                 language=self.language,
                 output_path=self.output_path,
+                progress_callback=self.progress.emit,
                 stop_event=self._stop_event,
                 mock=self.mock,
+                segment_callback=batcher.add,
+                # pick up where a crashed or cancelled run for the same file and output left off,
+                # unless the user chose to overwrite the output
+                resume=self.resume,
             )
+            batcher.flush()
             self.finished_success.emit(result)
+        except Exception as e:
+            batcher.flush()
+            self.finished_error.emit(str(e))
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class CompareWorker(QtCore.QThread):
+    progress = QtCore.pyqtSignal(float, float)
+    model_done = QtCore.pyqtSignal(str)
+    finished_success = QtCore.pyqtSignal(object)
+    finished_error = QtCore.pyqtSignal(str)
+
+    def __init__(self, audio_path: str, models: list, language: Optional[str], out_dir: str, mock: bool = False):
+        super().__init__()
+        self.audio_path = audio_path
+        self.models = models
+        self.language = language
+        self.out_dir = out_dir
+        self._stop_event = threading.Event()
+        self.mock = mock
+
+    def run(self):
+        from compare import compare_models
+
+        try:
+            comparison = compare_models(
+                self.audio_path,
+                self.models,
+                language=self.language,
+                out_dir=self.out_dir,
+                mock=self.mock,
+                progress_callback=self.progress.emit,
+                stop_event=self._stop_event,
+                on_run=lambda r: self.model_done.emit(
+                    f"{r.model}: {', '.join(r.output_files)}" if r.ok else f"{r.model}: {r.error or 'cancelled'}"),
+            )
+            self.finished_success.emit(comparison)
         except Exception as e:
             self.finished_error.emit(str(e))
 
@@ -82,17 +154,10 @@ class MainWindow(QMainWindow):
         self._config = self._load_config()
         self._strings = self._load_locale()
 
-        # Startup diagnostics: show interpreter and availability of whisper/torch
-        try:
-            import whisper as _wh
-            whisper_ok = True
-        except Exception:
-            whisper_ok = False
-        try:
-            import torch as _th
-            torch_ok = True
-        except Exception:
-            torch_ok = False
+        # Startup diagnostics: show interpreter and availability of whisper/torch.
+        # find_spec only locates the packages; importing them here would cost seconds of startup.
+        whisper_ok = importlib.util.find_spec("whisper") is not None
+        torch_ok = importlib.util.find_spec("torch") is not None
         interp = sys.executable if hasattr(sys, 'executable') else 'unknown'
         # We'll append to the log widget after it's created; store as attr
         self._startup_diag = f"Python executable: {interp}\nwhisper: {whisper_ok}  torch: {torch_ok}\n"
@@ -102,8 +167,15 @@ class MainWindow(QMainWindow):
 
         central = QWidget()
         self.setCentralWidget(central)
+        outer = QVBoxLayout()
+        central.setLayout(outer)
+        self.tabs = QTabWidget()
+        outer.addWidget(self.tabs)
+        single = QWidget()
         layout = QVBoxLayout()
-        central.setLayout(layout)
+        single.setLayout(layout)
+        self.tabs.addTab(single, self._t("tab_single"))
+        self.setAcceptDrops(True)
 
         # Audio path
         h1 = QHBoxLayout()
@@ -134,13 +206,8 @@ class MainWindow(QMainWindow):
         self.model_cb.setCurrentText(self._config.get("model", "large"))
 
         self.lang_cb = QComboBox()
-        # try to populate languages from whisper if available
-        try:
-            import whisper as _wh
-            languages = list(_wh.tokenizer.LANGUAGES.keys()) if hasattr(_wh, 'tokenizer') else []
-        except Exception:
-            languages = ["auto", "en", "he"]
-        self.lang_cb.addItems(languages)
+        # bundled copy of whisper's language table (no whisper import needed)
+        self.lang_cb.addItems(["auto", *LANGUAGES.keys()])
         self.lang_cb.setCurrentText(self._config.get("language", "auto"))
 
         h3.addWidget(QLabel(self._t("model")))
@@ -157,8 +224,11 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.start_btn.clicked.connect(self.start_transcription)
         self.stop_btn.clicked.connect(self.stop_transcription)
+        self.compare_btn = QPushButton(self._t("compare"))
+        self.compare_btn.clicked.connect(self.start_comparison)
         h4.addWidget(self.start_btn)
         h4.addWidget(self.stop_btn)
+        h4.addWidget(self.compare_btn)
         layout.addLayout(h4)
 
         # Progress + log
@@ -166,15 +236,31 @@ class MainWindow(QMainWindow):
         self.progress.setRange(0, 100)
         layout.addWidget(self.progress)
 
+        layout.addWidget(QLabel(self._t("live_transcript")))
+        self.live = LiveTranscriptView()
+        layout.addWidget(self.live, 1)
+
+        # Queue tab: jobs use the model/language currently selected above
+        self.queue = JobQueueWidget(
+            self._t,
+            settings=lambda: (self.model_cb.currentText(), self.lang_cb.currentText(), _is_mock()),
+            output_for=self._default_output_for,
+            worker_factory=TranscribeWorker,
+            concurrency=int(self._config.get("queue_concurrency", 2)),
+        )
+        self.queue.job_finished.connect(lambda msg, _status: self.log.append(msg))
+        self.queue.concurrency.valueChanged.connect(self._on_concurrency_change)
+        self.tabs.addTab(self.queue, self._t("tab_queue"))
+
         self.log = QTextEdit()
         self.log.setReadOnly(True)
-        layout.addWidget(self.log)
+        outer.addWidget(self.log)
 
         # Show startup diagnostics in the log area
         self.log.append(self._startup_diag)
 
         # Worker
-        self.worker: Optional[TranscribeWorker] = None
+        self.worker: Optional[QtCore.QThread] = None
 
         # Load last-used audio/output
         if self._config.get("last_audio"):
@@ -184,6 +270,37 @@ class MainWindow(QMainWindow):
 
         # wire model change => update default output suffix
         self.model_cb.currentTextChanged.connect(self._on_model_change)
+        self._apply_tuning()
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = [u.toLocalFile() for u in event.mimeData().urls() if u.isLocalFile()]
+        if paths and self.queue.add_paths(paths):
+            self.tabs.setCurrentWidget(self.queue)
+            event.acceptProposedAction()
+
+    def _on_concurrency_change(self, value: int):
+        self._config["queue_concurrency"] = value
+        self._save_config()
+        self._apply_tuning()
+
+    def _apply_tuning(self) -> tuning.TuningPlan:
+        # the single-file job and the queue's jobs share the cores and the resident models
+        plan = tuning.plan(self.model_cb.currentText(), workers=self.queue.concurrency.value() + 1,
+                           backend="mock" if _is_mock() else None, shared_model=True)
+        tuning.apply(plan)
+        return plan
+
+    def closeEvent(self, event):
+        # stop running jobs so no worker thread outlives the window
+        self.queue.cancel_all(wait_ms=5000)
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.wait(5000)
+        super().closeEvent(event)
 
     def _t(self, key: str, **kwargs) -> str:
         val = self._strings.get(key, key)
@@ -218,10 +335,37 @@ class MainWindow(QMainWindow):
                 "overwrite_question": "Output file exists:\n{path}\nOverwrite?",
                 "starting_transcription": "Starting transcription: {audio} -> {out} (model={model}, language={language}, mock={mock})",
                 "done_wrote": "Done. Wrote: {path}",
+                "cancelled_partial": "Cancelled after {done}s of {total}s. Partial transcription: {path}",
                 "error_transcription": "Transcription error",
                 "overwrite_title": "Overwrite?",
                 "select_audio_title": "Select audio file",
                 "select_output_title": "Select output file",
+                "tab_single": "Single file",
+                "tab_queue": "Queue",
+                "add_files": "Add files...",
+                "add_folder": "Add folder...",
+                "cancel_selected": "Cancel selected",
+                "clear_finished": "Clear finished",
+                "concurrency": "Parallel jobs:",
+                "col_file": "File",
+                "col_status": "Status",
+                "col_progress": "Progress",
+                "col_eta": "ETA",
+                "status_queued": "Queued",
+                "status_running": "Running",
+                "status_stopping": "Stopping...",
+                "status_done": "Done",
+                "status_failed": "Failed",
+                "status_cancelled": "Cancelled",
+                "select_folder_title": "Select folder",
+                "compare": "Compare models...",
+                "compare_title": "Compare models",
+                "compare_prompt": "Models to compare (comma-separated):",
+                "starting_comparison": "Comparing models on {audio}: {models}",
+                "compare_report": "Comparison report: {path}",
+                "timings": "Load {load}s, decode {decode}s, VAD {vad}s, inference {inference}s, write {write}s (total {total}s, RTF {rtf})",
+                "detected_language": "Detected language: {language}",
+                "live_transcript": "Transcript:",
             }
 
     def _on_model_change(self, model_name: str):
@@ -306,6 +450,16 @@ class MainWindow(QMainWindow):
         default_docs = os.path.join(os.path.expanduser("~"), "Documents")
         return {"model": "small", "language": "auto", "last_dir": default_docs}
 
+    @staticmethod
+    def _read_config_file(path: str) -> dict:
+        # keys written by other parts of the app (e.g. calibration results under "tuning") are kept
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
     def _save_config(self):
         appdata = os.getenv("APPDATA")
         if appdata:
@@ -315,7 +469,9 @@ class MainWindow(QMainWindow):
                 cfg_file = os.path.join(cfg_dir, CONFIG_FILE_NAME)
                 # persist last used folder (prefer explicit config value, otherwise derived from audio input)
                 last_dir = self._config.get("last_dir") or (os.path.dirname(self.audio_input.text()) if self.audio_input.text() else os.getcwd())
-                payload = {"model": self.model_cb.currentText(), "language": self.lang_cb.currentText(), "last_audio": self.audio_input.text(), "last_dir": last_dir}
+                payload = {**self._read_config_file(cfg_file), "model": self.model_cb.currentText(), "language": self.lang_cb.currentText(), "last_audio": self.audio_input.text(), "last_dir": last_dir,
+                           "queue_concurrency": self._config.get("queue_concurrency", 2),
+                           "compare_models": self._config.get("compare_models", "")}
                 with open(cfg_file, "w", encoding="utf-8") as f:
                     json.dump(payload, f)
             except Exception:
@@ -336,10 +492,13 @@ class MainWindow(QMainWindow):
             self.output_input.setText(out)
 
         # Overwrite handling
+        resume = True
         if os.path.exists(out):
             ret = QMessageBox.question(self, self._t("overwrite_title"), self._t("overwrite_question", path=out), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel)
             if ret == QMessageBox.StandardButton.Cancel:
                 return
+            if ret == QMessageBox.StandardButton.Yes:
+                resume = False  # start over instead of continuing from <output>.journal
             if ret == QMessageBox.StandardButton.No:
                 # create a new filename with suffix
                 base, ext = os.path.splitext(out)
@@ -359,42 +518,134 @@ class MainWindow(QMainWindow):
         self._save_config()
 
         # Mock mode via environment variable for predictable behavior in packaged apps and CI
-        mock_env = os.getenv("TRANSCRIBER_MOCK", "").lower()
-        mock = mock_env in ("1", "true", "yes")
+        mock = _is_mock()
+        for warning in self._apply_tuning().warnings:
+            self.log.append(f"Warning: {warning}")
 
         self.log.append(self._t("starting_transcription", audio=audio, out=out, model=model, language=language, mock=mock))
         self.start_btn.setEnabled(False)
+        self.compare_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress.setValue(0)
+        self.live.clear()
 
-        self.worker = TranscribeWorker(audio, model, language, out, mock=mock)
+        self.worker = TranscribeWorker(audio, model, language, out, mock=mock, resume=resume)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.segments.connect(self.live.add_segments)
         self.worker.finished_success.connect(self._on_success)
         self.worker.finished_error.connect(self._on_error)
         self.worker.start()
 
+    def start_comparison(self):
+        from compare import parse_models
+
+        audio = self.audio_input.text().strip()
+        if not audio:
+            QMessageBox.warning(self, self._t("missing_input"), self._t("missing_input"))
+            return
+        if not os.path.exists(audio):
+            QMessageBox.warning(self, self._t("not_found"), self._t("not_found"))
+            return
+        default = self._config.get("compare_models") or f"tiny,small,{self.model_cb.currentText()}"
+        text, ok = QInputDialog.getText(self, self._t("compare_title"), self._t("compare_prompt"), text=default)
+        models = parse_models(text) if ok else []
+        if not models:
+            return
+        self._config["compare_models"] = ",".join(models)
+        self._save_config()
+
+        # outputs go next to the chosen output file (one per model, named as usual)
+        out = self.output_input.text().strip()
+        out_dir = os.path.dirname(out) if out else (os.path.dirname(audio) or os.getcwd())
+        self.log.append(self._t("starting_comparison", audio=audio, models=", ".join(models)))
+        self.start_btn.setEnabled(False)
+        self.compare_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress.setValue(0)
+
+        self.worker = CompareWorker(audio, models, self.lang_cb.currentText(), out_dir, mock=_is_mock())
+        self.worker.progress.connect(self._on_progress)
+        self.worker.model_done.connect(self.log.append)
+        self.worker.finished_success.connect(self._on_compare_done)
+        self.worker.finished_error.connect(self._on_error)
+        self.worker.start()
+
+    def _on_compare_done(self, comparison):
+        self.log.append(comparison.to_text(max_diffs=5))
+        if comparison.report_path:
+            self.log.append(self._t("compare_report", path=comparison.report_path))
+        self.progress.setValue(100)
+        self.start_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+
     def stop_transcription(self):
         if self.worker:
             self.worker.stop()
             self.log.append("Stop requested...")
             self.stop_btn.setEnabled(False)
 
+    def _on_progress(self, fraction: float, throughput: float):
+        self.progress.setValue(int(fraction * 100))
+        if throughput > 0:
+            self.progress.setFormat(f"%p%  ({throughput:.1f}x)")
+
     def _on_success(self, result: dict):
+        self.progress.resetFormat()
+        if result.get("cancelled"):
+            self.log.append(self._t("cancelled_partial", path=result.get('output_file'),
+                                    done=f"{result.get('processed_seconds', 0):.0f}",
+                                    total=f"{result.get('duration', 0):.0f}"))
+            self.start_btn.setEnabled(True)
+            self.compare_btn.setEnabled(True)
+            self.stop_btn.setEnabled(False)
+            return
         self.log.append(self._t("done_wrote", path=result.get('output_file')))
+        if result.get("language_probability") is not None:
+            self.log.append(self._t("detected_language", language=format_detection({
+                "language": result["language"], "probability": result["language_probability"],
+                "ranking": result.get("language_ranking") or []})))
+        timings = result.get("timings")
+        if timings and not result.get("cache_hit"):
+            self.log.append(self._t("timings", rtf=f"{result.get('rtf') or 0:.3f}",
+                                    **{k: f"{v:.1f}" for k, v in timings.items()}))
         self.progress.setValue(100)
         self.start_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
     def _on_error(self, error: str):
+        self.progress.resetFormat()
         self.log.append(f"Error: {error}")
         QMessageBox.critical(self, self._t("error_transcription"), error)
         self.start_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
 
-def main():
-    app = QApplication(sys.argv)
-    w = MainWindow()
-    w.show()
+def _is_mock() -> bool:
+    return os.getenv("TRANSCRIBER_MOCK", "").lower() in ("1", "true", "yes")
+
+
+def main(profile_startup: bool = False):
+    profile_startup = profile_startup or "--profile-startup" in sys.argv
+    with profile.phase("QApplication()"):
+        app = QApplication([a for a in sys.argv if a != "--profile-startup"])
+    with profile.phase("MainWindow()"):
+        w = MainWindow()
+    with profile.phase("show()"):
+        w.show()
+
+    def _after_first_paint():
+        if profile_startup:
+            print(profile.report(), file=sys.stderr)
+            app.quit()
+            return
+        # import the inference packages in the background while the user picks a file
+        if not _is_mock():
+            threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
+
+    QtCore.QTimer.singleShot(0, _after_first_paint)
     sys.exit(app.exec())
 
 
@@ -0,0 +1,359 @@
+"""
+watch.py
+
+Watch-folder daemon: transcribe audio files as they arrive in a directory tree.
+
+Changes are picked up from filesystem events when the optional `watchdog` package is installed,
+otherwise by polling. The poller never re-lists the whole tree: it stats each known directory and
+only lists the ones whose mtime changed (adding, removing or renaming an entry updates the mtime
+of its directory), so a steady stream of arrivals costs one stat per directory per tick.
+
+A new file is only queued once its size and mtime have been stable for `settle_seconds`, so
+recordings that are still being copied in are not picked up half-written. Files are transcribed
+in this process by `workers` threads, so loaded models stay resident in the model registry
+between jobs.
+
+Processed files are recorded in a small append-only JSONL index (by default
+`.transcriber-processed.jsonl` in the watched directory). A file is skipped while its path, size
+and mtime match a successful entry, so restarts do not redo work while a replaced file is
+transcribed again. Failed files are retried after a restart or when they change.
+
+API:
+- ProcessedIndex(path)
+- FolderWatcher(directory, handle, index, settle_seconds=2.0, poll_interval=1.0, workers=1, use_events=None)
+- FolderWatcher.run(stop_event=None)
+- run_watch(directory, model_name, language=None, mock=False, out_dir=None, index_path=None,
+            settle_seconds=2.0, poll_interval=1.0, workers=1, use_events=None, on_result=None,
+            stop_event=None, **transcribe_options)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from audio import is_audio_file
+from batch import BatchJob, JobResult, _run_job, default_output_path
+
+INDEX_FILE_NAME = ".transcriber-processed.jsonl"
+
+FileStamp = Tuple[int, int]  # (size, mtime_ns)
+
+
+def _stamp(path: str) -> Optional[FileStamp]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class ProcessedIndex:
+    """Append-only JSONL record of processed files, keyed by path relative to `root`."""
+
+    def __init__(self, path: str, root: Optional[str] = None):
+        self.path = path
+        self.root = os.path.abspath(root or os.path.dirname(path) or ".")
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def _load(self) -> None:
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["path"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue  # a line torn by a crash mid-write
+        except FileNotFoundError:
+            return
+        # superseded lines accumulate as files are re-processed; rewrite once they dominate
+        if lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _compact(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".index-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(self._rel(path))
+
+    def is_done(self, path: str, stamp: Optional[FileStamp]) -> bool:
+        """True if `path` was transcribed successfully and has not changed since."""
+        entry = self.get(path)
+        return bool(entry and entry.get("ok") and stamp is not None
+                    and (entry.get("size"), entry.get("mtime_ns")) == stamp)
+
+    def record(self, path: str, stamp: Optional[FileStamp], result: JobResult) -> None:
+        size, mtime_ns = stamp or (None, None)
+        entry = {"path": self._rel(path), "size": size, "mtime_ns": mtime_ns, "ok": result.ok,
+                 "output": result.output_path, "error": result.error, "at": round(time.time(), 3)}
+        with self._lock:
+            self._entries[entry["path"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _DirPoller:
+    """Finds new files by listing only directories whose mtime changed since the last poll."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._dirs: Dict[str, int] = {}
+
+    def scan(self) -> List[str]:
+        """List the whole tree once (start-up catch-up) and remember every directory."""
+        self._dirs.clear()
+        return self._list(self.root)
+
+    def _list(self, directory: str) -> List[str]:
+        files = []
+        try:
+            self._dirs[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            self._dirs.pop(directory, None)
+            return files
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if e.path not in self._dirs:
+                        files.extend(self._list(e.path))
+                elif e.is_file():
+                    files.append(e.path)
+            except OSError:
+                continue
+        return files
+
+    def poll(self) -> List[str]:
+        changed = []
+        for directory, mtime in list(self._dirs.items()):
+            try:
+                now = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._dirs.pop(directory, None)
+                continue
+            if now != mtime:
+                changed.append(directory)
+        files = []
+        for directory in changed:
+            files.extend(self._list(directory))
+        return files
+
+
+def _events_available() -> bool:
+    try:
+        return importlib.util.find_spec("watchdog") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class FolderWatcher:
+    """Debounces new/changed audio files under `directory` and feeds them to `handle(path)`."""
+
+    def __init__(
+        self,
+        directory: str,
+        handle: Callable[[str], JobResult],
+        index: ProcessedIndex,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        workers: int = 1,
+        use_events: Optional[bool] = None,
+        on_result: Optional[Callable[[JobResult], None]] = None,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.handle = handle
+        self.index = index
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.workers = max(1, int(workers))
+        self.use_events = _events_available() if use_events is None else use_events
+        self.on_result = on_result
+        self._lock = threading.Lock()
+        self._candidates: Set[str] = set()  # reported by events/poller, not yet examined
+        self._pending: Dict[str, Tuple[FileStamp, float]] = {}  # path -> (stamp, stable since)
+        self._busy: Set[str] = set()  # queued or being transcribed
+        self._failed: Dict[str, FileStamp] = {}  # failed in this run; retried only if changed
+        self._work: "queue.Queue[Optional[Tuple[str, FileStamp]]]" = queue.Queue()
+
+    # ---- discovery ---------------------------------------------------------------------------
+
+    def notify(self, path: str) -> None:
+        """Report a path that may be new or changed (called from the event thread)."""
+        if is_audio_file(path) and not os.path.basename(path).startswith("."):
+            with self._lock:
+                self._candidates.add(os.path.abspath(path))
+
+    def _examine(self, now: float) -> None:
+        with self._lock:
+            candidates, self._candidates = self._candidates, set()
+            busy, failed = set(self._busy), dict(self._failed)
+        for path in candidates:
+            if path in busy or path in self._pending:
+                continue
+            stamp = _stamp(path)
+            if stamp is None or self.index.is_done(path, stamp) or failed.get(path) == stamp:
+                continue
+            self._pending[path] = (stamp, now)
+
+    def _settle(self, now: float) -> None:
+        """Queue pending files whose size and mtime have not changed for `settle_seconds`."""
+        for path, (stamp, since) in list(self._pending.items()):
+            current = _stamp(path)
+            if current is None:
+                del self._pending[path]
+            elif current != stamp:
+                self._pending[path] = (current, now)  # still being written
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                with self._lock:
+                    self._busy.add(path)
+                self._work.put((path, stamp))
+
+    # ---- processing --------------------------------------------------------------------------
+
+    def _worker(self) -> None:
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+            path, stamp = item
+            result = self.handle(path)
+            self.index.record(path, stamp, result)
+            with self._lock:
+                self._busy.discard(path)
+                if result.ok:
+                    self._failed.pop(path, None)
+                else:
+                    self._failed[path] = stamp
+            if self.on_result:
+                self.on_result(result)
+
+    def _start_observer(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.dest_path)
+
+            def on_closed(self, event):
+                watcher.notify(event.src_path)
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.directory, recursive=True)
+        observer.start()
+        return observer
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Watch until `stop_event` is set (or forever). Existing unprocessed files are queued first."""
+        stop_event = stop_event or threading.Event()
+        poller = _DirPoller(self.directory)
+        observer = None
+        if self.use_events:
+            try:
+                observer = self._start_observer()
+            except Exception:
+                observer = None  # e.g. inotify watch limit reached; fall back to polling
+        # the start-up scan also primes the poller's directory list
+        for path in poller.scan():
+            self.notify(path)
+
+        threads = [threading.Thread(target=self._worker, name=f"watch-worker-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            while not stop_event.is_set():
+                if observer is None:
+                    for path in poller.poll():
+                        self.notify(path)
+                now = time.monotonic()
+                self._examine(now)
+                self._settle(now)
+                stop_event.wait(self.poll_interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            for _ in threads:
+                self._work.put(None)
+            for t in threads:
+                t.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pending": len(self._pending), "busy": len(self._busy), "failed": len(self._failed),
+                    "indexed": len(self.index), "events": self.use_events}
+
+
+def run_watch(
+    directory: str,
+    model_name: str,
+    language: Optional[str] = None,
+    mock: bool = False,
+    out_dir: Optional[str] = None,
+    index_path: Optional[str] = None,
+    settle_seconds: float = 2.0,
+    poll_interval: float = 1.0,
+    workers: int = 1,
+    use_events: Optional[bool] = None,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    **transcribe_options: Any,
+) -> FolderWatcher:
+    """Transcribe files arriving under `directory` until `stop_event` is set. Returns the watcher.
+
+    Extra keyword arguments are passed on to `transcribe_file`.
+    """
+    options = {"model_name": model_name, "language": language, "mock": mock, **transcribe_options}
+    index = ProcessedIndex(index_path or os.path.join(directory, INDEX_FILE_NAME), root=directory)
+
+    def handle(path: str) -> JobResult:
+        return _run_job(BatchJob(path, default_output_path(path, model_name, out_dir)), options)
+
+    watcher = FolderWatcher(directory, handle, index, settle_seconds=settle_seconds,
+                            poll_interval=poll_interval, workers=workers, use_events=use_events,
+                            on_result=on_result)
+    watcher.run(stop_event)
+    return watcher
@@ -0,0 +1,263 @@
+"""
+writers.py
+
+Output writers. A transcription is a sequence of segments ({"start", "end", "text"}, seconds; a
+list or a `segments.SegmentStore`); every requested format is written from it in one pass, each
+writer streaming its part to disk as the segments go by instead of building the whole document
+in memory.
+
+Formats:
+- txt   paragraphs (the original format, with a "Model:/Device:" header, plus "Language:" when known)
+- srt   SubRip subtitles
+- vtt   WebVTT subtitles
+- json  {"model", "device", "language", "language_probability", "cancelled", "segments": [...]}
+- tsv   start<TAB>end<TAB>text with integer milliseconds (the layout whisper's own tsv uses)
+
+Segments labelled with a `speaker` number (see `speakers.py`) start a new paragraph whenever the
+speaker changes, and their text is prefixed "Speaker N: " (at each change in txt, on every cue in
+srt/vtt/tsv; json keeps the text as is and adds a "speaker" field).
+
+API:
+- FORMATS
+- parse_formats("txt,srt") -> list[str]
+- output_paths(output_path, formats) -> dict[str, str]
+- write_outputs(segments, paths, model_name, device, language=None, note=None, cancelled=False, language_probability=None)
+- iter_paragraphs(segments) -> iterator of paragraph strings
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+FORMATS = ("txt", "srt", "vtt", "json", "tsv")
+
+# paragraph breaks: after this many segments, or before a pause longer than this
+PARAGRAPH_SEGMENTS = 3
+PARAGRAPH_GAP_SECONDS = 2.0
+
+
+def parse_formats(formats: Union[str, Iterable[str], None]) -> List[str]:
+    """Normalise "txt,srt" / ["SRT", "txt"] into a de-duplicated list of known formats."""
+    if formats is None:
+        return ["txt"]
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    out: List[str] = []
+    for fmt in formats:
+        fmt = fmt.strip().lower().lstrip(".")
+        if not fmt:
+            continue
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}; choose from {', '.join(FORMATS)}")
+        if fmt not in out:
+            out.append(fmt)
+    return out or ["txt"]
+
+
+def output_paths(output_path: str, formats: Iterable[str]) -> Dict[str, str]:
+    """Map each format to a file next to `output_path`.
+
+    `output_path` itself is used for the format its extension names (txt if the extension is not
+    a known format); the other formats get the same base name with their own extension.
+    """
+    base, ext = os.path.splitext(output_path)
+    ext = ext.lower().lstrip(".")
+    if ext not in FORMATS:
+        base, ext = output_path, "txt"
+    return {fmt: output_path if fmt == ext else f"{base}.{fmt}" for fmt in formats}
+
+
+def _speaker_prefix(seg: Dict[str, Any]) -> str:
+    speaker = seg.get("speaker")
+    return f"Speaker {speaker}: " if speaker is not None else ""
+
+
+class _Paragraphs:
+    """Incremental paragraph breaking: a break after PARAGRAPH_SEGMENTS segments, before a
+    pause longer than PARAGRAPH_GAP_SECONDS following a segment with text, and at every change of
+    speaker. A paragraph that starts a new speaker's turn is prefixed "Speaker N: "."""
+
+    def __init__(self):
+        self._current: List[str] = []
+        self._prev: Optional[Dict[str, Any]] = None
+        self._speaker: Any = None  # speaker of the last paragraph with text
+
+    def _close(self) -> List[str]:
+        done = [" ".join(self._current)] if self._current else []
+        self._current = []
+        return done
+
+    def add(self, seg: Dict[str, Any]) -> List[str]:
+        """Feed one segment; returns the paragraphs it completed (zero, one or two)."""
+        done = []
+        prev = self._prev
+        text = seg.get("text", "").strip()
+        speaker = seg.get("speaker")
+        if (prev is not None and self._current and prev.get("text", "").strip()
+                and seg.get("start", 0) - prev.get("end", 0) > PARAGRAPH_GAP_SECONDS):
+            done.extend(self._close())
+        if text and speaker != self._speaker:
+            done.extend(self._close())
+        self._prev = seg
+        if text:
+            if not self._current and speaker != self._speaker:
+                text = _speaker_prefix(seg) + text
+            self._speaker = speaker
+            self._current.append(text)
+            if len(self._current) >= PARAGRAPH_SEGMENTS:
+                done.extend(self._close())
+        return done
+
+    def flush(self) -> List[str]:
+        return self._close()
+
+
+def iter_paragraphs(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the paragraphs of a transcript, consuming `segments` one at a time."""
+    builder = _Paragraphs()
+    for seg in segments:
+        yield from builder.add(seg)
+    yield from builder.flush()
+
+
+def _clock(seconds: float, sep: str) -> str:
+    ms = max(0, int(round(seconds * 1000)))
+    h, rem = divmod(ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+class _Writer:
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.meta = meta
+        self.f = open(path, "w", encoding="utf-8")
+        self.begin()
+
+    def begin(self) -> None:
+        pass
+
+    def add(self, seg: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def end(self) -> None:
+        pass
+
+    def close(self) -> None:
+        try:
+            self.end()
+        finally:
+            self.f.close()
+
+
+class _TxtWriter(_Writer):
+    def begin(self):
+        self.f.write(f"Model: {self.meta['model']}\nDevice: {self.meta['device']}\n")
+        if self.meta.get("language"):
+            probability = self.meta.get("language_probability")
+            detected = f" (detected, {probability:.0%})" if probability is not None else ""
+            self.f.write(f"Language: {self.meta['language']}{detected}\n")
+        self.f.write("\n")
+        if self.meta.get("note"):
+            self.f.write(f"[{self.meta['note']}]\n\n")
+        self._paragraphs = _Paragraphs()
+        self._first = True
+
+    def _write(self, paragraphs: List[str]) -> None:
+        for p in paragraphs:
+            if not self._first:
+                self.f.write("\n\n")
+            self.f.write(p)
+            self._first = False
+
+    def add(self, seg):
+        self._write(self._paragraphs.add(seg))
+
+    def end(self):
+        self._write(self._paragraphs.flush())
+
+
+class _SrtWriter(_Writer):
+    def begin(self):
+        self._n = 0
+
+    def add(self, seg):
+        text = seg.get("text", "").strip()
+        if not text:
+            return
+        self._n += 1
+        self.f.write(f"{self._n}\n{_clock(seg.get('start', 0.0), ',')} --> {_clock(seg.get('end', 0.0), ',')}\n"
+                     f"{_speaker_prefix(seg)}{text}\n\n")
+
+
+class _VttWriter(_Writer):
+    def begin(self):
+        self.f.write("WEBVTT\n\n")
+
+    def add(self, seg):
+        text = seg.get("text", "").strip()
+        if text:
+            self.f.write(f"{_clock(seg.get('start', 0.0), '.')} --> {_clock(seg.get('end', 0.0), '.')}\n"
+                         f"{_speaker_prefix(seg)}{text}\n\n")
+
+
+class _JsonWriter(_Writer):
+    def begin(self):
+        head = {k: self.meta.get(k) for k in ("model", "device", "language", "language_probability", "cancelled")}
+        # written as an object whose last key is the segment array, one segment per line
+        self.f.write(json.dumps(head)[:-1] + ', "segments": [')
+        self._first = True
+
+    def add(self, seg):
+        item = {"start": round(seg.get("start", 0.0), 3), "end": round(seg.get("end", 0.0), 3),
+                "text": seg.get("text", "")}
+        if seg.get("speaker") is not None:
+            item["speaker"] = seg["speaker"]
+        self.f.write(("\n" if self._first else ",\n") + json.dumps(item, ensure_ascii=False))
+        self._first = False
+
+    def end(self):
+        self.f.write("\n]}\n")
+
+
+class _TsvWriter(_Writer):
+    def begin(self):
+        self.f.write("start\tend\ttext\n")
+
+    def add(self, seg):
+        text = " ".join(seg.get("text", "").split())
+        if text:
+            self.f.write(f"{int(round(seg.get('start', 0.0) * 1000))}\t{int(round(seg.get('end', 0.0) * 1000))}\t"
+                         f"{_speaker_prefix(seg)}{text}\n")
+
+
+_WRITERS = {"txt": _TxtWriter, "srt": _SrtWriter, "vtt": _VttWriter, "json": _JsonWriter, "tsv": _TsvWriter}
+
+
+def write_outputs(
+    segments: Iterable[Dict[str, Any]],
+    paths: Dict[str, str],
+    model_name: str,
+    device: str,
+    language: Optional[str] = None,
+    note: Optional[str] = None,
+    cancelled: bool = False,
+    language_probability: Optional[float] = None,
+) -> Dict[str, str]:
+    """Write every format in `paths` ({format: path}) in a single pass over `segments`.
+    `language_probability` marks `language` as detected rather than given."""
+    meta = {"model": model_name, "device": device, "language": language, "note": note, "cancelled": cancelled,
+            "language_probability": language_probability}
+    writers: List[_Writer] = []
+    try:
+        for fmt, path in paths.items():
+            writers.append(_WRITERS[fmt](path, meta))
+        for seg in segments:
+            for w in writers:
+                w.add(seg)
+    finally:
+        for w in writers:
+            w.close()
+    return dict(paths)